@@ -0,0 +1,28 @@
+"""add ingestion checkpoint to document
+
+Revision ID: e5f6g7h8i9j0
+Revises: d4e5f6g7h8i9
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5f6g7h8i9j0'
+down_revision = 'd4e5f6g7h8i9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Number of leading chunks whose embeddings are stored, used to resume ingestion
+    op.add_column(
+        'document',
+        sa.Column('checkpoint_chunks', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade():
+    op.drop_column('document', 'checkpoint_chunks')
@@ -0,0 +1,26 @@
+"""add rolling summary to chat conversation
+
+Revision ID: f6g7h8i9j0k1
+Revises: e5f6g7h8i9j0
+Create Date: 2026-10-17 01:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6g7h8i9j0k1'
+down_revision = 'e5f6g7h8i9j0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('chatconversation', sa.Column('summary', sa.String(), nullable=True))
+    op.add_column('chatconversation', sa.Column('summary_until', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('chatconversation', 'summary_until')
+    op.drop_column('chatconversation', 'summary')
@@ -0,0 +1,41 @@
+"""add composite indexes for keyset pagination of chat listings
+
+Revision ID: g7h8i9j0k1l2
+Revises: f6g7h8i9j0k1
+Create Date: 2026-10-17 02:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'g7h8i9j0k1l2'
+down_revision = 'f6g7h8i9j0k1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_chatconversation_user_id_created_at_id',
+        'chatconversation', ['user_id', 'created_at', 'id']
+    )
+    op.create_index(
+        'ix_chatconversation_project_id_created_at_id',
+        'chatconversation', ['project_id', 'created_at', 'id']
+    )
+    op.create_index(
+        'ix_chatmessage_conversation_id_created_at_id',
+        'chatmessage', ['conversation_id', 'created_at', 'id']
+    )
+    op.create_index(
+        'ix_documentreference_message_id_created_at_id',
+        'documentreference', ['message_id', 'created_at', 'id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_documentreference_message_id_created_at_id', table_name='documentreference')
+    op.drop_index('ix_chatmessage_conversation_id_created_at_id', table_name='chatmessage')
+    op.drop_index('ix_chatconversation_project_id_created_at_id', table_name='chatconversation')
+    op.drop_index('ix_chatconversation_user_id_created_at_id', table_name='chatconversation')
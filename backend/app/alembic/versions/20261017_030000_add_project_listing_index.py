@@ -0,0 +1,26 @@
+"""add composite index for paginated project listings
+
+Revision ID: h8i9j0k1l2m3
+Revises: g7h8i9j0k1l2
+Create Date: 2026-10-17 03:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'h8i9j0k1l2m3'
+down_revision = 'g7h8i9j0k1l2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_project_user_id_created_at_id',
+        'project', ['user_id', 'created_at', 'id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_project_user_id_created_at_id', table_name='project')
@@ -0,0 +1,62 @@
+"""add project token counters and message token counts
+
+Revision ID: i9j0k1l2m3n4
+Revises: h8i9j0k1l2m3
+Create Date: 2026-10-17 04:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'i9j0k1l2m3n4'
+down_revision = 'h8i9j0k1l2m3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('chatmessage', sa.Column('token_count', sa.Integer(), nullable=True))
+    op.add_column(
+        'project',
+        sa.Column('documents_tokens', sa.Integer(), nullable=False, server_default='0')
+    )
+    op.add_column(
+        'project',
+        sa.Column('conversations_tokens', sa.Integer(), nullable=False, server_default='0')
+    )
+
+    # Seed the counters; existing messages have no token count yet and are
+    # estimated at 4 characters per token until they are backfilled
+    op.execute(
+        """
+        UPDATE project SET documents_tokens = totals.tokens
+        FROM (
+            SELECT project_id, SUM(estimated_tokens) AS tokens
+            FROM document
+            WHERE upper(status) = 'COMPLETED'
+            GROUP BY project_id
+        ) AS totals
+        WHERE project.id = totals.project_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE project SET conversations_tokens = totals.tokens
+        FROM (
+            SELECT c.project_id, SUM(COALESCE(m.token_count, length(m.content) / 4)) AS tokens
+            FROM chatmessage m
+            JOIN chatconversation c ON c.id = m.conversation_id
+            WHERE c.project_id IS NOT NULL
+            GROUP BY c.project_id
+        ) AS totals
+        WHERE project.id = totals.project_id
+        """
+    )
+
+
+def downgrade():
+    op.drop_column('project', 'conversations_tokens')
+    op.drop_column('project', 'documents_tokens')
+    op.drop_column('chatmessage', 'token_count')
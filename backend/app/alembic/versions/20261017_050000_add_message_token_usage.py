@@ -0,0 +1,26 @@
+"""add completion token usage to chat messages
+
+Revision ID: j0k1l2m3n4o5
+Revises: i9j0k1l2m3n4
+Create Date: 2026-10-17 05:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'j0k1l2m3n4o5'
+down_revision = 'i9j0k1l2m3n4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('chatmessage', sa.Column('prompt_tokens', sa.Integer(), nullable=True))
+    op.add_column('chatmessage', sa.Column('completion_tokens', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('chatmessage', 'completion_tokens')
+    op.drop_column('chatmessage', 'prompt_tokens')
@@ -1,4 +1,4 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 from typing import Annotated, Optional
 
 import jwt
@@ -7,10 +7,11 @@ from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core import security
 from app.core.config import settings
-from app.core.db import engine
+from app.core.db import engine, get_async_session, limit_statement_time
 from app.common.schemas.token import TokenPayload
 from app.modules.users.models import User
 
@@ -27,12 +28,22 @@ reusable_oauth2 = OAuth2PasswordBearer(
 
 def get_db() -> Generator[Session, None, None]:
     with Session(engine) as session:
-        yield session
+        yield limit_statement_time(session)
 
 
 SessionDep = Annotated[Session, Depends(get_db)]
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with get_async_session() as session:
+        limit_statement_time(session.sync_session)
+        yield session
+
+
+# Session for async def endpoints, whose queries must not block the event loop
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
+
+
 def get_token_from_cookie_or_header(
     request: Request,
     authorization_token: Optional[str] = Depends(reusable_oauth2),
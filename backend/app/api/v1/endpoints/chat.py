@@ -1,28 +1,44 @@
+import asyncio
+import json
 import logging
-from typing import Any, List
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.api.v1.dependencies import SessionDep, CurrentUser
+from app.api.v1.dependencies import AsyncSessionDep, SessionDep, CurrentUser
+from app.common.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.config import settings
+from app.core.db import get_async_session
+from app.core.tokenizer import tokenizer
 from app.common.schemas.message import Message
+from app.modules.chat.models import ChatConversation
 from app.modules.chat.repository import (
+    async_chat_message_repository,
     chat_conversation_repository,
     chat_message_repository,
     document_reference_repository
 )
 from app.modules.chat.schemas import (
     ChatConversationCreate,
+    ChatConversationsPage,
     ChatConversationsPublic,
     ChatMessageCreate,
+    ChatMessagesPage,
     DocumentReferenceCreate,
     DocumentReferencePublic,
+    DocumentReferencesPage,
     ChatMessagePublic,
     ChatConversationPublic,
 )
-from app.modules.chat.chat_service import chat_service
+from app.modules.chat.chat_service import PreparedMessage, chat_service
+from app.modules.chat.context_builder import count_message_tokens
 from app.modules.projects.repository import project_repository
 from app.modules.projects.tasks.document_tasks import generate_conversation_title_task
+from app.services.openai_service import openai_service
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +87,50 @@ def get_user_conversations(
     return chat_service.get_user_conversations(session, current_user.id)
 
 
+@router.get("/conversations/page", response_model=ChatConversationsPage)
+def get_user_conversations_page(
+    *,
+    session: SessionDep,
+    current_user: CurrentUser,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+) -> Any:
+    """Get a page of conversations for the current user, newest first."""
+    try:
+        conversations, next_cursor = chat_service.get_conversations_page(
+            session, user_id=current_user.id, cursor=cursor, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ChatConversationsPage(data=conversations, next_cursor=next_cursor)
+
+
+@router.get("/projects/{project_id}/conversations", response_model=ChatConversationsPage)
+def get_project_conversations_page(
+    *,
+    session: SessionDep,
+    current_user: CurrentUser,
+    project_id: UUID,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+) -> Any:
+    """Get a page of conversations for a project, newest first."""
+    # Verify project ownership
+    project = project_repository.get(session, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if project.user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to access this project")
+
+    try:
+        conversations, next_cursor = chat_service.get_conversations_page(
+            session, project_id=project_id, cursor=cursor, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ChatConversationsPage(data=conversations, next_cursor=next_cursor)
+
+
 @router.get("/conversations/{project_id}", response_model=List[ChatConversationPublic])
 def get_project_conversations(
     *,
@@ -108,16 +168,73 @@ def get_conversation(
     return conversation
 
 
+@router.get("/conversations/{conversation_id}/messages", response_model=ChatMessagesPage)
+def get_conversation_messages(
+    *,
+    session: SessionDep,
+    current_user: CurrentUser,
+    conversation_id: UUID,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+) -> Any:
+    """Get a page of messages in a conversation, newest first."""
+    conversation = chat_service.get_conversation(session, conversation_id)
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    # Authorization check: verify conversation ownership
+    if conversation.user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to access this conversation")
+
+    try:
+        messages, next_cursor = chat_service.get_messages_page(
+            session, conversation_id, cursor=cursor, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ChatMessagesPage(data=messages, next_cursor=next_cursor)
+
+
+@router.get("/messages/{message_id}/references", response_model=DocumentReferencesPage)
+def get_message_references(
+    *,
+    session: SessionDep,
+    current_user: CurrentUser,
+    message_id: UUID,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+) -> Any:
+    """Get a page of document references of a message, in creation order."""
+    message = chat_message_repository.get(session, message_id)
+    if not message:
+        raise HTTPException(status_code=404, detail="Message not found")
+
+    # Authorization check: verify ownership of the message's conversation
+    conversation = chat_service.get_conversation(session, message.conversation_id)
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    if conversation.user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to access this conversation")
+
+    try:
+        references, next_cursor = document_reference_repository.get_page_by_message_id(
+            session, message_id, cursor=cursor, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return DocumentReferencesPage(data=references, next_cursor=next_cursor)
+
+
 @router.post("/conversations/{conversation_id}/messages", response_model=ChatMessagePublic, status_code=201)
 async def create_message(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUser,
     conversation_id: UUID,
     message: ChatMessageCreate
 ) -> Any:
     """Create a new message in a conversation."""
-    conversation = chat_service.get_conversation(session, conversation_id)
+    conversation = await chat_service.aget_conversation(session, conversation_id)
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
@@ -132,12 +249,158 @@ async def create_message(
     )
 
     # Auto-generate title after first message if not already titled
-    if not conversation.auto_generated_title and len(conversation.messages) == 2:  # user + assistant
-        generate_conversation_title_task.delay(str(conversation_id))
+    await _queue_title_generation(session, conversation)
 
     return response_message
 
 
+@router.post("/conversations/{conversation_id}/messages/stream")
+async def create_message_stream(
+    *,
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    conversation_id: UUID,
+    message: ChatMessageCreate
+) -> StreamingResponse:
+    """
+    Create a new message in a conversation and stream the reply as
+    Server-Sent Events.
+
+    Emits ``token`` events with ``{"content": ...}`` deltas as they are
+    generated, then a ``done`` event with the stored assistant message, or an
+    ``error`` event with ``{"detail": ...}`` if generation fails.
+    """
+    conversation = await chat_service.aget_conversation(session, conversation_id)
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    # Authorization check: verify conversation ownership
+    if conversation.user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized to access this conversation")
+
+    prepared = await chat_service.prepare_message(
+        session,
+        conversation_id=conversation_id,
+        message=message
+    )
+
+    return StreamingResponse(
+        _stream_reply(prepared),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: str, data: Any) -> str:
+    """Format a Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_reply(prepared: PreparedMessage) -> AsyncIterator[str]:
+    """
+    Stream the assistant reply, then store it once it is complete.
+
+    If the client disconnects mid-stream the generator is closed or
+    cancelled; the partial reply is stored anyway, and stores run shielded
+    so a disconnect cannot interrupt them.
+    """
+    parts: List[str] = []
+    usage: Dict[str, int] = {}
+    generating = True
+    try:
+        try:
+            async for delta in openai_service.stream_chat_completion(
+                messages=prepared.chat_messages,
+                model=settings.chat.model,
+                max_tokens=settings.chat.max_response_tokens,
+                temperature=0.2,
+                usage=usage
+            ):
+                parts.append(delta)
+                yield _sse("token", {"content": delta})
+        except HTTPException as e:
+            generating = False
+            yield _sse("error", {"detail": e.detail})
+            return
+        generating = False
+
+        try:
+            payload = await asyncio.shield(
+                _start_store(prepared, "".join(parts), usage)
+            )
+        except Exception as e:
+            logger.error(f"Error storing streamed reply: {str(e)}")
+            yield _sse("error", {"detail": "Error storing the assistant message"})
+            return
+
+        yield _sse("done", payload)
+    finally:
+        if generating and parts:
+            content = "".join(parts)
+            # Usage is only reported with the last chunk, so estimate it
+            if not usage:
+                usage = _estimate_usage(prepared, content)
+            try:
+                await asyncio.shield(_start_store(prepared, content, usage))
+            except Exception as e:
+                logger.error(f"Error storing interrupted reply: {str(e)}")
+
+
+# Stores that outlive a cancelled stream; the loop only keeps weak references
+_pending_stores: Set[asyncio.Task] = set()
+
+
+def _start_store(
+    prepared: PreparedMessage, content: str, usage: Dict[str, int]
+) -> asyncio.Task:
+    """Run _store_reply in its own task, so cancelling the caller does not stop it."""
+    task = asyncio.ensure_future(_store_reply(prepared, content, usage))
+    _pending_stores.add(task)
+    task.add_done_callback(_pending_stores.discard)
+    return task
+
+
+def _estimate_usage(prepared: PreparedMessage, content: str) -> Dict[str, int]:
+    """Estimate the token usage of a reply that was cut off before it was reported."""
+    return {
+        "prompt_tokens": sum(
+            count_message_tokens(message["content"]) for message in prepared.chat_messages
+        ),
+        "completion_tokens": tokenizer.count(content),
+    }
+
+
+async def _store_reply(
+    prepared: PreparedMessage, content: str, usage: Dict[str, int]
+) -> Dict[str, Any]:
+    """
+    Store a streamed reply and queue title generation after the first exchange.
+
+    Runs after the request's session is closed, so it uses its own session.
+    """
+    async with get_async_session() as session:
+        assistant_message = await chat_service.finalize_message(
+            session, prepared, content, usage
+        )
+        payload = ChatMessagePublic.model_validate(assistant_message).model_dump(mode="json")
+
+        conversation = await chat_service.aget_conversation(session, prepared.conversation_id)
+        await _queue_title_generation(session, conversation)
+
+    return payload
+
+
+async def _queue_title_generation(
+    session: AsyncSession, conversation: ChatConversation
+) -> None:
+    """Queue title generation after the first exchange, unless already titled."""
+    if conversation.auto_generated_title:
+        return
+    count = await async_chat_message_repository.count_by_conversation_id(session, conversation.id)
+    if count == 2:  # user + assistant
+        await run_in_threadpool(generate_conversation_title_task.delay, str(conversation.id))
+
+
 @router.patch("/conversations/{conversation_id}/title", response_model=ChatConversationPublic)
 def update_conversation_title(
     *,
@@ -7,12 +7,19 @@ from pathlib import Path
 from typing import Any, List
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 
-from app.api.v1.dependencies import CurrentUser, SessionDep
+from app.api.v1.dependencies import AsyncSessionDep, CurrentUser, SessionDep
 from app.common.schemas.message import Message
+from app.common.utils.files import save_upload_file
 from app.modules.projects.capacity_service import capacity_service
 from app.modules.projects.models import DocumentStatus
-from app.modules.projects.repository import document_repository, project_repository
+from app.modules.projects.repository import (
+    async_document_repository,
+    async_project_repository,
+    document_repository,
+    project_repository,
+)
 from app.modules.projects.schemas import (
     DocumentProgress,
     DocumentPublic,
@@ -65,12 +72,12 @@ def get_projects(
     """
     Get all projects for the current user.
     """
-    projects = project_repository.get_by_user_id(session, current_user.id)
-
-    # Apply pagination
-    paginated_projects = projects[skip : skip + limit]
+    projects = project_repository.get_by_user_id(
+        session, current_user.id, skip=skip, limit=limit
+    )
+    count = project_repository.count_by_user_id(session, current_user.id)
 
-    return ProjectsPublic(data=paginated_projects, count=len(projects))
+    return ProjectsPublic(data=projects, count=count)
 
 
 @router.get("/{project_id}", response_model=ProjectPublic)
@@ -206,7 +213,7 @@ def get_project_documents(
 @router.post("/{project_id}/documents", response_model=DocumentPublic, status_code=201)
 async def upload_document(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUser,
     project_id: uuid.UUID,
     file: UploadFile = File(...),
@@ -214,8 +221,12 @@ async def upload_document(
 ) -> Any:
     """
     Upload a document to a project.
+
+    The file is streamed to disk and parsed in the threadpool, and the
+    database is queried with an async session, so large uploads do not
+    block other requests on the event loop.
     """
-    project = project_repository.get(session, project_id)
+    project = await async_project_repository.get(session, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
@@ -239,40 +250,45 @@ async def upload_document(
     # Create document directory
     document_id = uuid.uuid4()
     doc_dir = Path("/app/documents") / str(project_id) / str(document_id)
-    doc_dir.mkdir(parents=True, exist_ok=True)
+    await run_in_threadpool(doc_dir.mkdir, parents=True, exist_ok=True)
 
     # Save file
     file_path = doc_dir / file.filename
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        file_size = file_path.stat().st_size
+        saved = await save_upload_file(file, file_path)
+        file_size = saved.size
 
-        logger.info(f"Saved file {file.filename} ({file_size} bytes) to {file_path}")
+        logger.info(
+            f"Saved file {file.filename} ({file_size} bytes, sha256 {saved.sha256}) "
+            f"to {file_path}"
+        )
 
     except Exception as e:
         logger.error(f"Error saving file: {e}")
         # Cleanup
         if doc_dir.exists():
-            shutil.rmtree(doc_dir)
+            await run_in_threadpool(shutil.rmtree, doc_dir)
         raise HTTPException(status_code=500, detail=f"Error saving file: {str(e)}")
 
     # Quick estimate of tokens before processing
     try:
-        estimated_tokens = document_processor.estimate_file_size_tokens(
-            str(file_path), file_ext.replace(".", "")
+        estimated_tokens = await run_in_threadpool(
+            document_processor.estimate_file_size_tokens,
+            str(file_path),
+            file_ext.replace(".", ""),
+            saved.sha256,
         )
     except Exception as e:
         logger.warning(f"Could not estimate tokens: {e}")
         estimated_tokens = file_size // 4  # Rough fallback
 
     # Check capacity
-    can_add, message = capacity_service.can_add_document(
+    can_add, message = await capacity_service.acan_add_document(
         session, project_id, estimated_tokens
     )
     if not can_add:
         # Cleanup file
-        shutil.rmtree(doc_dir)
+        await run_in_threadpool(shutil.rmtree, doc_dir)
         raise HTTPException(status_code=400, detail=message)
 
     # Create document record
@@ -287,16 +303,16 @@ async def upload_document(
         project_id=project_id,
     )
 
-    document = document_repository.create(session, obj_in=document_in)
+    document = await async_document_repository.create(session, obj_in=document_in)
 
     # Queue processing task
-    task = process_document_task.delay(str(document.id))
+    task = await run_in_threadpool(process_document_task.delay, str(document.id))
 
     # Update task_id
     document.task_id = task.id
     session.add(document)
-    session.commit()
-    session.refresh(document)
+    await session.commit()
+    await session.refresh(document)
 
     logger.info(
         f"Document {document.id} queued for processing with task {task.id}"
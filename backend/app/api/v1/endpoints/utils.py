@@ -1,3 +1,5 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from pydantic.networks import EmailStr
@@ -5,6 +7,9 @@ from pydantic.networks import EmailStr
 from app.api.v1.dependencies import get_current_active_superuser
 from app.common.schemas.message import Message
 from app.common.utils.email import generate_test_email, send_email
+from app.core.db import engine, peek_async_engine
+from app.core.pool import pool_metrics
+from app.services.query_embedding_cache import query_embedding_cache
 
 
 class HealthCheck(BaseModel):
@@ -14,6 +19,37 @@ class HealthCheck(BaseModel):
     message: str
     deployment: str
 
+
+class CacheMetrics(BaseModel):
+    """Hit and miss counters of a cache."""
+    hits: int
+    memory_hits: int
+    redis_hits: int
+    misses: int
+    hit_rate: float
+    size: int
+    max_size: int
+
+
+class PoolMetrics(BaseModel):
+    """Occupancy and checkout wait times of a database connection pool."""
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    wait_avg_ms: float
+    wait_max_ms: float
+
+
+class Metrics(BaseModel):
+    """Runtime metrics of this worker process."""
+    query_embedding_cache: CacheMetrics
+    database_pool: PoolMetrics
+    # None until the process serves its first async endpoint
+    async_database_pool: Optional[PoolMetrics] = None
+
 router = APIRouter(prefix="/utils", tags=["utils"])
 
 
@@ -44,3 +80,22 @@ async def health_check() -> HealthCheck:
         message="GitHub Actions deployment validated! ✨",
         deployment="automated"
     )
+
+
+@router.get(
+    "/metrics/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=Metrics,
+)
+def metrics() -> Metrics:
+    """
+    Runtime metrics of the worker process serving the request.
+    """
+    async_engine = peek_async_engine()
+    return Metrics(
+        query_embedding_cache=CacheMetrics(**query_embedding_cache.stats()),
+        database_pool=PoolMetrics(**pool_metrics(engine.pool)),
+        async_database_pool=(
+            PoolMetrics(**pool_metrics(async_engine.pool)) if async_engine is not None else None
+        ),
+    )
@@ -0,0 +1,55 @@
+"""File helpers for request handlers."""
+import hashlib
+from pathlib import Path
+from typing import BinaryIO, NamedTuple
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+# Bytes read from the upload and written to disk per step
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class SavedUpload(NamedTuple):
+    """Size and content hash of an upload written to disk."""
+
+    size: int
+    sha256: str
+
+
+def _write_chunk(buffer: BinaryIO, digest: "hashlib._Hash", chunk: bytes) -> None:
+    digest.update(chunk)
+    buffer.write(chunk)
+
+
+async def save_upload_file(
+    upload: UploadFile,
+    destination: Path,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> SavedUpload:
+    """
+    Stream an uploaded file to disk without blocking the event loop.
+
+    The upload is read in chunks, and each chunk is hashed and written in the
+    threadpool, so the size and SHA-256 are known once the file is saved.
+
+    Args:
+        upload: The uploaded file
+        destination: Path to write the file to
+        chunk_size: Bytes per read and write
+
+    Returns:
+        The size in bytes and the hex SHA-256 digest of the file
+    """
+    digest = hashlib.sha256()
+    size = 0
+
+    buffer = await run_in_threadpool(open, destination, "wb")
+    try:
+        while chunk := await upload.read(chunk_size):
+            await run_in_threadpool(_write_chunk, buffer, digest, chunk)
+            size += len(chunk)
+    finally:
+        await run_in_threadpool(buffer.close)
+
+    return SavedUpload(size=size, sha256=digest.hexdigest())
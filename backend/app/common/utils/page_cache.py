@@ -0,0 +1,90 @@
+"""Sidecar cache for extracted page text.
+
+Extracted pages are stored as gzip-compressed JSON lines next to the source
+file, keyed by the SHA-256 of the file contents, so text extracted once at
+upload time can be reused by ingestion without parsing the file again.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+SIDECAR_PREFIX = ".pages-"
+SIDECAR_SUFFIX = ".jsonl.gz"
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path: str) -> str:
+    """Return the hex SHA-256 digest of a file, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        while block := file.read(_HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def sidecar_path(file_path: str, content_hash: str) -> Path:
+    """Return the sidecar path for a file with the given content hash."""
+    return Path(file_path).parent / f"{SIDECAR_PREFIX}{content_hash}{SIDECAR_SUFFIX}"
+
+
+def read_pages(file_path: str, content_hash: str) -> Optional[Iterator[Dict]]:
+    """
+    Open the cached pages for a file, if a sidecar exists.
+
+    Args:
+        file_path: Path to the source file
+        content_hash: SHA-256 of the source file contents
+
+    Returns:
+        An iterator over the cached pages, or None if there is no sidecar
+    """
+    path = sidecar_path(file_path, content_hash)
+    if not path.exists():
+        return None
+
+    def iter_cached() -> Iterator[Dict]:
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                yield json.loads(line)
+
+    return iter_cached()
+
+
+def write_pages(
+    file_path: str, content_hash: str, pages: Iterable[Dict]
+) -> Iterator[Dict]:
+    """
+    Write pages to the sidecar of a file while passing them through.
+
+    The sidecar is written to a temporary file and moved into place only once
+    ``pages`` is exhausted, so readers never see a partial cache. If the
+    consumer stops early or extraction fails, no sidecar is left behind.
+
+    Args:
+        file_path: Path to the source file
+        content_hash: SHA-256 of the source file contents
+        pages: Pages to cache
+
+    Yields:
+        The pages, unchanged
+    """
+    path = sidecar_path(file_path, content_hash)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=SIDECAR_PREFIX, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as file:
+            for page in pages:
+                file.write(json.dumps(page, ensure_ascii=False) + "\n")
+                yield page
+        os.replace(tmp_path, path)
+        logger.info(f"Cached extracted pages for {file_path} at {path}")
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
@@ -0,0 +1,93 @@
+"""Keyset (cursor) pagination on ``(created_at, id)``.
+
+A cursor encodes the sort key of the last row of a page. The next page is
+read with a row comparison on ``(created_at, id)``, which Postgres serves
+from a composite index, so fetching any page costs the same as the first.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple, TypeVar
+
+from sqlalchemy import tuple_
+from sqlmodel import Session, SQLModel
+from sqlmodel.sql.expression import SelectOfScalar
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+ModelType = TypeVar("ModelType", bound=SQLModel)
+
+
+def encode_cursor(created_at: datetime, id: uuid.UUID) -> str:
+    """Encode the sort key of a row as an opaque URL-safe cursor."""
+    raw = json.dumps([created_at.isoformat(), str(id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    Decode a cursor created by encode_cursor.
+
+    Args:
+        cursor: The cursor
+
+    Returns:
+        The (created_at, id) sort key of the last row of the previous page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), uuid.UUID(id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def paginate(
+    session: Session,
+    statement: SelectOfScalar[ModelType],
+    model: type[ModelType],
+    *,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = True,
+) -> Tuple[List[ModelType], Optional[str]]:
+    """
+    Read one page of rows ordered by ``(created_at, id)``.
+
+    Args:
+        session: Database session
+        statement: Filtered select of ``model``, without ordering or limit
+        model: Model with ``created_at`` and ``id`` columns
+        cursor: Cursor returned with the previous page, or None for the first
+        limit: Maximum number of rows in the page
+        descending: Whether to return the newest rows first
+
+    Returns:
+        The rows of the page, and the cursor of the next page, or None if
+        this is the last page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    key = tuple_(model.created_at, model.id)
+    if cursor is not None:
+        bound = tuple_(*decode_cursor(cursor))
+        statement = statement.where(key < bound if descending else key > bound)
+
+    if descending:
+        statement = statement.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        statement = statement.order_by(model.created_at, model.id)
+
+    # Read one extra row to learn whether there is a next page
+    rows = list(session.exec(statement.limit(limit + 1)).all())
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
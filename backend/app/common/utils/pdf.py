@@ -0,0 +1,66 @@
+"""PDF text extraction helpers."""
+import logging
+from typing import Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+def _import_pymupdf():
+    """Import PyMuPDF under its current module name, falling back to ``fitz``."""
+    try:
+        import pymupdf
+    except ImportError:
+        import fitz as pymupdf
+    return pymupdf
+
+
+def pdf_page_count(file_path: str) -> int:
+    """Return the number of pages in a PDF, using PyMuPDF."""
+    pymupdf = _import_pymupdf()
+    with pymupdf.open(file_path) as doc:
+        return doc.page_count
+
+
+def _page(index: int, total_pages: int, text: str) -> Dict:
+    return {"page_number": index + 1, "page_total": total_pages, "text": text}
+
+
+def iter_pdf_pages_pymupdf(file_path: str) -> Iterator[Dict]:
+    """
+    Lazily extract text from a PDF with PyMuPDF.
+
+    Args:
+        file_path: Path to the PDF file
+
+    Yields:
+        Dictionaries with page_number, page_total, and text for non-empty pages
+    """
+    pymupdf = _import_pymupdf()
+    with pymupdf.open(file_path) as doc:
+        total_pages = doc.page_count
+        for i in range(total_pages):
+            text = doc[i].get_text()
+            if text.strip():
+                yield _page(i, total_pages, text)
+
+
+def iter_pdf_pages_pypdf2(file_path: str) -> Iterator[Dict]:
+    """
+    Lazily extract text from a PDF with PyPDF2.
+
+    Args:
+        file_path: Path to the PDF file
+
+    Yields:
+        Dictionaries with page_number, page_total, and text for non-empty pages
+    """
+    import PyPDF2
+
+    with open(file_path, "rb") as file:
+        reader = PyPDF2.PdfReader(file)
+        total_pages = len(reader.pages)
+
+        for i, page in enumerate(reader.pages):
+            text = page.extract_text()
+            if text.strip():
+                yield _page(i, total_pages, text)
@@ -1,6 +1,7 @@
 from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
 from uuid import UUID
 from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from pydantic import BaseModel
 
 ModelType = TypeVar("ModelType", bound=SQLModel)
@@ -52,3 +53,51 @@ class BaseCRUD(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         session.delete(obj)
         session.commit()
         return obj
+
+
+class AsyncBaseCRUD(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """BaseCRUD for AsyncSession, used by the async endpoints."""
+
+    def __init__(self, model: Type[ModelType]):
+        self.model = model
+
+    async def get(self, session: AsyncSession, id: UUID) -> Optional[ModelType]:
+        return await session.get(self.model, id)
+
+    async def get_multi(
+        self, session: AsyncSession, *, skip: int = 0, limit: int = 100
+    ) -> List[ModelType]:
+        statement = select(self.model).offset(skip).limit(limit)
+        return (await session.exec(statement)).all()
+
+    async def create(self, session: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        obj_in_data = obj_in.model_dump()
+        db_obj = self.model(**obj_in_data)
+        session.add(db_obj)
+        await session.commit()
+        await session.refresh(db_obj)
+        return db_obj
+
+    async def update(
+        self,
+        session: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+
+        db_obj.sqlmodel_update(update_data)
+        session.add(db_obj)
+        await session.commit()
+        await session.refresh(db_obj)
+        return db_obj
+
+    async def remove(self, session: AsyncSession, *, id: UUID) -> ModelType:
+        obj = await session.get(self.model, id)
+        await session.delete(obj)
+        await session.commit()
+        return obj
@@ -35,6 +35,32 @@ class RedisSettings(BaseSettings):
         return f"redis://{self.host}:{self.port}/{self.db}"
 
 
+class DatabaseSettings(BaseSettings):
+    # Read from POSTGRES_POOL_SIZE, POSTGRES_MAX_OVERFLOW, ...
+    model_config = SettingsConfigDict(
+        env_prefix="POSTGRES_",
+        env_file=("../.env", ".env.local"),
+        env_ignore_empty=True,
+        extra="ignore",
+    )
+
+    # Connections per process: API workers and Celery processes each own a pool
+    pool_size: int = 10
+    max_overflow: int = 10
+    pool_timeout: int = 30
+    # Recycle connections before server or proxy idle timeouts close them
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    # Async pool of API processes, opened on top of the sync pool on first
+    # use; API processes hold up to pool_size + async_pool_size connections
+    # plus overflow, Celery processes only the sync pool
+    async_pool_size: int = 5
+    async_max_overflow: int = 5
+    # Server-side limit per statement of API request sessions; 0 disables it.
+    # Celery tasks and DDL run without a limit.
+    statement_timeout_ms: int = 30000
+
+
 class ChatSettings(BaseSettings):
     model: str = "gpt-4o"
     max_tokens_per_message: int = 4000
@@ -42,6 +68,25 @@ class ChatSettings(BaseSettings):
     max_documents_per_query: int = 15
     similarity_threshold: float = 0.7
     max_response_tokens: int = 4000
+    # Prompt budgets; keep their sum plus max_response_tokens under max_context_length
+    history_max_tokens: int = 16000
+    history_max_messages: int = 100
+    retrieved_context_max_tokens: int = 8000
+    # Older turns are summarized once the unsummarized tail reaches the trigger,
+    # leaving the most recent keep_recent tokens of turns verbatim
+    summary_trigger_tokens: int = 8000
+    summary_keep_recent_tokens: int = 3000
+    summary_input_max_tokens: int = 12000
+    summary_max_tokens: int = 800
+    # A queued summary blocks further enqueues for its conversation until it
+    # finishes, or until this many seconds pass if the task is lost
+    summary_pending_ttl_seconds: int = 600
+    # Query embeddings cached in process (LRU entries) and in Redis
+    query_embedding_cache_size: int = 1024
+    query_embedding_cache_ttl_seconds: int = 86400
+    # Backfill of message token counts: messages per batch, tokenizer processes
+    token_backfill_batch_size: int = 2000
+    token_backfill_workers: int = 4
 
 
 class OpenAISettings(BaseSettings):
@@ -49,6 +94,22 @@ class OpenAISettings(BaseSettings):
     model: str = "gpt-4o"  
     embedding_model: str = "text-embedding-3-large"
     embedding_dimensions: int = 1536
+    # Per-request limits for batched embedding calls (API caps: 2048 inputs, 300k tokens)
+    embedding_batch_max_inputs: int = 2048
+    embedding_batch_max_tokens: int = 250000
+    # Concurrent embedding requests in flight during ingestion
+    embedding_concurrency: int = 4
+    embedding_max_retries: int = 6
+
+
+class IngestionSettings(BaseSettings):
+    chunk_max_tokens: int = 500
+    chunk_overlap_tokens: int = 50
+    # Number of chunks embedded and stored per ingestion step
+    batch_size: int = 512
+    # Progress is written at most every N chunks or T milliseconds
+    progress_every_chunks: int = 64
+    progress_interval_ms: int = 2000
 
 
 class VectorStoreSettings(BaseSettings):
@@ -102,6 +163,11 @@ class Settings(BaseSettings):
             port=self.POSTGRES_PORT,
             path=self.POSTGRES_DB,
         )
+
+    @computed_field
+    @property
+    def database(self) -> DatabaseSettings:
+        return DatabaseSettings()
     
     # Redis settings
     REDIS_HOST: str = "redis"
@@ -161,6 +227,11 @@ class Settings(BaseSettings):
     def chat(self) -> ChatSettings:
         return ChatSettings()
 
+    @computed_field
+    @property
+    def ingestion(self) -> IngestionSettings:
+        return IngestionSettings()
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -1,10 +1,14 @@
 from sqlmodel import Session, create_engine, select
 from collections.abc import Generator
+from typing import Optional
 from contextlib import contextmanager
 from sqlalchemy.exc import ProgrammingError, OperationalError, IntegrityError
-from sqlalchemy import text
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
+from app.core.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
 
 # Import all models to ensure proper SQLModel initialization
 from app.modules.users.models import User
@@ -15,7 +19,95 @@ from app.modules.chat.models import ChatConversation
 from app.modules.users.schemas import UserCreate
 from app.modules.users.service import user_service
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+
+# settings.database parses the environment on every access, so it is read
+# once here rather than per engine argument or per transaction
+_database = settings.database
+
+
+def _statement_timeout_listener(timeout_ms: int):
+    """Build an after_begin listener that bounds the statements of a transaction."""
+    statement = f"SET LOCAL statement_timeout = {int(timeout_ms)}"
+
+    def set_statement_timeout(session: Session, transaction, connection) -> None:
+        connection.exec_driver_sql(statement)
+
+    return set_statement_timeout
+
+
+_set_statement_timeout = _statement_timeout_listener(_database.statement_timeout_ms)
+
+
+def limit_statement_time(session: Session) -> Session:
+    """
+    Apply the configured statement timeout to every transaction of a session.
+
+    Only API request sessions are limited; Celery tasks and DDL share the
+    engine and run without a timeout. SET LOCAL ends with each transaction,
+    so pooled connections never carry the limit elsewhere.
+    """
+    if _database.statement_timeout_ms:
+        event.listen(session, "after_begin", _set_statement_timeout)
+    return session
+
+
+engine = create_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=InstrumentedQueuePool,
+    pool_size=_database.pool_size,
+    max_overflow=_database.max_overflow,
+    pool_timeout=_database.pool_timeout,
+    pool_recycle=_database.pool_recycle,
+    pool_pre_ping=_database.pool_pre_ping,
+)
+
+# Engine of the async endpoints, created on first use, so that only API
+# processes open its pool and Celery workers keep a single pool
+_async_engine: Optional[AsyncEngine] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Return the engine of the async endpoints, creating it on first use.
+
+    Its pool is sized by async_pool_size and async_max_overflow, on top of
+    the sync pool that API processes still use for sync endpoints.
+    """
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            str(settings.SQLALCHEMY_DATABASE_URI),
+            poolclass=InstrumentedAsyncQueuePool,
+            pool_size=_database.async_pool_size,
+            max_overflow=_database.async_max_overflow,
+            pool_timeout=_database.pool_timeout,
+            pool_recycle=_database.pool_recycle,
+            pool_pre_ping=_database.pool_pre_ping,
+        )
+    return _async_engine
+
+
+def peek_async_engine() -> Optional[AsyncEngine]:
+    """Return the async engine if it was created, without creating it."""
+    return _async_engine
+
+
+def get_async_session() -> AsyncSession:
+    """
+    Create a session on the async engine.
+
+    Objects stay loaded after commit, since lazy loads cannot run under
+    asyncio.
+    """
+    return AsyncSession(get_async_engine(), expire_on_commit=False)
+
+
+async def dispose_async_engine() -> None:
+    """Close the async engine's connections, if it was ever created."""
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
@@ -42,6 +134,14 @@ SELECT create_hypertable('document_embeddings', 'created_at',
 CREATE INDEX IF NOT EXISTS document_embeddings_embedding_idx
 ON document_embeddings USING ivfflat (embedding vector_l2_ops)
 WITH (lists = 100);
+
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    model TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    embedding vector(1536) NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+    PRIMARY KEY (model, content_hash)
+);
 """
 
 def init_db(session: Session) -> None:
@@ -0,0 +1,96 @@
+"""Connection pool with checkout wait metrics."""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolStats:
+    """Thread-safe counters of connection checkouts and their wait times."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, wait_seconds: float, timed_out: bool = False) -> None:
+        """Record one checkout attempt and how long it waited for a connection."""
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Return the counters.
+
+        Returns:
+            Dictionary with checkouts, timeouts, wait_avg_ms, and wait_max_ms
+        """
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_seconds_total / attempts * 1000, 3) if attempts else 0.0,
+                "wait_max_ms": round(self.wait_seconds_max * 1000, 3),
+            }
+
+
+# Counters of this process; shared by recreated pools, e.g. after dispose()
+pool_stats = PoolStats()
+async_pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection."""
+
+    def __init__(self, *args: Any, stats: Optional[PoolStats] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.stats = stats or pool_stats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - start)
+        return connection
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """InstrumentedQueuePool for asyncio engines, recording into async_pool_stats."""
+
+    def __init__(self, *args: Any, stats: Optional[PoolStats] = None, **kwargs: Any):
+        super().__init__(*args, stats=stats or async_pool_stats, **kwargs)
+
+
+def pool_metrics(pool: QueuePool) -> Dict[str, float]:
+    """
+    Return the occupancy and wait metrics of a pool.
+
+    Args:
+        pool: The engine's connection pool
+
+    Returns:
+        Dictionary with size, checked_in, checked_out, overflow, and, for an
+        InstrumentedQueuePool, the checkout counters of PoolStats.snapshot
+    """
+    metrics: Dict[str, float] = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+    }
+    if isinstance(pool, InstrumentedQueuePool):
+        metrics.update(pool.stats.snapshot())
+    return metrics
@@ -0,0 +1,138 @@
+"""Process-wide tiktoken tokenizer shared by all token counting.
+
+Loading a BPE encoding takes a noticeable fraction of a second, so it is
+loaded once per process and warmed up at startup: in the FastAPI lifespan
+and in each Celery worker process.
+"""
+import logging
+import threading
+from typing import List, Optional
+
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+# Model whose encoding is used, and the encoding used if it cannot be loaded
+DEFAULT_MODEL = "gpt-4o"
+FALLBACK_ENCODING = "cl100k_base"
+
+# Threads tiktoken uses to encode a batch
+BATCH_THREADS = 8
+
+
+class Tokenizer:
+    """
+    Lazily loaded tiktoken encoding with single and batch encode/count APIs.
+
+    If no encoding can be loaded, counts fall back to an estimate of 4
+    characters per token. Special tokens are encoded as plain text.
+    """
+
+    def __init__(self, model: str = DEFAULT_MODEL, num_threads: int = BATCH_THREADS):
+        """
+        Initialize the tokenizer.
+
+        Args:
+            model: Model whose encoding to load
+            num_threads: Threads used to encode batches
+        """
+        self.model = model
+        self.num_threads = num_threads
+        self._encoding: Optional[tiktoken.Encoding] = None
+        self._load_failed = False
+        self._lock = threading.Lock()
+
+    @property
+    def encoding(self) -> Optional[tiktoken.Encoding]:
+        """Load the tiktoken encoding on first access; None if unavailable."""
+        if self._encoding is None and not self._load_failed:
+            with self._lock:
+                if self._encoding is None and not self._load_failed:
+                    self._encoding = self._load()
+                    self._load_failed = self._encoding is None
+        return self._encoding
+
+    def _load(self) -> Optional[tiktoken.Encoding]:
+        try:
+            encoding = tiktoken.encoding_for_model(self.model)
+            logger.info(f"Loaded {encoding.name} encoding for {self.model}")
+            return encoding
+        except Exception as e:
+            logger.warning(
+                f"Error loading {self.model} encoding: {e}, falling back to {FALLBACK_ENCODING}"
+            )
+        try:
+            return tiktoken.get_encoding(FALLBACK_ENCODING)
+        except Exception as e:
+            logger.error(f"Error loading {FALLBACK_ENCODING} encoding: {e}")
+            return None
+
+    def warm_up(self) -> None:
+        """Load the encoding and run it once, so that requests never pay for it."""
+        if self.encoding is not None:
+            self.encoding.encode("warm up")
+
+    def encode(self, text: str) -> List[int]:
+        """
+        Encode a text.
+
+        Args:
+            text: The text to encode
+
+        Returns:
+            Token ids, or an empty list if no encoding is available
+        """
+        if self.encoding is None:
+            return []
+        return self.encoding.encode(text, disallowed_special=())
+
+    def encode_batch(self, texts: List[str]) -> List[List[int]]:
+        """
+        Encode texts across the tokenizer's threads.
+
+        Args:
+            texts: The texts to encode
+
+        Returns:
+            Token ids of each text, in order
+        """
+        if self.encoding is None:
+            return [[] for _ in texts]
+        return self.encoding.encode_batch(
+            texts, num_threads=self.num_threads, disallowed_special=()
+        )
+
+    def count(self, text: str) -> int:
+        """
+        Count the tokens of a text.
+
+        Args:
+            text: The text to count tokens for
+
+        Returns:
+            Number of tokens in the text
+        """
+        if not text:
+            return 0
+        if self.encoding is None:
+            # Fallback: rough estimate of 4 chars per token
+            return len(text) // 4
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        """
+        Count the tokens of texts, encoding them across the tokenizer's threads.
+
+        Args:
+            texts: The texts to count tokens for
+
+        Returns:
+            Number of tokens of each text, in order
+        """
+        if self.encoding is None:
+            return [len(text) // 4 for text in texts]
+        return [len(tokens) for tokens in self.encode_batch(texts)]
+
+
+# Create a singleton instance
+tokenizer = Tokenizer()
@@ -2,13 +2,19 @@ import structlog
 from app.core.logger import setup_logging
 
 setup_logging()
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 import sentry_sdk
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.db import dispose_async_engine
+from app.core.tokenizer import tokenizer
 
 logger = structlog.get_logger()
 
@@ -28,10 +34,21 @@ if settings.ENVIRONMENT != "local":
             "Set SENTRY_DSN environment variable to enable error monitoring."
         )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Load the tokenizer before serving, so no request pays the cold load
+    await run_in_threadpool(tokenizer.warm_up)
+    logger.info("Tokenizer warmed up")
+    yield
+    # Close the async pool's connections on the event loop they belong to
+    await dispose_async_engine()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
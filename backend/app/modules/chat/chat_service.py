@@ -1,28 +1,50 @@
 import logging
 import uuid
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.common.utils.pagination import DEFAULT_PAGE_SIZE
 from app.core.config import settings
+from app.modules.chat.context_builder import (
+    message_tokens,
+    pack_history,
+    pack_references
+)
 from app.modules.chat.models import ChatConversation, ChatMessage, DocumentReference
 from app.modules.chat.repository import (
+    async_chat_conversation_repository,
+    async_chat_message_repository,
+    async_document_reference_repository,
     chat_conversation_repository,
-    chat_message_repository,
-    document_reference_repository
+    chat_message_repository
 )
 from app.modules.chat.schemas import (
     ChatConversationCreate,
     ChatMessageCreate,
     DocumentReferenceCreate
 )
+from app.modules.chat.tasks.summary_tasks import request_summary
 from app.services.openai_service import openai_service
 from app.services.vector_store import vector_store
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class PreparedMessage:
+    """A stored user message and the prompt for its assistant reply."""
+    conversation_id: uuid.UUID
+    chat_messages: List[Dict[str, str]]
+    document_references: List[DocumentReferenceCreate] = field(default_factory=list)
+    use_documents: bool = True
+
+
 class ChatService:
     """Service layer for chat operations."""
 
@@ -60,6 +82,14 @@ class ChatService:
             )
         return conversation
 
+    async def aget_conversation(
+        self,
+        session: AsyncSession,
+        conversation_id: uuid.UUID
+    ) -> Optional[ChatConversation]:
+        """Get a chat conversation by ID without blocking the event loop."""
+        return await async_chat_conversation_repository.get(session, conversation_id)
+
     def get_conversations(
         self,
         session: Session,
@@ -76,6 +106,37 @@ class ChatService:
         """Get all conversations for a user."""
         return chat_conversation_repository.get_by_user_id(session, user_id)
 
+    def get_conversations_page(
+        self,
+        session: Session,
+        *,
+        user_id: Optional[uuid.UUID] = None,
+        project_id: Optional[uuid.UUID] = None,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[ChatConversation], Optional[str]]:
+        """Get a page of conversations for a project, or else for a user."""
+        if project_id is not None:
+            return chat_conversation_repository.get_page_by_project_id(
+                session, project_id, cursor=cursor, limit=limit
+            )
+        return chat_conversation_repository.get_page_by_user_id(
+            session, user_id, cursor=cursor, limit=limit
+        )
+
+    def get_messages_page(
+        self,
+        session: Session,
+        conversation_id: uuid.UUID,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[ChatMessage], Optional[str]]:
+        """Get a page of messages for a conversation, newest first."""
+        return chat_message_repository.get_page_by_conversation_id(
+            session, conversation_id, cursor=cursor, limit=limit
+        )
+
     def delete_conversation(self, session: Session, conversation_id: uuid.UUID) -> bool:
         """Delete a chat conversation."""
         conversation = chat_conversation_repository.get(session, conversation_id)
@@ -86,27 +147,63 @@ class ChatService:
 
     async def process_message(
         self,
-        session: Session,
+        session: AsyncSession,
         conversation_id: uuid.UUID,
         message: ChatMessageCreate
     ) -> ChatMessage:
         """Process a new chat message."""
+        prepared = await self.prepare_message(session, conversation_id, message)
+
+        # Get assistant response
+        usage: Dict[str, int] = {}
+        response = await openai_service.create_chat_completion(
+            messages=prepared.chat_messages,
+            model=settings.chat.model,
+            max_tokens=settings.chat.max_response_tokens,
+            temperature=0.2,
+            usage=usage
+        )
+        return await self.finalize_message(session, prepared, response, usage)
+
+    async def prepare_message(
+        self,
+        session: AsyncSession,
+        conversation_id: uuid.UUID,
+        message: ChatMessageCreate
+    ) -> PreparedMessage:
+        """
+        Store a new user message and build the prompt for the assistant reply.
+
+        Retrieves relevant document chunks, stores their references on the
+        user message, and assembles the chat completion messages.
+        """
         # Get conversation
-        conversation = chat_conversation_repository.get(session, conversation_id)
+        conversation = await async_chat_conversation_repository.get(session, conversation_id)
         if not conversation:
             raise ValueError(f"Conversation {conversation_id} not found")
 
         # Create user message
         message.role = message.role.lower()  # Ensure role is lowercase
-        user_message = chat_message_repository.create(
+        user_message = await async_chat_message_repository.create(
             session,
             obj_in=message,
             conversation_id=conversation_id
         )
 
-        # Get conversation history
-        history = chat_message_repository.get_by_conversation_id(session, conversation_id)
-        messages = [{"role": msg.role.lower(), "content": msg.content} for msg in history]
+        # Get unsummarized history, newest turns first, within the history budget
+        history = await async_chat_message_repository.get_recent_by_conversation_id(
+            session,
+            conversation_id,
+            limit=settings.chat.history_max_messages,
+            exclude_id=user_message.id,
+            after=conversation.summary_until
+        )
+        history_tokens = [message_tokens(msg) for msg in history]
+        messages = pack_history(history, settings.chat.history_max_tokens, history_tokens)
+
+        # Fold older turns into the rolling summary once the tail grows too long
+        if sum(history_tokens) >= settings.chat.summary_trigger_tokens:
+            await run_in_threadpool(request_summary, str(conversation_id))
         
         # Search relevant documents if enabled
         all_relevant_chunks = []
@@ -114,7 +211,7 @@ class ChatService:
         if conversation.use_documents and message.use_documents and conversation.project_id:
             # Search in vector store with metadata filter for project_id
             logger.info(f"Searching for relevant documents for conversation {conversation_id}")
-            results = vector_store.search(
+            results = await vector_store.asearch(
                 query_text=message.content,
                 limit=settings.chat.max_documents_per_query,
                 metadata_filter={
@@ -122,24 +219,21 @@ class ChatService:
                 }
             )
             
-            logger.info(f"Vector store results type: {type(results)}")
-            if not results.empty:
-                logger.info(f"Columns available: {results.columns.tolist()}")
-                logger.info(f"First row: {results.iloc[0].to_dict()}")
-
-                for _, row in results.iterrows():
+            logger.info(f"Vector search returned {len(results)} hits")
+            if results:
+                for hit in results:
                     # Get distance from vector search
-                    distance = float(row["distance"])
+                    distance = hit.distance
                     logger.info(f"Document distance: {distance}")
                     
                     # Use distance directly - smaller distance means more relevant
                     if distance < 0.7:  # Adjust threshold to get more relevant documents
-                        content = row["content"]
-                        document_id = row["document_id"]
-                        document_type = row["document_type"]
-                        filename = row["filename"] or "unknown.txt" 
-                        page_number = row["page_number"]
-                        page_total = row["page_total"]
+                        content = hit.content
+                        document_id = hit.metadata.get("document_id")
+                        document_type = hit.metadata.get("document_type")
+                        filename = hit.metadata.get("filename") or "unknown.txt" 
+                        page_number = hit.metadata.get("page_number")
+                        page_total = hit.metadata.get("page_total")
                         
                         # Add content to relevant chunks and create reference
                         all_relevant_chunks.append(content)
@@ -158,22 +252,25 @@ class ChatService:
                         document_references.append(ref)
                         logger.info(f"Added document reference - id: {document_id}, type: {document_type}, filename: {filename}, distance: {distance}")
 
+                # Keep the retrieved context within its own budget
+                document_references = pack_references(
+                    document_references, settings.chat.retrieved_context_max_tokens
+                )
+                all_relevant_chunks = [ref.content_snippet for ref in document_references]
+
                 logger.info(f"Total document references found: {len(document_references)}")
                 if document_references:
                     logger.info(f"Creating {len(document_references)} document references")
                     try:
                         # Create document references for user message
-                        refs = document_reference_repository.create_multi(
+                        refs = await async_document_reference_repository.create_multi(
                             session, refs=document_references
                         )
-                        user_message.document_references = refs
-                        # Refresh message to get the references
-                        session.refresh(user_message)
-                        session.commit()
+                        set_committed_value(user_message, "document_references", refs)
                         logger.info(f"Successfully created {len(refs)} document references for user message")
                     except Exception as e:
                         logger.error(f"Error creating document references: {str(e)}")
-                        session.rollback()
+                        await session.rollback()
                         raise
 
         # Prepare chat messages
@@ -228,33 +325,57 @@ class ChatService:
             )
             chat_messages.append({"role": "system", "content": guidance})
         
-        # Add conversation history
+        # Add summary of older turns, then the recent conversation history
+        if conversation.summary:
+            chat_messages.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{conversation.summary}"
+            })
         chat_messages.extend(messages)
         
         # Add current message
         chat_messages.append({"role": "user", "content": message.content})
 
-        # Get assistant response
-        response = await openai_service.create_chat_completion(
-            messages=chat_messages,
-            model=settings.chat.model,
-            max_tokens=settings.chat.max_response_tokens,
-            temperature=0.2
+        return PreparedMessage(
+            conversation_id=conversation_id,
+            chat_messages=chat_messages,
+            document_references=document_references,
+            use_documents=message.use_documents,
         )
+
+    async def finalize_message(
+        self,
+        session: AsyncSession,
+        prepared: PreparedMessage,
+        response: str,
+        usage: Optional[Dict[str, int]] = None
+    ) -> ChatMessage:
+        """
+        Store the assistant reply to a prepared message, with the same
+        document references as the user message and the token usage of the
+        completion, if reported.
+        """
+        usage = usage or {}
+        conversation_id = prepared.conversation_id
+        document_references = prepared.document_references
+
         # Create assistant message
-        assistant_message = chat_message_repository.create(
+        assistant_message = await async_chat_message_repository.create(
             session,
             obj_in=ChatMessageCreate(
                 role="assistant",
                 content=response,
-                use_documents=message.use_documents
+                use_documents=prepared.use_documents
             ),
-            conversation_id=conversation_id
+            conversation_id=conversation_id,
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens")
         )
         
         # Create document references for assistant message
+        refs: List[DocumentReference] = []
         if document_references:
-            refs = document_reference_repository.create_multi(
+            refs = await async_document_reference_repository.create_multi(
                 session, refs=[
                     DocumentReferenceCreate(
                         message_id=assistant_message.id,
@@ -268,9 +389,9 @@ class ChatService:
                     ) for ref in document_references
                 ]
             )
-            assistant_message.document_references = refs
-            session.refresh(assistant_message)
-        
+        # Attach the references without a lazy load, which asyncio cannot run
+        set_committed_value(assistant_message, "document_references", refs)
+
         logger.info(f"Generated response for conversation {conversation_id}")
         return assistant_message
 
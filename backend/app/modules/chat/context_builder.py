@@ -0,0 +1,105 @@
+"""Token-budgeted prompt assembly for chat completions."""
+import logging
+from typing import Dict, List, Optional
+
+from app.core.tokenizer import tokenizer
+from app.modules.chat.models import ChatMessage
+from app.modules.chat.schemas import DocumentReferenceCreate
+
+logger = logging.getLogger(__name__)
+
+# Tokens the chat format adds around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def count_message_tokens(content: str) -> int:
+    """Count the prompt tokens of a chat message with the given content."""
+    return tokenizer.count(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def message_tokens(message: ChatMessage) -> int:
+    """
+    Count the prompt tokens of a stored chat message, using its stored token
+    count and tokenizing only legacy messages without one.
+    """
+    if message.token_count is None:
+        return count_message_tokens(message.content)
+    return message.token_count + MESSAGE_OVERHEAD_TOKENS
+
+
+def pack_history(
+    messages_newest_first: List[ChatMessage],
+    max_tokens: int,
+    token_counts: Optional[List[int]] = None,
+) -> List[Dict[str, str]]:
+    """
+    Pack conversation history into a token budget, keeping the newest turns.
+
+    Messages are taken newest-first until the next one would exceed the
+    budget; older messages are dropped, and are expected to be covered by the
+    conversation summary.
+
+    Args:
+        messages_newest_first: Previous messages, newest first
+        max_tokens: Token budget for the history
+        token_counts: Precomputed message_tokens of each message
+
+    Returns:
+        Chat completion messages in chronological order
+    """
+    if token_counts is None:
+        token_counts = [message_tokens(m) for m in messages_newest_first]
+
+    packed: List[Dict[str, str]] = []
+    used = 0
+    dropped = 0
+
+    for message, tokens in zip(messages_newest_first, token_counts):
+        if dropped:
+            dropped += 1
+            continue
+
+        if used + tokens > max_tokens:
+            dropped += 1
+            continue
+
+        packed.append({"role": message.role.lower(), "content": message.content})
+        used += tokens
+
+    packed.reverse()
+    logger.info(
+        f"Packed {len(packed)} history messages into {used} tokens "
+        f"(budget {max_tokens}, dropped {dropped})"
+    )
+    return packed
+
+
+def pack_references(
+    references: List[DocumentReferenceCreate], max_tokens: int
+) -> List[DocumentReferenceCreate]:
+    """
+    Keep the most relevant document references that fit a token budget.
+
+    Args:
+        references: References ordered from most to least relevant
+        max_tokens: Token budget for the retrieved context
+
+    Returns:
+        The leading references whose snippets fit in the budget
+    """
+    packed: List[DocumentReferenceCreate] = []
+    used = 0
+
+    token_counts = tokenizer.count_batch([ref.content_snippet for ref in references])
+    for reference, tokens in zip(references, token_counts):
+        if used + tokens > max_tokens:
+            break
+        packed.append(reference)
+        used += tokens
+
+    if len(packed) < len(references):
+        logger.info(
+            f"Kept {len(packed)} of {len(references)} document references "
+            f"within {max_tokens} context tokens"
+        )
+    return packed
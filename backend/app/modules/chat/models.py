@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 from typing import List, Optional, TYPE_CHECKING
 
-from sqlmodel import Column, Field, Relationship, SQLModel, JSON
+from sqlmodel import Column, Field, Index, Relationship, SQLModel, JSON
 
 if TYPE_CHECKING:
     from app.modules.projects.models import Project
@@ -10,6 +10,12 @@ if TYPE_CHECKING:
 
 class ChatConversation(SQLModel, table=True):
     """Model for a chat conversation."""
+    __table_args__ = (
+        # Keyset pagination of conversation listings
+        Index("ix_chatconversation_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_chatconversation_project_id_created_at_id", "project_id", "created_at", "id"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: uuid.UUID = Field(foreign_key="user.id", ondelete="CASCADE")
     project_id: Optional[uuid.UUID] = Field(default=None, nullable=True, foreign_key="project.id", ondelete="CASCADE")
@@ -21,6 +27,10 @@ class ChatConversation(SQLModel, table=True):
     auto_generated_title: bool = Field(default=False)
     title_generation_task_id: Optional[str] = None
 
+    # Rolling summary of all messages created up to summary_until
+    summary: Optional[str] = None
+    summary_until: Optional[datetime] = None
+
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -31,11 +41,22 @@ class ChatConversation(SQLModel, table=True):
 
 class ChatMessage(SQLModel, table=True):
     """Model for a message in a chat conversation."""
+    __table_args__ = (
+        # Keyset pagination of messages and history lookups
+        Index("ix_chatmessage_conversation_id_created_at_id", "conversation_id", "created_at", "id"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     conversation_id: uuid.UUID = Field(foreign_key="chatconversation.id", ondelete="CASCADE")
     role: str
     content: str
     use_documents: bool = Field(default=True)
+    # Tokens of the content, counted at write time; None for legacy rows
+    # until they are backfilled
+    token_count: Optional[int] = None
+    # API usage of the completion that produced an assistant message
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     # Relationships
@@ -45,6 +66,11 @@ class ChatMessage(SQLModel, table=True):
 
 class DocumentReference(SQLModel, table=True):
     """Model for a reference to a document in a chat message."""
+    __table_args__ = (
+        # Keyset pagination of references
+        Index("ix_documentreference_message_id_created_at_id", "message_id", "created_at", "id"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     message_id: uuid.UUID = Field(foreign_key="chatmessage.id", ondelete="CASCADE")
     document_id: uuid.UUID
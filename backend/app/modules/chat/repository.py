@@ -1,10 +1,13 @@
 import uuid
 from datetime import datetime
-from typing import List, Optional, Union
+from typing import List, Optional, Tuple, Union
 
-from sqlmodel import Session, select
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, func, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.base_crud import BaseCRUD
+from app.common.utils.pagination import DEFAULT_PAGE_SIZE, paginate
+from app.core.base_crud import AsyncBaseCRUD, BaseCRUD
 from app.modules.chat.models import (
     ChatConversation,
     ChatMessage,
@@ -17,6 +20,58 @@ from app.modules.chat.schemas import (
     ChatMessageUpdate,
     DocumentReferenceCreate
 )
+from app.modules.projects.capacity_service import capacity_service
+from app.modules.projects.models import Project
+
+
+def _message_tokens_query(*criteria):
+    """Select the capacity tokens of the matching messages, estimating legacy rows as length / 4."""
+    return select(
+        func.coalesce(
+            func.sum(
+                func.coalesce(ChatMessage.token_count, func.length(ChatMessage.content) // 4)
+            ),
+            0
+        )
+    ).where(*criteria)
+
+
+def _conversation_tokens_update(conversation_id: uuid.UUID, tokens: int):
+    """Build the UPDATE of the conversation token counter of the conversation's project."""
+    project_id = (
+        select(ChatConversation.project_id)
+        .where(ChatConversation.id == conversation_id)
+        .scalar_subquery()
+    )
+    return (
+        update(Project)
+        .where(Project.id == project_id)
+        .values(conversations_tokens=Project.conversations_tokens + tokens)
+    )
+
+
+def _message_tokens(session: Session, *criteria) -> int:
+    """Sum the capacity tokens of the matching messages."""
+    return session.exec(_message_tokens_query(*criteria)).one()
+
+
+def _add_conversation_tokens(session: Session, conversation_id: uuid.UUID, tokens: int) -> None:
+    """
+    Atomically adjust the conversation token counter of the conversation's
+    project, if it has one. Does not commit.
+    """
+    if tokens:
+        session.exec(_conversation_tokens_update(conversation_id, tokens))
+
+
+def _count_message_tokens(obj_in: ChatMessageCreate, completion_tokens: Optional[int]) -> int:
+    """
+    Return the token count of a new message: the completion usage reported
+    by the API when given, and a local count otherwise.
+    """
+    if completion_tokens is not None:
+        return completion_tokens
+    return capacity_service.count_tokens(obj_in.content)
 
 
 class ChatConversationRepository(BaseCRUD[ChatConversation, ChatConversationCreate, ChatConversationUpdate]):
@@ -49,6 +104,40 @@ class ChatConversationRepository(BaseCRUD[ChatConversation, ChatConversationCrea
             .order_by(ChatConversation.created_at.desc())
         ).all()
 
+    def get_page_by_project_id(
+        self,
+        session: Session,
+        project_id: uuid.UUID,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[ChatConversation], Optional[str]]:
+        """Get a page of chat conversations for a project, newest first."""
+        return paginate(
+            session,
+            select(ChatConversation).where(ChatConversation.project_id == project_id),
+            ChatConversation,
+            cursor=cursor,
+            limit=limit
+        )
+
+    def get_page_by_user_id(
+        self,
+        session: Session,
+        user_id: uuid.UUID,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[ChatConversation], Optional[str]]:
+        """Get a page of chat conversations for a user, newest first."""
+        return paginate(
+            session,
+            select(ChatConversation).where(ChatConversation.user_id == user_id),
+            ChatConversation,
+            cursor=cursor,
+            limit=limit
+        )
+
     def update(
         self, session: Session, *, db_obj: ChatConversation, obj_in: Union[ChatConversationUpdate, dict]
     ) -> ChatConversation:
@@ -67,9 +156,12 @@ class ChatConversationRepository(BaseCRUD[ChatConversation, ChatConversationCrea
         return db_obj
 
     def delete(self, session: Session, *, id: uuid.UUID) -> None:
-        """Delete a chat conversation."""
+        """Delete a chat conversation, releasing its tokens from the project."""
         db_obj = session.get(ChatConversation, id)
         if db_obj:
+            if db_obj.project_id:
+                tokens = _message_tokens(session, ChatMessage.conversation_id == id)
+                _add_conversation_tokens(session, id, -int(tokens))
             session.delete(db_obj)
             session.commit()
 
@@ -80,10 +172,31 @@ class ChatMessageRepository(BaseCRUD[ChatMessage, ChatMessageCreate, ChatMessage
     def __init__(self):
         super().__init__(ChatMessage)
 
-    def create(self, session: Session, *, obj_in: ChatMessageCreate, conversation_id: uuid.UUID) -> ChatMessage:
-        """Create a new chat message with conversation_id."""
-        db_obj = ChatMessage(**obj_in.model_dump(exclude={'document_references'}), conversation_id=conversation_id)
+    def create(
+        self,
+        session: Session,
+        *,
+        obj_in: ChatMessageCreate,
+        conversation_id: uuid.UUID,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None
+    ) -> ChatMessage:
+        """
+        Create a new chat message with conversation_id, and count its tokens
+        towards the project capacity in the same transaction.
+
+        The token count is the completion usage reported by the API when
+        given, and is counted locally otherwise.
+        """
+        db_obj = ChatMessage(
+            **obj_in.model_dump(exclude={'document_references'}),
+            conversation_id=conversation_id,
+            token_count=_count_message_tokens(obj_in, completion_tokens),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens
+        )
         session.add(db_obj)
+        _add_conversation_tokens(session, conversation_id, db_obj.token_count)
         session.commit()
         session.refresh(db_obj)
         return db_obj
@@ -96,10 +209,64 @@ class ChatMessageRepository(BaseCRUD[ChatMessage, ChatMessageCreate, ChatMessage
             .order_by(ChatMessage.created_at)
         ).all()
 
+    def get_page_by_conversation_id(
+        self,
+        session: Session,
+        conversation_id: uuid.UUID,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[ChatMessage], Optional[str]]:
+        """Get a page of messages for a conversation, newest first, with their references."""
+        return paginate(
+            session,
+            select(ChatMessage)
+            .where(ChatMessage.conversation_id == conversation_id)
+            .options(selectinload(ChatMessage.document_references)),
+            ChatMessage,
+            cursor=cursor,
+            limit=limit
+        )
+
+    def get_after(
+        self,
+        session: Session,
+        conversation_id: uuid.UUID,
+        after: Optional[datetime] = None
+    ) -> List[ChatMessage]:
+        """Get the messages of a conversation created after a point in time, oldest first."""
+        statement = select(ChatMessage).where(ChatMessage.conversation_id == conversation_id)
+        if after is not None:
+            statement = statement.where(ChatMessage.created_at > after)
+        return session.exec(statement.order_by(ChatMessage.created_at)).all()
+
+    def get_recent_by_conversation_id(
+        self,
+        session: Session,
+        conversation_id: uuid.UUID,
+        *,
+        limit: int,
+        exclude_id: Optional[uuid.UUID] = None,
+        after: Optional[datetime] = None
+    ) -> List[ChatMessage]:
+        """Get the most recent messages for a conversation, newest first."""
+        statement = select(ChatMessage).where(ChatMessage.conversation_id == conversation_id)
+        if exclude_id is not None:
+            statement = statement.where(ChatMessage.id != exclude_id)
+        if after is not None:
+            statement = statement.where(ChatMessage.created_at > after)
+        return session.exec(
+            statement.order_by(ChatMessage.created_at.desc()).limit(limit)
+        ).all()
+
     def delete(self, session: Session, *, id: uuid.UUID) -> None:
-        """Delete a chat message."""
+        """Delete a chat message, releasing its tokens from the project."""
         db_obj = session.get(ChatMessage, id)
         if db_obj:
+            tokens = db_obj.token_count
+            if tokens is None:
+                tokens = len(db_obj.content) // 4
+            _add_conversation_tokens(session, db_obj.conversation_id, -tokens)
             session.delete(db_obj)
             session.commit()
 
@@ -136,6 +303,24 @@ class DocumentReferenceRepository:
             .order_by(DocumentReference.relevance_score.desc())
         ).all()
 
+    def get_page_by_message_id(
+        self,
+        session: Session,
+        message_id: uuid.UUID,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[DocumentReference], Optional[str]]:
+        """Get a page of document references for a message, in creation order."""
+        return paginate(
+            session,
+            select(DocumentReference).where(DocumentReference.message_id == message_id),
+            DocumentReference,
+            cursor=cursor,
+            limit=limit,
+            descending=False
+        )
+
     def delete_by_message_id(self, session: Session, message_id: uuid.UUID) -> None:
         """Delete all document references for a message."""
         refs = session.exec(
@@ -146,7 +331,194 @@ class DocumentReferenceRepository:
         session.commit()
 
 
+class AsyncChatConversationRepository(
+    AsyncBaseCRUD[ChatConversation, ChatConversationCreate, ChatConversationUpdate]
+):
+    """ChatConversationRepository for AsyncSession."""
+
+    def __init__(self):
+        super().__init__(ChatConversation)
+
+    async def create(
+        self, session: AsyncSession, *, obj_in: ChatConversationCreate, user_id: uuid.UUID
+    ) -> ChatConversation:
+        """Create a new chat conversation with user_id."""
+        db_obj = ChatConversation(**obj_in.model_dump(), user_id=user_id)
+        session.add(db_obj)
+        await session.commit()
+        await session.refresh(db_obj)
+        return db_obj
+
+    async def get_by_project_id(
+        self, session: AsyncSession, project_id: uuid.UUID
+    ) -> List[ChatConversation]:
+        """Get all chat conversations for a project."""
+        return (await session.exec(
+            select(ChatConversation)
+            .where(ChatConversation.project_id == project_id)
+            .order_by(ChatConversation.created_at.desc())
+        )).all()
+
+    async def get_by_user_id(
+        self, session: AsyncSession, user_id: uuid.UUID
+    ) -> List[ChatConversation]:
+        """Get all chat conversations for a user."""
+        return (await session.exec(
+            select(ChatConversation)
+            .where(ChatConversation.user_id == user_id)
+            .order_by(ChatConversation.created_at.desc())
+        )).all()
+
+    async def update(
+        self,
+        session: AsyncSession,
+        *,
+        db_obj: ChatConversation,
+        obj_in: Union[ChatConversationUpdate, dict]
+    ) -> ChatConversation:
+        """Update a chat conversation with automatic updated_at timestamp."""
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+
+        if update_data:
+            update_data["updated_at"] = datetime.utcnow()
+            db_obj.sqlmodel_update(update_data)
+            session.add(db_obj)
+            await session.commit()
+            await session.refresh(db_obj)
+        return db_obj
+
+    async def delete(self, session: AsyncSession, *, id: uuid.UUID) -> None:
+        """Delete a chat conversation, releasing its tokens from the project."""
+        db_obj = await session.get(ChatConversation, id)
+        if db_obj:
+            if db_obj.project_id:
+                tokens = (await session.exec(
+                    _message_tokens_query(ChatMessage.conversation_id == id)
+                )).one()
+                if tokens:
+                    await session.exec(_conversation_tokens_update(id, -int(tokens)))
+            await session.delete(db_obj)
+            await session.commit()
+
+
+class AsyncChatMessageRepository(AsyncBaseCRUD[ChatMessage, ChatMessageCreate, ChatMessageUpdate]):
+    """ChatMessageRepository for AsyncSession."""
+
+    def __init__(self):
+        super().__init__(ChatMessage)
+
+    async def create(
+        self,
+        session: AsyncSession,
+        *,
+        obj_in: ChatMessageCreate,
+        conversation_id: uuid.UUID,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None
+    ) -> ChatMessage:
+        """
+        Create a new chat message with conversation_id, and count its tokens
+        towards the project capacity in the same transaction.
+        """
+        db_obj = ChatMessage(
+            **obj_in.model_dump(exclude={'document_references'}),
+            conversation_id=conversation_id,
+            token_count=_count_message_tokens(obj_in, completion_tokens),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens
+        )
+        session.add(db_obj)
+        if db_obj.token_count:
+            await session.exec(_conversation_tokens_update(conversation_id, db_obj.token_count))
+        await session.commit()
+        await session.refresh(db_obj)
+        return db_obj
+
+    async def get_by_conversation_id(
+        self, session: AsyncSession, conversation_id: uuid.UUID
+    ) -> List[ChatMessage]:
+        """Get all messages for a conversation, with their references."""
+        return (await session.exec(
+            select(ChatMessage)
+            .where(ChatMessage.conversation_id == conversation_id)
+            .options(selectinload(ChatMessage.document_references))
+            .order_by(ChatMessage.created_at)
+        )).all()
+
+    async def count_by_conversation_id(
+        self, session: AsyncSession, conversation_id: uuid.UUID
+    ) -> int:
+        """Count the messages of a conversation."""
+        return (await session.exec(
+            select(func.count())
+            .select_from(ChatMessage)
+            .where(ChatMessage.conversation_id == conversation_id)
+        )).one()
+
+    async def get_recent_by_conversation_id(
+        self,
+        session: AsyncSession,
+        conversation_id: uuid.UUID,
+        *,
+        limit: int,
+        exclude_id: Optional[uuid.UUID] = None,
+        after: Optional[datetime] = None
+    ) -> List[ChatMessage]:
+        """Get the most recent messages for a conversation, newest first."""
+        statement = select(ChatMessage).where(ChatMessage.conversation_id == conversation_id)
+        if exclude_id is not None:
+            statement = statement.where(ChatMessage.id != exclude_id)
+        if after is not None:
+            statement = statement.where(ChatMessage.created_at > after)
+        return (await session.exec(
+            statement.order_by(ChatMessage.created_at.desc()).limit(limit)
+        )).all()
+
+    async def delete(self, session: AsyncSession, *, id: uuid.UUID) -> None:
+        """Delete a chat message, releasing its tokens from the project."""
+        db_obj = await session.get(ChatMessage, id)
+        if db_obj:
+            tokens = db_obj.token_count
+            if tokens is None:
+                tokens = len(db_obj.content) // 4
+            if tokens:
+                await session.exec(_conversation_tokens_update(db_obj.conversation_id, -tokens))
+            await session.delete(db_obj)
+            await session.commit()
+
+
+class AsyncDocumentReferenceRepository:
+    """DocumentReferenceRepository for AsyncSession."""
+
+    async def create_multi(
+        self, session: AsyncSession, *, refs: List[DocumentReferenceCreate]
+    ) -> List[DocumentReference]:
+        """Create multiple document references."""
+        db_objs = [DocumentReference(**ref.model_dump()) for ref in refs]
+        session.add_all(db_objs)
+        await session.commit()
+        for obj in db_objs:
+            await session.refresh(obj)
+        return db_objs
+
+    async def get_by_message_id(
+        self, session: AsyncSession, message_id: uuid.UUID
+    ) -> List[DocumentReference]:
+        """Get all document references for a message."""
+        return (await session.exec(
+            select(DocumentReference)
+            .where(DocumentReference.message_id == message_id)
+            .order_by(DocumentReference.relevance_score.desc())
+        )).all()
+
+
 # Create repository instances
 chat_conversation_repository = ChatConversationRepository()
 chat_message_repository = ChatMessageRepository()
 document_reference_repository = DocumentReferenceRepository()
+async_chat_conversation_repository = AsyncChatConversationRepository()
+async_chat_message_repository = AsyncChatMessageRepository()
+async_document_reference_repository = AsyncDocumentReferenceRepository()
@@ -52,11 +52,14 @@ class DocumentReferencePublic(DocumentReferenceBase):
 class ChatMessagePublic(ChatMessageBase):
     id: uuid.UUID
     conversation_id: uuid.UUID
+    token_count: Optional[int] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
     created_at: datetime
     document_references: List["DocumentReferencePublic"] = Field(default=[])
 
 
-class ChatConversationPublic(ChatConversationBase):
+class ChatConversationItemPublic(ChatConversationBase):
     id: uuid.UUID
     user_id: uuid.UUID
     project_id: Optional[uuid.UUID] = None
@@ -64,6 +67,9 @@ class ChatConversationPublic(ChatConversationBase):
     title_generation_task_id: Optional[str] = None
     created_at: datetime
     updated_at: datetime
+
+
+class ChatConversationPublic(ChatConversationItemPublic):
     messages: List[ChatMessagePublic] = Field(default=[])
 
 
@@ -82,3 +88,19 @@ class ChatMessageUpdate(SQLModel):
 class ChatConversationsPublic(SQLModel):
     data: List[ChatConversationPublic]
     count: int
+
+
+# Cursor page schemas; next_cursor is None on the last page
+class ChatConversationsPage(SQLModel):
+    data: List[ChatConversationItemPublic]
+    next_cursor: Optional[str] = None
+
+
+class ChatMessagesPage(SQLModel):
+    data: List[ChatMessagePublic]
+    next_cursor: Optional[str] = None
+
+
+class DocumentReferencesPage(SQLModel):
+    data: List[DocumentReferencePublic]
+    next_cursor: Optional[str] = None
@@ -0,0 +1 @@
+"""Celery tasks for the chat module."""
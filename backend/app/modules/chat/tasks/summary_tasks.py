@@ -0,0 +1,227 @@
+"""Celery tasks for rolling conversation summaries."""
+import logging
+import uuid
+from functools import lru_cache
+from typing import Iterator, List, Optional
+
+import redis
+from celery.exceptions import Retry
+from sqlmodel import update
+
+from app.core.config import settings
+from app.core.db import get_session_context
+from app.modules.chat.context_builder import message_tokens
+from app.modules.chat.models import ChatConversation, ChatMessage
+from app.modules.chat.repository import chat_message_repository
+from app.services.openai_service import openai_service
+from app.worker import celery_app
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an "
+    "assistant that analyzes RFP and proposal documents. Update the summary "
+    "with the new messages. Keep facts, figures, decisions, open questions and "
+    "the user's goals; drop small talk. Write in the language of the "
+    "conversation and answer with the updated summary only."
+)
+
+
+@lru_cache(maxsize=1)
+def _redis() -> redis.Redis:
+    """Redis client holding the pending summary markers."""
+    return redis.Redis.from_url(
+        settings.redis.url, socket_timeout=0.5, socket_connect_timeout=0.5
+    )
+
+
+def _pending_key(conversation_id: str) -> str:
+    return f"summary-pending:{conversation_id}"
+
+
+def request_summary(conversation_id: str) -> bool:
+    """
+    Queue a summary of a conversation unless one is already pending.
+
+    Every message of an active conversation stays over the trigger until the
+    summary commits, so the first request sets a marker in Redis with
+    SET NX EX and later requests are dropped until the task clears it. If
+    Redis is unavailable the task is queued anyway; the conditional write in
+    the task still keeps concurrent runs from overwriting each other.
+
+    Args:
+        conversation_id: UUID of the conversation
+
+    Returns:
+        Whether a task was queued
+    """
+    try:
+        queued = _redis().set(
+            _pending_key(conversation_id),
+            1,
+            nx=True,
+            ex=settings.chat.summary_pending_ttl_seconds,
+        )
+    except redis.RedisError as e:
+        logger.warning(f"Could not mark summary of {conversation_id} as pending: {e}")
+        queued = True
+
+    if not queued:
+        return False
+    summarize_conversation_task.delay(conversation_id)
+    return True
+
+
+def _clear_pending(conversation_id: str) -> None:
+    """Allow the next summary request for a conversation."""
+    try:
+        _redis().delete(_pending_key(conversation_id))
+    except redis.RedisError as e:
+        logger.warning(f"Could not clear pending summary of {conversation_id}: {e}")
+
+
+def _split_recent(messages: List[ChatMessage], keep_recent_tokens: int) -> int:
+    """
+    Return the index of the first message to keep verbatim.
+
+    The newest messages whose tokens fit in ``keep_recent_tokens`` are kept;
+    everything before them is summarized.
+    """
+    used = 0
+    for index in range(len(messages) - 1, -1, -1):
+        used += message_tokens(messages[index])
+        if used > keep_recent_tokens:
+            return index + 1
+    return 0
+
+
+def _batched_by_tokens(
+    messages: List[ChatMessage], max_tokens: int
+) -> Iterator[List[ChatMessage]]:
+    """Yield consecutive runs of messages of at most ``max_tokens`` tokens."""
+    batch: List[ChatMessage] = []
+    used = 0
+    for message in messages:
+        tokens = message_tokens(message)
+        if batch and used + tokens > max_tokens:
+            yield batch
+            batch, used = [], 0
+        batch.append(message)
+        used += tokens
+    if batch:
+        yield batch
+
+
+def _summarize(summary: Optional[str], messages: List[ChatMessage]) -> str:
+    """Fold a run of messages into the running summary."""
+    transcript = "\n\n".join(f"{message.role}: {message.content}" for message in messages)
+    user_prompt = (
+        f"Current summary:\n{summary or '(none yet)'}\n\n"
+        f"New messages:\n{transcript}\n\n"
+        "Updated summary:"
+    )
+    return openai_service.create_completion_sync(
+        system_prompt=SUMMARY_SYSTEM_PROMPT,
+        user_prompt=user_prompt,
+        max_tokens=settings.chat.summary_max_tokens,
+        temperature=0.2,
+    ).strip()
+
+
+@celery_app.task(bind=True, max_retries=2)
+def summarize_conversation_task(self, conversation_id: str):
+    """
+    Fold older unsummarized turns of a conversation into its rolling summary.
+
+    Only runs if the unsummarized tail has reached the trigger threshold; the
+    most recent turns are left verbatim for the prompt. No lock or
+    transaction is held during the LLM calls, so new messages are never
+    blocked; the summary is written only if summary_until has not moved
+    meanwhile.
+
+    Args:
+        conversation_id: UUID of the conversation
+
+    Returns:
+        dict: Summarization results with status and metrics
+    """
+    logger.info(f"Summarizing conversation {conversation_id}")
+
+    retrying = False
+    try:
+        return _summarize_conversation(self, conversation_id)
+    except Retry:
+        retrying = True
+        raise
+    finally:
+        # A retry keeps the marker, so no second task is queued meanwhile
+        if not retrying:
+            _clear_pending(conversation_id)
+
+
+def _summarize_conversation(task, conversation_id: str) -> dict:
+    """Run summarize_conversation_task; retries are raised through ``task``."""
+    try:
+        # Read in a short transaction of its own, so that no connection or
+        # lock is held while the LLM runs
+        with get_session_context() as session:
+            conversation = session.get(ChatConversation, uuid.UUID(conversation_id))
+            if not conversation:
+                return {"status": "skipped", "message": "Conversation not found"}
+
+            summary = conversation.summary
+            summarized_until = conversation.summary_until
+            tail = chat_message_repository.get_after(
+                session, conversation.id, after=summarized_until
+            )
+            # Keep the loaded messages usable after the session closes
+            session.expunge_all()
+
+        tail_tokens = sum(message_tokens(message) for message in tail)
+        if tail_tokens < settings.chat.summary_trigger_tokens:
+            return {"status": "skipped", "message": "Not enough new messages"}
+
+        split = _split_recent(tail, settings.chat.summary_keep_recent_tokens)
+        to_summarize = tail[:split]
+        if not to_summarize:
+            return {"status": "skipped", "message": "Nothing to summarize"}
+
+        for batch in _batched_by_tokens(to_summarize, settings.chat.summary_input_max_tokens):
+            summary = _summarize(summary, batch)
+
+        # Optimistic write: a run that finished first has moved summary_until
+        with get_session_context() as session:
+            result = session.exec(
+                update(ChatConversation)
+                .where(ChatConversation.id == uuid.UUID(conversation_id))
+                .where(ChatConversation.summary_until.is_not_distinct_from(summarized_until))
+                .values(summary=summary, summary_until=to_summarize[-1].created_at)
+            )
+        if result.rowcount == 0:
+            return {"status": "skipped", "message": "Summary changed while summarizing"}
+
+        logger.info(
+            f"✓ Summarized {len(to_summarize)} messages of conversation {conversation_id}"
+        )
+
+        return {
+            "status": "completed",
+            "conversation_id": conversation_id,
+            "summarized_messages": len(to_summarize),
+        }
+
+    except Exception as e:
+        logger.error(
+            f"Error summarizing conversation {conversation_id}: {e}",
+            exc_info=True,
+        )
+
+        # Retry if it's a transient error
+        if task.request.retries < task.max_retries:
+            raise task.retry(exc=e)
+
+        return {
+            "status": "failed",
+            "conversation_id": conversation_id,
+            "error": str(e),
+        }
@@ -0,0 +1,148 @@
+"""Celery tasks for chat message token counts."""
+import logging
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional
+
+from sqlmodel import Session, select, update
+
+from app.core.config import settings
+from app.core.db import get_session_context
+from app.core.tokenizer import tokenizer
+from app.modules.chat.models import ChatConversation, ChatMessage
+from app.modules.projects.capacity_service import capacity_service
+from app.worker import celery_app
+
+logger = logging.getLogger(__name__)
+
+
+def count_tokens_batch(texts: List[str]) -> List[int]:
+    """Count the tokens of each text; runs in the tokenizer processes."""
+    return tokenizer.count_batch(texts)
+
+
+def _count_tokens(executor: Optional[Executor], texts: List[str], workers: int) -> List[int]:
+    """Count tokens across the executor's processes, or inline without one."""
+    if executor is None:
+        return count_tokens_batch(texts)
+
+    size = -(-len(texts) // workers)
+    slices = [texts[i:i + size] for i in range(0, len(texts), size)]
+    return [count for counts in executor.map(count_tokens_batch, slices) for count in counts]
+
+
+def backfill_message_token_counts(
+    session: Session, batch_size: int = 2000, workers: int = 1
+) -> int:
+    """
+    Fill in the token count of messages stored without one.
+
+    Messages are read in primary key order, tokenized across a process pool,
+    and updated in one bulk UPDATE per batch, committing after each batch so
+    an interrupted run resumes where it stopped.
+
+    Args:
+        session: Database session
+        batch_size: Messages read, tokenized and updated per batch
+        workers: Tokenizer processes, capped at the number of CPUs; 1
+            tokenizes in the calling process
+
+    Returns:
+        Number of messages updated
+    """
+    workers = min(workers, os.cpu_count() or 1)
+    # Daemonic processes, such as prefork Celery workers, cannot have children
+    if multiprocessing.current_process().daemon:
+        workers = 1
+
+    executor: Optional[Executor] = None
+    if workers > 1:
+        # Spawned workers avoid inheriting locks and connections from the parent
+        executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    updated = 0
+    last_id: Optional[uuid.UUID] = None
+    try:
+        while True:
+            statement = select(ChatMessage.id, ChatMessage.content).where(
+                ChatMessage.token_count.is_(None)
+            )
+            if last_id is not None:
+                statement = statement.where(ChatMessage.id > last_id)
+            rows = session.exec(statement.order_by(ChatMessage.id).limit(batch_size)).all()
+            if not rows:
+                break
+
+            counts = _count_tokens(executor, [content for _, content in rows], workers)
+
+            # ORM bulk UPDATE by primary key
+            session.execute(
+                update(ChatMessage),
+                [
+                    {"id": message_id, "token_count": count}
+                    for (message_id, _), count in zip(rows, counts)
+                ],
+            )
+            session.commit()
+
+            updated += len(rows)
+            last_id = rows[-1][0]
+            logger.info(f"Backfilled token counts of {updated} messages")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return updated
+
+
+@celery_app.task(bind=True, max_retries=2)
+def backfill_message_token_counts_task(self):
+    """
+    Backfill missing message token counts, then recalculate the token
+    counters of every project with conversations, which were seeded with
+    estimates for these messages.
+
+    Returns:
+        dict: Backfill results with status and metrics
+    """
+    logger.info("Backfilling message token counts")
+
+    with get_session_context() as session:
+        try:
+            updated = backfill_message_token_counts(
+                session,
+                batch_size=settings.chat.token_backfill_batch_size,
+                workers=settings.chat.token_backfill_workers,
+            )
+
+            project_ids = session.exec(
+                select(ChatConversation.project_id)
+                .where(ChatConversation.project_id.is_not(None))
+                .distinct()
+            ).all()
+            for project_id in project_ids:
+                capacity_service.recalculate_counters(session, project_id)
+
+            logger.info(
+                f"✓ Backfilled {updated} message token counts and reconciled "
+                f"{len(project_ids)} projects"
+            )
+
+            return {
+                "status": "completed",
+                "updated_messages": updated,
+                "reconciled_projects": len(project_ids),
+            }
+
+        except Exception as e:
+            logger.error(f"Error backfilling message token counts: {e}", exc_info=True)
+
+            # Retry if it's a transient error
+            if self.request.retries < self.max_retries:
+                raise self.retry(exc=e)
+
+            return {"status": "failed", "error": str(e)}
@@ -1,11 +1,12 @@
 """Service for managing project capacity and token limits."""
 import logging
 import uuid
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
-import tiktoken
-from sqlmodel import Session, select
+from sqlmodel import Session, func, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.tokenizer import tokenizer
 from app.modules.chat.models import ChatConversation, ChatMessage
 from app.modules.projects.models import Document, DocumentStatus, Project
 
@@ -15,26 +16,6 @@ logger = logging.getLogger(__name__)
 class ProjectCapacityService:
     """Service for calculating and managing project token capacity."""
 
-    def __init__(self):
-        """Initialize the capacity service."""
-        self._encoding = None
-
-    @property
-    def encoding(self):
-        """Lazy load the tiktoken encoding on first access."""
-        if self._encoding is None:
-            try:
-                self._encoding = tiktoken.encoding_for_model("gpt-4o")
-                logger.info("Initialized ProjectCapacityService with gpt-4o encoding")
-            except Exception as e:
-                logger.warning(f"Error loading gpt-4o encoding: {e}, falling back to cl100k_base")
-                try:
-                    self._encoding = tiktoken.get_encoding("cl100k_base")
-                except Exception as e2:
-                    logger.error(f"Error loading cl100k_base encoding: {e2}")
-                    self._encoding = None
-        return self._encoding
-
     def count_tokens(self, text: str) -> int:
         """
         Count tokens in a text string.
@@ -45,23 +26,14 @@ class ProjectCapacityService:
         Returns:
             Number of tokens in the text
         """
-        if not text:
-            return 0
-        try:
-            if self.encoding is not None:
-                return len(self.encoding.encode(text))
-            else:
-                # Fallback: rough estimate of 4 chars per token
-                return len(text) // 4
-        except Exception as e:
-            logger.error(f"Error counting tokens: {e}")
-            # Fallback: rough estimate of 4 chars per token
-            return len(text) // 4
+        return tokenizer.count(text)
 
     def get_documents_tokens(self, session: Session, project_id: uuid.UUID) -> int:
         """
         Calculate total tokens from all completed documents in a project.
 
+        Aggregates in the database; used to recalculate the stored counter.
+
         Args:
             session: Database session
             project_id: Project UUID
@@ -69,20 +41,21 @@ class ProjectCapacityService:
         Returns:
             Total tokens from documents
         """
-        documents = session.exec(
-            select(Document)
+        total_tokens = session.exec(
+            select(func.coalesce(func.sum(Document.estimated_tokens), 0))
             .where(Document.project_id == project_id)
             .where(Document.status == DocumentStatus.COMPLETED)
-        ).all()
-
-        total_tokens = sum(doc.estimated_tokens for doc in documents)
-        logger.debug(f"Project {project_id}: {len(documents)} documents = {total_tokens} tokens")
-        return total_tokens
+        ).one()
+        return int(total_tokens)
 
     def get_conversations_tokens(self, session: Session, project_id: uuid.UUID) -> int:
         """
         Calculate total tokens from all messages in project conversations.
 
+        Aggregates the stored message token counts in the database; messages
+        without a count are estimated at 4 characters per token. Used to
+        recalculate the stored counter.
+
         Args:
             session: Database session
             project_id: Project UUID
@@ -90,24 +63,51 @@ class ProjectCapacityService:
         Returns:
             Total tokens from conversation messages
         """
-        conversations = session.exec(
-            select(ChatConversation).where(ChatConversation.project_id == project_id)
-        ).all()
+        total_tokens = session.exec(
+            select(
+                func.coalesce(
+                    func.sum(
+                        func.coalesce(
+                            ChatMessage.token_count, func.length(ChatMessage.content) // 4
+                        )
+                    ),
+                    0,
+                )
+            )
+            .join(ChatConversation, ChatMessage.conversation_id == ChatConversation.id)
+            .where(ChatConversation.project_id == project_id)
+        ).one()
+        return int(total_tokens)
 
-        total_tokens = 0
-        for conv in conversations:
-            # Load messages for this conversation
-            messages = session.exec(
-                select(ChatMessage).where(ChatMessage.conversation_id == conv.id)
-            ).all()
+    def recalculate_counters(self, session: Session, project_id: uuid.UUID) -> Dict:
+        """
+        Recalculate the stored token counters of a project from its rows.
 
-            for msg in messages:
-                total_tokens += self.count_tokens(msg.content)
+        The counters are maintained incrementally; this repairs any drift,
+        e.g. after message token counts have been backfilled.
+
+        Args:
+            session: Database session
+            project_id: Project UUID
 
-        logger.debug(
-            f"Project {project_id}: {len(conversations)} conversations = {total_tokens} tokens"
+        Returns:
+            Dictionary with the recalculated documents_tokens and
+            conversations_tokens
+        """
+        counters = {
+            "documents_tokens": self.get_documents_tokens(session, project_id),
+            "conversations_tokens": self.get_conversations_tokens(session, project_id),
+        }
+        result = session.exec(
+            update(Project).where(Project.id == project_id).values(**counters)
         )
-        return total_tokens
+        if result.rowcount == 0:
+            session.rollback()
+            raise ValueError(f"Project {project_id} not found")
+        session.commit()
+
+        logger.info(f"Recalculated token counters of project {project_id}: {counters}")
+        return counters
 
     def get_capacity_info(self, session: Session, project_id: uuid.UUID) -> Dict:
         """
@@ -128,15 +128,41 @@ class ProjectCapacityService:
             - is_near_limit: True if over 80% used
             - is_over_limit: True if over 100% used
         """
-        project = session.get(Project, project_id)
-        if not project:
+        # Single-row read of the incrementally maintained counters
+        row = session.exec(self._counters_query(project_id)).first()
+        return self._capacity_info(project_id, row)
+
+    async def aget_capacity_info(self, session: AsyncSession, project_id: uuid.UUID) -> Dict:
+        """
+        Get comprehensive capacity information for a project without
+        blocking the event loop.
+
+        Args:
+            session: Async database session
+            project_id: Project UUID
+
+        Returns:
+            Dictionary with the capacity metrics of get_capacity_info
+        """
+        row = (await session.exec(self._counters_query(project_id))).first()
+        return self._capacity_info(project_id, row)
+
+    def _counters_query(self, project_id: uuid.UUID):
+        """Select the token counters and limit of a project."""
+        return select(
+            Project.documents_tokens,
+            Project.conversations_tokens,
+            Project.max_context_tokens,
+        ).where(Project.id == project_id)
+
+    def _capacity_info(self, project_id: uuid.UUID, row: Optional[Tuple[int, int, int]]) -> Dict:
+        """Compute the capacity metrics from a row of _counters_query."""
+        if not row:
             raise ValueError(f"Project {project_id} not found")
 
-        docs_tokens = self.get_documents_tokens(session, project_id)
-        convs_tokens = self.get_conversations_tokens(session, project_id)
+        docs_tokens, convs_tokens, max_tokens = row
         total_tokens = docs_tokens + convs_tokens
 
-        max_tokens = project.max_context_tokens
         usage_percentage = (total_tokens / max_tokens * 100) if max_tokens > 0 else 0
         remaining_tokens = max(0, max_tokens - total_tokens)
 
@@ -174,26 +200,50 @@ class ProjectCapacityService:
         """
         try:
             capacity = self.get_capacity_info(session, project_id)
+        except Exception as e:
+            logger.error(f"Error checking capacity: {e}")
+            return False, f"Error checking capacity: {str(e)}"
+        return self._check_capacity(capacity, estimated_tokens)
 
-            if capacity["is_over_limit"]:
-                return (
-                    False,
-                    f"Project is already over the token limit "
-                    f"({capacity['total_tokens']}/{capacity['max_tokens']})",
-                )
-
-            if capacity["remaining_tokens"] < estimated_tokens:
-                return (
-                    False,
-                    f"Not enough space. Need {estimated_tokens} tokens but only "
-                    f"{capacity['remaining_tokens']} remaining",
-                )
+    async def acan_add_document(
+        self, session: AsyncSession, project_id: uuid.UUID, estimated_tokens: int
+    ) -> tuple[bool, str]:
+        """
+        Check if a document can be added to a project without exceeding
+        limits, without blocking the event loop.
 
-            return True, "OK"
+        Args:
+            session: Async database session
+            project_id: Project UUID
+            estimated_tokens: Estimated tokens for the new document
 
+        Returns:
+            Tuple of (can_add: bool, message: str)
+        """
+        try:
+            capacity = await self.aget_capacity_info(session, project_id)
         except Exception as e:
             logger.error(f"Error checking capacity: {e}")
             return False, f"Error checking capacity: {str(e)}"
+        return self._check_capacity(capacity, estimated_tokens)
+
+    def _check_capacity(self, capacity: Dict, estimated_tokens: int) -> tuple[bool, str]:
+        """Decide whether estimated_tokens more fit into a project's capacity."""
+        if capacity["is_over_limit"]:
+            return (
+                False,
+                f"Project is already over the token limit "
+                f"({capacity['total_tokens']}/{capacity['max_tokens']})",
+            )
+
+        if capacity["remaining_tokens"] < estimated_tokens:
+            return (
+                False,
+                f"Not enough space. Need {estimated_tokens} tokens but only "
+                f"{capacity['remaining_tokens']} remaining",
+            )
+
+        return True, "OK"
 
     def estimate_document_tokens(self, text: str) -> int:
         """
@@ -4,7 +4,7 @@ from datetime import datetime
 from enum import Enum
 from typing import List, Optional, TYPE_CHECKING
 
-from sqlmodel import Column, Field, Relationship, SQLModel
+from sqlmodel import Column, Field, Index, Relationship, SQLModel
 
 if TYPE_CHECKING:
     from app.modules.users.models import User
@@ -21,6 +21,11 @@ class DocumentStatus(str, Enum):
 
 class Project(SQLModel, table=True):
     """Project model for grouping documents and conversations."""
+    __table_args__ = (
+        # Paginated project listings per user
+        Index("ix_project_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: uuid.UUID = Field(foreign_key="user.id", ondelete="CASCADE")
 
@@ -31,6 +36,10 @@ class Project(SQLModel, table=True):
 
     # Capacity and limits
     max_context_tokens: int = Field(default=100000)
+    # Running token totals of completed documents and conversation messages,
+    # updated in the same transaction as the rows they count
+    documents_tokens: int = Field(default=0)
+    conversations_tokens: int = Field(default=0)
 
     # Timestamps
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -68,6 +77,8 @@ class Document(SQLModel, table=True):
     total_chunks: int = Field(default=0)
     processed_chunks: int = Field(default=0)
     estimated_tokens: int = Field(default=0)
+    # Leading chunks whose embeddings are stored; retries resume from here
+    checkpoint_chunks: int = Field(default=0)
 
     # Celery task tracking
     task_id: Optional[str] = None
@@ -3,9 +3,11 @@ import uuid
 from datetime import datetime
 from typing import List, Optional, Union
 
-from sqlmodel import Session, select
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, func, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.base_crud import BaseCRUD
+from app.core.base_crud import AsyncBaseCRUD, BaseCRUD
 from app.modules.projects.models import Document, DocumentStatus, Project
 from app.modules.projects.schemas import (
     DocumentCreate,
@@ -15,6 +17,37 @@ from app.modules.projects.schemas import (
 )
 
 
+def _user_projects_query(user_id: uuid.UUID, skip: int, limit: Optional[int]):
+    """Select the projects of a user, newest first, with their documents."""
+    statement = (
+        select(Project)
+        .where(Project.user_id == user_id)
+        .options(selectinload(Project.documents))
+        .order_by(Project.created_at.desc(), Project.id.desc())
+        .offset(skip)
+    )
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
+
+
+def _count_user_projects_query(user_id: uuid.UUID):
+    """Select the number of projects of a user."""
+    return select(func.count()).select_from(Project).where(Project.user_id == user_id)
+
+
+def _tokens_update(project_id: uuid.UUID, documents_tokens: int, conversations_tokens: int):
+    """Build the UPDATE adjusting the token counters of a project."""
+    return (
+        update(Project)
+        .where(Project.id == project_id)
+        .values(
+            documents_tokens=Project.documents_tokens + documents_tokens,
+            conversations_tokens=Project.conversations_tokens + conversations_tokens
+        )
+    )
+
+
 class ProjectRepository(BaseCRUD[Project, ProjectCreate, ProjectUpdate]):
     """Repository for the Project entity."""
 
@@ -31,13 +64,42 @@ class ProjectRepository(BaseCRUD[Project, ProjectCreate, ProjectUpdate]):
         session.refresh(db_obj)
         return db_obj
 
-    def get_by_user_id(self, session: Session, user_id: uuid.UUID) -> List[Project]:
-        """Get all projects for a user."""
-        return session.exec(
-            select(Project)
-            .where(Project.user_id == user_id)
-            .order_by(Project.created_at.desc())
-        ).all()
+    def get_by_user_id(
+        self,
+        session: Session,
+        user_id: uuid.UUID,
+        *,
+        skip: int = 0,
+        limit: Optional[int] = None
+    ) -> List[Project]:
+        """
+        Get the projects of a user, newest first, with their documents.
+
+        Documents are loaded with one extra query for the whole page instead
+        of one lazy load per project.
+        """
+        return session.exec(_user_projects_query(user_id, skip, limit)).all()
+
+    def count_by_user_id(self, session: Session, user_id: uuid.UUID) -> int:
+        """Count the projects of a user."""
+        return session.exec(_count_user_projects_query(user_id)).one()
+
+    def add_tokens(
+        self,
+        session: Session,
+        project_id: uuid.UUID,
+        *,
+        documents_tokens: int = 0,
+        conversations_tokens: int = 0
+    ) -> None:
+        """
+        Atomically adjust the token counters of a project.
+
+        Does not commit, so the adjustment is part of the caller's transaction.
+        """
+        if not documents_tokens and not conversations_tokens:
+            return
+        session.exec(_tokens_update(project_id, documents_tokens, conversations_tokens))
 
     def update(
         self,
@@ -115,6 +177,16 @@ class DocumentRepository(BaseCRUD[Document, DocumentCreate, DocumentUpdate]):
         if not document:
             raise ValueError(f"Document {document_id} not found")
 
+        # Only completed documents count towards the project capacity
+        was_completed = document.status == DocumentStatus.COMPLETED
+        is_completed = status == DocumentStatus.COMPLETED
+        if was_completed != is_completed:
+            project_repository.add_tokens(
+                session,
+                document.project_id,
+                documents_tokens=document.estimated_tokens if is_completed else -document.estimated_tokens
+            )
+
         document.status = status
         if error_message:
             document.error_message = error_message
@@ -136,32 +208,154 @@ class DocumentRepository(BaseCRUD[Document, DocumentCreate, DocumentUpdate]):
         document_id: uuid.UUID,
         processed_chunks: int,
         total_chunks: Optional[int] = None,
-        estimated_tokens: Optional[int] = None
-    ) -> Document:
-        """Update document processing progress."""
-        document = session.get(Document, document_id)
-        if not document:
-            raise ValueError(f"Document {document_id} not found")
+        estimated_tokens: Optional[int] = None,
+        checkpoint_chunks: Optional[int] = None
+    ) -> None:
+        """
+        Update document processing progress.
 
-        document.processed_chunks = processed_chunks
+        Issues a single UPDATE statement and does not reload the document,
+        so it is cheap enough to call repeatedly from processing tasks.
+        """
+        values = {"processed_chunks": processed_chunks}
         if total_chunks is not None:
-            document.total_chunks = total_chunks
+            values["total_chunks"] = total_chunks
         if estimated_tokens is not None:
-            document.estimated_tokens = estimated_tokens
+            values["estimated_tokens"] = estimated_tokens
+        if checkpoint_chunks is not None:
+            values["checkpoint_chunks"] = checkpoint_chunks
 
-        session.add(document)
+        result = session.exec(
+            update(Document).where(Document.id == document_id).values(**values)
+        )
+        if result.rowcount == 0:
+            session.rollback()
+            raise ValueError(f"Document {document_id} not found")
         session.commit()
-        session.refresh(document)
-        return document
 
     def delete(self, session: Session, *, id: uuid.UUID) -> None:
-        """Delete a document."""
+        """Delete a document, releasing its tokens if it was completed."""
         db_obj = session.get(Document, id)
         if db_obj:
+            if db_obj.status == DocumentStatus.COMPLETED:
+                project_repository.add_tokens(
+                    session, db_obj.project_id, documents_tokens=-db_obj.estimated_tokens
+                )
             session.delete(db_obj)
             session.commit()
 
 
+class AsyncProjectRepository(AsyncBaseCRUD[Project, ProjectCreate, ProjectUpdate]):
+    """ProjectRepository for AsyncSession."""
+
+    def __init__(self):
+        super().__init__(Project)
+
+    async def create(
+        self, session: AsyncSession, *, obj_in: ProjectCreate, user_id: uuid.UUID
+    ) -> Project:
+        """Create a new project with user_id."""
+        db_obj = Project(**obj_in.model_dump(), user_id=user_id)
+        session.add(db_obj)
+        await session.commit()
+        await session.refresh(db_obj)
+        return db_obj
+
+    async def get_by_user_id(
+        self,
+        session: AsyncSession,
+        user_id: uuid.UUID,
+        *,
+        skip: int = 0,
+        limit: Optional[int] = None
+    ) -> List[Project]:
+        """Get the projects of a user, newest first, with their documents."""
+        return (await session.exec(_user_projects_query(user_id, skip, limit))).all()
+
+    async def count_by_user_id(self, session: AsyncSession, user_id: uuid.UUID) -> int:
+        """Count the projects of a user."""
+        return (await session.exec(_count_user_projects_query(user_id))).one()
+
+    async def add_tokens(
+        self,
+        session: AsyncSession,
+        project_id: uuid.UUID,
+        *,
+        documents_tokens: int = 0,
+        conversations_tokens: int = 0
+    ) -> None:
+        """Atomically adjust the token counters of a project. Does not commit."""
+        if not documents_tokens and not conversations_tokens:
+            return
+        await session.exec(_tokens_update(project_id, documents_tokens, conversations_tokens))
+
+    async def update(
+        self,
+        session: AsyncSession,
+        *,
+        db_obj: Project,
+        obj_in: Union[ProjectUpdate, dict]
+    ) -> Project:
+        """Update a project with automatic updated_at timestamp."""
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+
+        if update_data:
+            update_data["updated_at"] = datetime.utcnow()
+            db_obj.sqlmodel_update(update_data)
+            session.add(db_obj)
+            await session.commit()
+            await session.refresh(db_obj)
+        return db_obj
+
+    async def delete(self, session: AsyncSession, *, id: uuid.UUID) -> None:
+        """Delete a project."""
+        db_obj = await session.get(Project, id)
+        if db_obj:
+            await session.delete(db_obj)
+            await session.commit()
+
+
+class AsyncDocumentRepository(AsyncBaseCRUD[Document, DocumentCreate, DocumentUpdate]):
+    """DocumentRepository for AsyncSession."""
+
+    def __init__(self):
+        super().__init__(Document)
+
+    async def create(self, session: AsyncSession, *, obj_in: DocumentCreate) -> Document:
+        """Create a new document."""
+        db_obj = Document(**obj_in.model_dump())
+        session.add(db_obj)
+        await session.commit()
+        await session.refresh(db_obj)
+        return db_obj
+
+    async def get_by_project_id(
+        self, session: AsyncSession, project_id: uuid.UUID
+    ) -> List[Document]:
+        """Get all documents for a project."""
+        return (await session.exec(
+            select(Document)
+            .where(Document.project_id == project_id)
+            .order_by(Document.uploaded_at.desc())
+        )).all()
+
+    async def delete(self, session: AsyncSession, *, id: uuid.UUID) -> None:
+        """Delete a document, releasing its tokens if it was completed."""
+        db_obj = await session.get(Document, id)
+        if db_obj:
+            if db_obj.status == DocumentStatus.COMPLETED:
+                await async_project_repository.add_tokens(
+                    session, db_obj.project_id, documents_tokens=-db_obj.estimated_tokens
+                )
+            await session.delete(db_obj)
+            await session.commit()
+
+
 # Create repository instances
 project_repository = ProjectRepository()
 document_repository = DocumentRepository()
+async_project_repository = AsyncProjectRepository()
+async_document_repository = AsyncDocumentRepository()
@@ -1,18 +1,61 @@
 """Celery tasks for document processing."""
 import logging
+import math
 import os
 import uuid
+from itertools import islice
 from pathlib import Path
+from typing import Iterable, Iterator, List, TypeVar
 
+from app.core.config import settings
 from app.core.db import get_session_context
-from app.modules.projects.models import DocumentStatus
+from app.modules.projects.models import Document, DocumentStatus
 from app.modules.projects.repository import document_repository
+from app.modules.projects.tasks.progress import DocumentProgressReporter
 from app.services.document_processor import document_processor
 from app.services.vector_store import vector_store
 from app.worker import celery_app
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+def _batched(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Yield lists of at most ``size`` items from an iterable."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _estimate_total_chunks(seen_chunks: int, last_chunk: dict) -> int:
+    """
+    Extrapolate the total chunk count of a document from the pages seen so far.
+
+    Used for progress reporting while chunks are still being streamed.
+    """
+    pages_seen = max(last_chunk["page_number"], 1)
+    estimate = math.ceil(seen_chunks * last_chunk["page_total"] / pages_seen)
+    return max(estimate, seen_chunks)
+
+
+def _chunk_id(document: Document, chunk_index: int) -> uuid.UUID:
+    """Return the deterministic vector store id of a document chunk."""
+    return uuid.uuid5(document.id, str(chunk_index))
+
+
+def _chunk_metadata(document: Document, chunk_index: int, chunk: dict) -> dict:
+    """Build the vector store metadata for a document chunk."""
+    return {
+        "project_id": str(document.project_id),
+        "document_id": str(document.id),
+        "chunk_index": chunk_index,
+        "document_type": document.document_type,
+        "filename": document.filename,
+        "page_number": chunk["page_number"],
+        "page_total": chunk["page_total"],
+    }
+
 
 @celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
 def process_document_task(self, document_id: str):
@@ -20,11 +63,15 @@ def process_document_task(self, document_id: str):
     Process a document asynchronously:
     1. Read file from filesystem
     2. Extract text (PDF/DOCX/TXT)
-    3. Split into chunks with tiktoken
-    4. Generate embeddings for each chunk
+    3. Split into chunks with tiktoken, streaming page by page
+    4. Generate embeddings for the chunks in batches
     5. Store in vector store (document_embeddings table)
     6. Update document status
 
+    Stored chunks are checkpointed on the document, so a retry skips the
+    chunks that were already embedded and upserts the rest under the same
+    deterministic ids.
+
     Args:
         document_id: UUID of the document to process
 
@@ -55,78 +102,85 @@ def process_document_task(self, document_id: str):
             if not os.path.exists(document.file_path):
                 raise FileNotFoundError(f"File not found: {document.file_path}")
 
-            # Process the file into chunks
-            chunks = document_processor.process_file(
+            # Stream chunks from the file as pages are parsed
+            chunks = document_processor.iter_chunks(
                 file_path=document.file_path,
                 file_type=document.file_type,
-                max_chunk_tokens=500,
-                overlap_tokens=50,
+                max_chunk_tokens=settings.ingestion.chunk_max_tokens,
+                overlap_tokens=settings.ingestion.chunk_overlap_tokens,
             )
 
-            if not chunks:
-                raise ValueError("No text extracted from document")
+            # Chunks before the checkpoint were stored by a previous attempt
+            checkpoint = document.checkpoint_chunks
+            if checkpoint:
+                logger.info(
+                    f"Resuming document {document.id} after {checkpoint} stored chunks"
+                )
 
-            # Update total chunks
-            document_repository.update_progress(
-                session,
-                document_id=document.id,
-                processed_chunks=0,
-                total_chunks=len(chunks),
+            progress = DocumentProgressReporter(
+                session, self, document.id, checkpoint_chunks=checkpoint
             )
+            progress.flush()
+
+            # Embed and store chunks in bounded batches, so only one batch of
+            # chunks and embeddings is held in memory at a time
+            seen_chunks = 0
+            checkpoint_blocked = False
+            for batch in _batched(chunks, settings.ingestion.batch_size):
+                start = seen_chunks
+                seen_chunks += len(batch)
+                progress.total_chunks = _estimate_total_chunks(seen_chunks, batch[-1])
+                batch_tokens = sum(chunk["token_count"] for chunk in batch)
+
+                skip = max(checkpoint - start, 0)
+                if skip >= len(batch):
+                    progress.advance(len(batch), batch_tokens)
+                    continue
 
-            logger.info(f"Extracted {len(chunks)} chunks, now generating embeddings...")
-
-            # Process each chunk and store in vector store
-            total_tokens = 0
-            for idx, chunk in enumerate(chunks):
                 try:
-                    # Prepare metadata
-                    metadata = {
-                        "project_id": str(document.project_id),
-                        "document_id": str(document.id),
-                        "chunk_index": idx,
-                        "document_type": document.document_type,
-                        "filename": document.filename,
-                        "page_number": chunk["page_number"],
-                        "page_total": chunk["page_total"],
-                    }
-
-                    # Store in vector store (generates embedding automatically)
-                    vector_store.upsert_single(
-                        content=chunk["content"], metadata=metadata
-                    )
-
-                    # Update progress
-                    total_tokens += chunk["token_count"]
-                    document_repository.update_progress(
-                        session,
-                        document_id=document.id,
-                        processed_chunks=idx + 1,
-                        estimated_tokens=total_tokens,
+                    pending = batch[skip:]
+                    embeddings = vector_store.get_embeddings(
+                        [chunk["content"] for chunk in pending]
                     )
 
-                    # Report progress to Celery
-                    self.update_state(
-                        state="PROGRESS",
-                        meta={
-                            "current": idx + 1,
-                            "total": len(chunks),
-                            "percentage": round((idx + 1) / len(chunks) * 100, 2),
-                        },
+                    # Deterministic ids make retried batches overwrite their
+                    # earlier rows instead of duplicating them
+                    vector_store.upsert_many(
+                        [
+                            (
+                                str(_chunk_id(document, chunk_index)),
+                                _chunk_metadata(document, chunk_index, chunk),
+                                chunk["content"],
+                                embedding,
+                            )
+                            for chunk_index, chunk, embedding in zip(
+                                range(start + skip, seen_chunks), pending, embeddings
+                            )
+                        ],
+                        created_at=document.uploaded_at,
                     )
 
-                    logger.debug(
-                        f"Processed chunk {idx + 1}/{len(chunks)} "
-                        f"({chunk['token_count']} tokens)"
-                    )
-
-                except Exception as chunk_error:
+                except Exception as batch_error:
                     logger.error(
-                        f"Error processing chunk {idx + 1}/{len(chunks)}: {chunk_error}"
+                        f"Error processing chunks {start + 1}-{seen_chunks}: {batch_error}"
                     )
-                    # Continue with next chunk instead of failing completely
+                    # The checkpoint only covers an unbroken run of stored chunks
+                    checkpoint_blocked = True
+                    # Continue with next batch instead of failing completely
                     continue
 
+                if not checkpoint_blocked:
+                    progress.checkpoint_chunks = seen_chunks
+                progress.advance(len(batch), batch_tokens)
+
+            if seen_chunks == 0:
+                raise ValueError("No text extracted from document")
+
+            progress.total_chunks = seen_chunks
+            progress.flush()
+            total_chunks = seen_chunks
+            total_tokens = progress.estimated_tokens
+
             # Mark as completed
             document_repository.update_status(
                 session, document_id=document.id, status=DocumentStatus.COMPLETED
@@ -136,14 +190,14 @@ def process_document_task(self, document_id: str):
                 "status": "completed",
                 "document_id": str(document.id),
                 "filename": document.filename,
-                "total_chunks": len(chunks),
+                "total_chunks": total_chunks,
                 "total_tokens": total_tokens,
                 "file_size": document.file_size,
             }
 
             logger.info(
                 f"✓ Document processing completed: {document.filename} "
-                f"({total_tokens} tokens in {len(chunks)} chunks)"
+                f"({total_tokens} tokens in {total_chunks} chunks)"
             )
 
             return result
@@ -0,0 +1,109 @@
+"""Coalesced progress reporting for document processing tasks."""
+import logging
+import time
+import uuid
+from typing import Any, Optional
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.modules.projects.repository import document_repository
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentProgressReporter:
+    """
+    Report document processing progress to the database and to Celery.
+
+    Progress is accumulated in memory and written at most every
+    ``every_chunks`` chunks or every ``interval_ms`` milliseconds, whichever
+    comes first, so the stored progress lags the real one by at most that
+    window. The ingestion checkpoint is written along with it; a stale
+    checkpoint only means a retry redoes some idempotent upserts.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        task: Any,
+        document_id: uuid.UUID,
+        total_chunks: int = 0,
+        checkpoint_chunks: int = 0,
+        every_chunks: Optional[int] = None,
+        interval_ms: Optional[int] = None,
+    ):
+        """
+        Initialize the reporter.
+
+        Args:
+            session: Database session used for the progress updates
+            task: Bound Celery task, used for ``update_state``
+            document_id: UUID of the document being processed
+            total_chunks: Total number of chunks, or a running estimate of it
+            checkpoint_chunks: Leading chunks already stored by a previous attempt
+            every_chunks: Report after this many new chunks
+            interval_ms: Report after this many milliseconds
+        """
+        self.session = session
+        self.task = task
+        self.document_id = document_id
+        self.total_chunks = total_chunks
+        self.checkpoint_chunks = checkpoint_chunks
+        self.every_chunks = every_chunks or settings.ingestion.progress_every_chunks
+        self.interval = (interval_ms or settings.ingestion.progress_interval_ms) / 1000
+
+        self.processed_chunks = 0
+        self.estimated_tokens = 0
+        self._reported: Optional[tuple] = None
+        self._last_report = time.monotonic()
+
+    def advance(self, chunks: int, tokens: int = 0) -> None:
+        """
+        Record processed chunks and report if the reporting window has passed.
+
+        Args:
+            chunks: Number of newly processed chunks
+            tokens: Number of tokens in those chunks
+        """
+        self.processed_chunks += chunks
+        self.estimated_tokens += tokens
+
+        reported = self._reported[0] if self._reported else 0
+        if (
+            self.processed_chunks - reported >= self.every_chunks
+            or time.monotonic() - self._last_report >= self.interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the current progress, unless nothing changed since the last report."""
+        state = (self.processed_chunks, self.total_chunks, self.checkpoint_chunks)
+        if self._reported == state:
+            return
+
+        document_repository.update_progress(
+            self.session,
+            document_id=self.document_id,
+            processed_chunks=self.processed_chunks,
+            total_chunks=self.total_chunks,
+            estimated_tokens=self.estimated_tokens,
+            checkpoint_chunks=self.checkpoint_chunks,
+        )
+
+        total = max(self.total_chunks, self.processed_chunks)
+        self.task.update_state(
+            state="PROGRESS",
+            meta={
+                "current": self.processed_chunks,
+                "total": total,
+                "percentage": round(self.processed_chunks / total * 100, 2) if total else 0.0,
+            },
+        )
+
+        self._reported = state
+        self._last_report = time.monotonic()
+        logger.debug(
+            f"Document {self.document_id} progress: "
+            f"{self.processed_chunks}/{self.total_chunks} chunks"
+        )
@@ -1,9 +1,12 @@
 """Service for processing documents and extracting text."""
 import logging
+from bisect import bisect_left
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional
 
-import tiktoken
+from app.common.utils.page_cache import file_sha256, read_pages, write_pages
+from app.common.utils.pdf import iter_pdf_pages_pymupdf, iter_pdf_pages_pypdf2
+from app.core.tokenizer import tokenizer
 
 logger = logging.getLogger(__name__)
 
@@ -11,28 +14,16 @@ logger = logging.getLogger(__name__)
 class DocumentProcessor:
     """Service for processing documents and splitting them into chunks."""
 
-    def __init__(self):
-        """Initialize the document processor."""
-        self._encoding = None
+    # File types whose extracted pages are cached next to the upload
+    CACHED_FILE_TYPES = ("pdf", "docx", "doc")
+
+    # Chunk boundaries, from most to least preferred
+    SEPARATORS = ("\n\n", "\n", ". ", " ")
 
     @property
     def encoding(self):
-        """Lazy load the tiktoken encoding on first access."""
-        if self._encoding is None:
-            try:
-                self._encoding = tiktoken.encoding_for_model("gpt-4o")
-                logger.info("Initialized DocumentProcessor with gpt-4o encoding")
-            except Exception as e:
-                logger.warning(
-                    f"Error loading gpt-4o encoding: {e}, falling back to cl100k_base"
-                )
-                try:
-                    self._encoding = tiktoken.get_encoding("cl100k_base")
-                except Exception as e2:
-                    logger.error(f"Error loading cl100k_base encoding: {e2}")
-                    # Create a dummy encoding that falls back to character counting
-                    self._encoding = None
-        return self._encoding
+        """The shared tiktoken encoding, or None if it is unavailable."""
+        return tokenizer.encoding
 
     def count_tokens(self, text: str) -> int:
         """
@@ -44,18 +35,7 @@ class DocumentProcessor:
         Returns:
             Number of tokens in the text
         """
-        if not text:
-            return 0
-        try:
-            if self.encoding is not None:
-                return len(self.encoding.encode(text))
-            else:
-                # Fallback: rough estimate of 4 chars per token
-                return len(text) // 4
-        except Exception as e:
-            logger.error(f"Error counting tokens: {e}")
-            # Fallback: rough estimate of 4 chars per token
-            return len(text) // 4
+        return tokenizer.count(text)
 
     def extract_text_pdf(self, file_path: str) -> List[Dict]:
         """
@@ -67,28 +47,39 @@ class DocumentProcessor:
         Returns:
             List of dictionaries with page_number, page_total, and text
         """
+        pages = list(self.iter_text_pdf(file_path))
+        logger.info(f"Extracted {len(pages)} pages from PDF: {file_path}")
+        return pages
+
+    def iter_text_pdf(self, file_path: str) -> Iterator[Dict]:
+        """
+        Lazily extract text from a PDF file, one page at a time.
+
+        Uses PyMuPDF and falls back to PyPDF2 if PyMuPDF is unavailable or
+        cannot open the file.
+
+        Args:
+            file_path: Path to the PDF file
+
+        Yields:
+            Dictionaries with page_number, page_total, and text for non-empty pages
+        """
+        yielded = False
         try:
-            import PyPDF2
-
-            pages = []
-            with open(file_path, "rb") as file:
-                reader = PyPDF2.PdfReader(file)
-                total_pages = len(reader.pages)
-
-                for i, page in enumerate(reader.pages):
-                    text = page.extract_text()
-                    if text.strip():  # Only add non-empty pages
-                        pages.append(
-                            {
-                                "page_number": i + 1,
-                                "page_total": total_pages,
-                                "text": text,
-                            }
-                        )
-
-            logger.info(f"Extracted {len(pages)} pages from PDF: {file_path}")
-            return pages
+            for page in iter_pdf_pages_pymupdf(file_path):
+                yielded = True
+                yield page
+            return
+        except Exception as e:
+            if yielded:
+                logger.error(f"Error extracting text from PDF {file_path}: {e}")
+                raise
+            logger.warning(
+                f"PyMuPDF could not extract {file_path} ({e}), falling back to PyPDF2"
+            )
 
+        try:
+            yield from iter_pdf_pages_pypdf2(file_path)
         except ImportError:
             logger.error("PyPDF2 not installed. Cannot process PDF files.")
             raise
@@ -154,6 +145,12 @@ class DocumentProcessor:
         """
         Split text into chunks with token-based splitting.
 
+        The text is encoded once. Each chunk takes up to ``max_tokens`` tokens
+        and is cut back to the last separator inside that window, preferring
+        paragraph breaks, then line breaks, sentences and words. Overlap is
+        taken from the token array, and token counts fall out of the token
+        indices, so no substring is encoded again.
+
         Args:
             text: Text to split
             max_tokens: Maximum tokens per chunk
@@ -165,43 +162,105 @@ class DocumentProcessor:
         if not text.strip():
             return []
 
+        if self.encoding is None:
+            return self._simple_chunk_text(text, max_tokens)
+
         try:
-            from langchain.text_splitter import RecursiveCharacterTextSplitter
+            tokens = self.encoding.encode(text, disallowed_special=())
+            text, offsets = self.encoding.decode_with_offsets(tokens)
+        except Exception as e:
+            logger.error(f"Error encoding text for chunking: {e}")
+            return self._simple_chunk_text(text, max_tokens)
 
-            splitter = RecursiveCharacterTextSplitter(
-                chunk_size=max_tokens,
-                chunk_overlap=overlap_tokens,
-                length_function=self.count_tokens,
-                separators=["\n\n", "\n", ". ", " ", ""],
-            )
+        total = len(tokens)
+        result = []
+        start = 0
+        previous_end = 0
+
+        while start < total:
+            end = min(start + max_tokens, total)
+            if end < total:
+                # Each chunk must reach past the previous one, not just its overlap
+                end = self._separator_boundary(
+                    text, offsets, start, end, max(start, previous_end) + 1
+                )
 
-            chunks = splitter.split_text(text)
-            result = []
+            text_end = offsets[end] if end < total else len(text)
+            content = text[offsets[start]:text_end].strip()
+            if content:
+                result.append({"content": content, "token_count": end - start})
 
-            for chunk in chunks:
-                if chunk.strip():  # Only add non-empty chunks
-                    result.append(
-                        {"content": chunk.strip(), "token_count": self.count_tokens(chunk)}
-                    )
+            if end >= total:
+                break
+            previous_end = end
+            start = self._overlap_start(text, offsets, max(end - overlap_tokens, start + 1), end)
 
-            logger.info(
-                f"Split text into {len(result)} chunks "
-                f"(max {max_tokens} tokens, overlap {overlap_tokens})"
-            )
+        logger.info(
+            f"Split text into {len(result)} chunks "
+            f"(max {max_tokens} tokens, overlap {overlap_tokens})"
+        )
 
-            return result
+        return result
 
-        except ImportError:
-            logger.error("langchain not installed. Cannot split text into chunks.")
-            # Fallback: simple splitting
-            return self._simple_chunk_text(text, max_tokens)
-        except Exception as e:
-            logger.error(f"Error chunking text: {e}")
-            raise
+    def _separator_boundary(
+        self, text: str, offsets: List[int], start: int, end: int, min_end: int
+    ) -> int:
+        """
+        Find the token index to end a chunk at, given a token window.
+
+        Args:
+            text: The decoded text
+            offsets: Character offset of each token in ``text``
+            start: Index of the first token in the window
+            end: Index one past the last token in the window
+            min_end: Smallest acceptable index to end the chunk at
+
+        Returns:
+            Index one past the last token of the chunk, at the last separator
+            in the window, or ``end`` if the window has no usable separator
+        """
+        window_start = offsets[start]
+        window_end = offsets[end]
+
+        for separator in self.SEPARATORS:
+            position = text.rfind(separator, window_start, window_end)
+            if position <= window_start:
+                continue
+
+            # Trailing spaces belong to the next chunk, as tokenizers attach
+            # them to the following word
+            cut = position + len(separator.rstrip(" "))
+            boundary = bisect_left(offsets, cut, start, end)
+            if boundary >= min_end:
+                return boundary
+
+        return end
+
+    def _overlap_start(
+        self, text: str, offsets: List[int], start: int, end: int
+    ) -> int:
+        """
+        Move the start of an overlap forward to the first word boundary.
+
+        Args:
+            text: The decoded text
+            offsets: Character offset of each token in ``text``
+            start: Index of the first overlapping token
+            end: Index one past the last token of the previous chunk
+
+        Returns:
+            Index of the first token in the overlap that starts a word, or
+            ``start`` if there is none
+        """
+        for index in range(start, end):
+            offset = offsets[index]
+            if offset == 0 or text[offset].isspace() or text[offset - 1].isspace():
+                return index
+        return start
 
     def _simple_chunk_text(self, text: str, max_tokens: int) -> List[Dict]:
         """
-        Simple fallback chunking method without langchain.
+        Simple fallback chunking method for when no tokenizer is available.
 
         Args:
             text: Text to split
@@ -242,15 +301,66 @@ class DocumentProcessor:
         logger.info(f"Simple chunking created {len(chunks)} chunks")
         return chunks
 
-    def process_file(
+    def iter_pages(
+        self,
+        file_path: str,
+        file_type: str,
+        content_hash: Optional[str] = None,
+    ) -> Iterator[Dict]:
+        """
+        Yield the pages of a file as they are extracted.
+
+        Pages of PDF and DOCX files are read from the sidecar cache when one
+        exists for the file contents, and written to it otherwise, so each
+        file is only parsed once.
+
+        Args:
+            file_path: Path to the file
+            file_type: Type of file (pdf, docx, txt)
+            content_hash: SHA-256 of the file contents, computed if omitted
+
+        Yields:
+            Dictionaries with page_number, page_total, and text
+        """
+        file_type = file_type.lower()
+        if file_type not in self.CACHED_FILE_TYPES:
+            yield from self._extract_pages(file_path, file_type)
+            return
+
+        content_hash = content_hash or file_sha256(file_path)
+        cached = read_pages(file_path, content_hash)
+        if cached is not None:
+            logger.info(f"Using cached pages for {file_path}")
+            yield from cached
+            return
+
+        yield from write_pages(
+            file_path, content_hash, self._extract_pages(file_path, file_type)
+        )
+
+    def _extract_pages(self, file_path: str, file_type: str) -> Iterator[Dict]:
+        """Parse the pages of a file, bypassing the sidecar cache."""
+        if file_type == "pdf":
+            yield from self.iter_text_pdf(file_path)
+        elif file_type in ["docx", "doc"]:
+            yield from self.extract_text_docx(file_path)
+        elif file_type == "txt":
+            yield from self.extract_text_txt(file_path)
+        else:
+            raise ValueError(f"Unsupported file type: {file_type}")
+
+    def iter_chunks(
         self,
         file_path: str,
         file_type: str,
         max_chunk_tokens: int = 500,
         overlap_tokens: int = 50,
-    ) -> List[Dict]:
+    ) -> Iterator[Dict]:
         """
-        Process a file and return chunks with metadata.
+        Yield chunks of a file as its pages are parsed.
+
+        Only the page currently being chunked is held in memory, so callers
+        can consume chunks in bounded batches regardless of document size.
 
         Args:
             file_path: Path to the file
@@ -258,72 +368,83 @@ class DocumentProcessor:
             max_chunk_tokens: Maximum tokens per chunk
             overlap_tokens: Overlap tokens between chunks
 
-        Returns:
-            List of dictionaries with content, token_count, page_number, page_total
+        Yields:
+            Dictionaries with content, token_count, page_number, page_total
         """
         logger.info(
             f"Processing {file_type} file: {file_path} "
             f"(max {max_chunk_tokens} tokens, overlap {overlap_tokens})"
         )
 
-        # Extract text by pages
-        if file_type.lower() == "pdf":
-            pages = self.extract_text_pdf(file_path)
-        elif file_type.lower() in ["docx", "doc"]:
-            pages = self.extract_text_docx(file_path)
-        elif file_type.lower() == "txt":
-            pages = self.extract_text_txt(file_path)
-        else:
-            raise ValueError(f"Unsupported file type: {file_type}")
-
-        # Process each page into chunks
-        all_chunks = []
-        for page in pages:
-            chunks = self.chunk_text(page["text"], max_chunk_tokens, overlap_tokens)
-
-            for chunk in chunks:
-                all_chunks.append(
-                    {
-                        **chunk,
-                        "page_number": page["page_number"],
-                        "page_total": page["page_total"],
-                    }
-                )
+        page_count = 0
+        chunk_count = 0
+        for page in self.iter_pages(file_path, file_type):
+            page_count += 1
+            for chunk in self.chunk_text(page["text"], max_chunk_tokens, overlap_tokens):
+                chunk_count += 1
+                yield {
+                    **chunk,
+                    "page_number": page["page_number"],
+                    "page_total": page["page_total"],
+                }
 
         logger.info(
-            f"Processed file into {len(all_chunks)} total chunks "
-            f"from {len(pages)} pages"
+            f"Processed file into {chunk_count} total chunks "
+            f"from {page_count} pages"
         )
 
-        return all_chunks
+    def process_file(
+        self,
+        file_path: str,
+        file_type: str,
+        max_chunk_tokens: int = 500,
+        overlap_tokens: int = 50,
+    ) -> List[Dict]:
+        """
+        Process a file and return chunks with metadata.
+
+        Args:
+            file_path: Path to the file
+            file_type: Type of file (pdf, docx, txt)
+            max_chunk_tokens: Maximum tokens per chunk
+            overlap_tokens: Overlap tokens between chunks
+
+        Returns:
+            List of dictionaries with content, token_count, page_number, page_total
+        """
+        return list(
+            self.iter_chunks(file_path, file_type, max_chunk_tokens, overlap_tokens)
+        )
 
-    def estimate_file_size_tokens(self, file_path: str, file_type: str) -> int:
+    def estimate_file_size_tokens(
+        self, file_path: str, file_type: str, content_hash: Optional[str] = None
+    ) -> int:
         """
         Estimate the token count for a file without full processing.
 
+        The extracted pages are cached next to the file, so ingestion can
+        reuse them instead of parsing the file again. Runs on the request
+        path, so PDFs are extracted in-process.
+
         Args:
             file_path: Path to the file
             file_type: Type of file (pdf, docx, txt)
+            content_hash: SHA-256 of the file contents, computed if omitted
 
         Returns:
             Estimated token count
         """
         try:
-            # Quick extraction without chunking
-            if file_type.lower() == "pdf":
-                pages = self.extract_text_pdf(file_path)
-            elif file_type.lower() in ["docx", "doc"]:
-                pages = self.extract_text_docx(file_path)
-            elif file_type.lower() == "txt":
-                pages = self.extract_text_txt(file_path)
-            else:
+            if file_type.lower() not in ["pdf", "docx", "doc", "txt"]:
                 # Fallback: estimate from file size
                 file_size = Path(file_path).stat().st_size
                 return file_size // 4  # Rough estimate
 
-            # Count tokens in all pages
-            total_text = "\n".join(page["text"] for page in pages)
-            tokens = self.count_tokens(total_text)
+            # Quick extraction without chunking, counting page by page
+            tokens = sum(
+                self.count_tokens(page["text"])
+                for page in self.iter_pages(file_path, file_type, content_hash)
+            )
 
             logger.info(f"Estimated {tokens} tokens for {file_path}")
             return tokens
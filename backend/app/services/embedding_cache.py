@@ -0,0 +1,136 @@
+import hashlib
+import logging
+import unicodedata
+from contextlib import AbstractContextManager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import (
+    REAL,
+    Column,
+    Connection,
+    DateTime,
+    MetaData,
+    Table,
+    Text,
+    cast,
+    func,
+    select,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+
+logger = logging.getLogger(__name__)
+
+# Hashes per lookup query
+LOOKUP_BATCH_SIZE = 1000
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text before hashing, so that trivially different copies of the
+    same chunk share a cache entry.
+
+    Applies Unicode NFC normalization and collapses all whitespace runs,
+    including newlines, to single spaces.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def content_hash(text: str) -> str:
+    """Return the hex SHA-256 of the normalized text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def embedding_cache_table(
+    metadata: MetaData, name: str = "embedding_cache", dimensions: int = 1536
+) -> Table:
+    """Describe the embedding cache table, which is created by init_db."""
+    return Table(
+        name,
+        metadata,
+        Column("model", Text, primary_key=True),
+        Column("content_hash", Text, primary_key=True),
+        Column("embedding", Vector(dimensions), nullable=False),
+        Column(
+            "created_at", DateTime(timezone=True), nullable=False, server_default=func.now()
+        ),
+    )
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of embeddings stored in Postgres.
+
+    Entries are keyed by (embedding model, content hash), so re-uploaded or
+    retried documents reuse embeddings instead of calling OpenAI again.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], AbstractContextManager[Connection]],
+        model: str,
+        table: Table,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            connect: Factory for a SQLAlchemy connection context manager that
+                commits on exit, such as ``engine.begin``
+            model: Embedding model the cached vectors belong to
+            table: The cache table
+        """
+        self.connect = connect
+        self.model = model
+        self.table = table
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """
+        Look up cached embeddings.
+
+        Args:
+            hashes: Content hashes to look up
+
+        Returns:
+            Mapping of content hash to embedding, for the hashes that were found
+        """
+        hashes = list(dict.fromkeys(hashes))
+        if not hashes:
+            return {}
+
+        table = self.table
+        found: Dict[str, List[float]] = {}
+        with self.connect() as conn:
+            for i in range(0, len(hashes), LOOKUP_BATCH_SIZE):
+                rows = conn.execute(
+                    select(table.c.content_hash, cast(table.c.embedding, ARRAY(REAL)))
+                    .where(table.c.model == self.model)
+                    .where(table.c.content_hash.in_(hashes[i:i + LOOKUP_BATCH_SIZE]))
+                )
+                found.update(rows.tuples())
+
+        logger.info(f"Embedding cache hit for {len(found)} of {len(hashes)} texts")
+        return found
+
+    def put_many(self, entries: Iterable[Tuple[str, List[float]]]) -> None:
+        """
+        Store embeddings, keeping existing entries on conflict.
+
+        Args:
+            entries: Iterable of (content hash, embedding) tuples
+        """
+        rows = [
+            {"model": self.model, "content_hash": digest, "embedding": embedding}
+            for digest, embedding in dict(entries).items()
+        ]
+        if not rows:
+            return
+
+        statement = insert(self.table).on_conflict_do_nothing(
+            index_elements=["model", "content_hash"]
+        )
+        with self.connect() as conn:
+            for i in range(0, len(rows), LOOKUP_BATCH_SIZE):
+                conn.execute(statement, rows[i:i + LOOKUP_BATCH_SIZE])
+
+        logger.info(f"Stored {len(rows)} embeddings in the embedding cache")
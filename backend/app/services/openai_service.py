@@ -1,14 +1,62 @@
+import asyncio
 import json
 import logging
-from typing import Any, Dict, List, Optional, Union
+import math
+import random
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Union
 
 from fastapi import HTTPException
 from app.core.config import settings
+from app.core.tokenizer import tokenizer
 from openai import AsyncOpenAI, OpenAI, APIError, RateLimitError, APITimeoutError
 
 logger = logging.getLogger(__name__)
 
 
+def _retry_after_seconds(error: RateLimitError) -> Optional[float]:
+    """Read the Retry-After header of a rate limit error, if present."""
+    try:
+        value = error.response.headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (AttributeError, ValueError):
+        return None
+
+
+class _RateLimitBackoff:
+    """
+    Backoff state shared by all concurrent embedding requests.
+
+    A rate limit error pauses every worker until the backoff window has
+    passed, and the window doubles on consecutive errors. Successful
+    requests shrink it again.
+    """
+
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.delay = 0.0
+        self.resume_at = 0.0
+
+    async def wait(self) -> None:
+        loop = asyncio.get_running_loop()
+        remaining = self.resume_at - loop.time()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+
+    def penalize(self, retry_after: Optional[float] = None) -> float:
+        self.delay = min(max(self.delay * 2, self.base_delay), self.max_delay)
+        pause = retry_after if retry_after is not None else self.delay
+        pause *= 1 + random.uniform(0, 0.25)
+        loop = asyncio.get_running_loop()
+        self.resume_at = max(self.resume_at, loop.time() + pause)
+        return pause
+
+    def recover(self) -> None:
+        self.delay /= 2
+        if self.delay < self.base_delay:
+            self.delay = 0.0
+
+
 class OpenAIService:
     """Service for interacting with OpenAI APIs"""
 
@@ -49,10 +97,253 @@ class OpenAIService:
         except APIError as e:
             logger.error(f"OpenAI API error: {str(e)}")
             raise HTTPException(status_code=503, detail="AI service unavailable")
+        except Exception:
+            logger.exception("Unexpected error generating embedding")
+            raise HTTPException(status_code=500, detail="Internal server error")
+
+    async def aget_embedding(self, text: str) -> List[float]:
+        """
+        Generate embedding for the given text asynchronously.
+
+        Args:
+            text: The input text to generate an embedding for.
+
+        Returns:
+            A list of floats representing the embedding vector.
+        """
+        text = text.replace("\n", " ")
+        try:
+            response = await self.async_client.embeddings.create(
+                input=[text],
+                model=self.embedding_model,
+            )
+            return response.data[0].embedding
+        except RateLimitError as e:
+            logger.warning(f"OpenAI rate limit exceeded: {str(e)}")
+            raise HTTPException(status_code=429, detail="AI service rate limit exceeded. Please try again later.")
+        except APITimeoutError as e:
+            logger.error(f"OpenAI API timeout: {str(e)}")
+            raise HTTPException(status_code=504, detail="AI service timeout. Please try again.")
+        except APIError as e:
+            logger.error(f"OpenAI API error: {str(e)}")
+            raise HTTPException(status_code=503, detail="AI service unavailable")
         except Exception as e:
             logger.exception("Unexpected error generating embedding")
             raise HTTPException(status_code=500, detail="Internal server error")
 
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for many texts, packing several inputs per request.
+
+        Inputs are grouped so that every request stays under the configured
+        per-request input-count and token limits.
+
+        Args:
+            texts: The input texts to generate embeddings for.
+
+        Returns:
+            A list of embedding vectors, in the same order as the input texts.
+        """
+        embeddings: List[List[float]] = []
+        for batch in self._batch_embedding_inputs(texts):
+            embeddings.extend(self._create_embeddings(batch))
+        return embeddings
+
+    def _batch_embedding_inputs(
+        self, texts: List[str], max_inputs: Optional[int] = None
+    ) -> Iterator[List[str]]:
+        """
+        Split texts into request-sized batches.
+
+        Args:
+            texts: The input texts to group.
+            max_inputs: Optional lower cap on inputs per request.
+
+        Yields:
+            Lists of cleaned texts that fit into a single embeddings request.
+        """
+        max_inputs = min(
+            max_inputs or settings.openai.embedding_batch_max_inputs,
+            settings.openai.embedding_batch_max_inputs,
+        )
+        max_tokens = settings.openai.embedding_batch_max_tokens
+
+        cleaned = [text.replace("\n", " ") for text in texts]
+        token_counts = tokenizer.count_batch(cleaned)
+
+        batch: List[str] = []
+        batch_tokens = 0
+        for text, tokens in zip(cleaned, token_counts):
+            if batch and (
+                len(batch) >= max_inputs or batch_tokens + tokens > max_tokens
+            ):
+                yield batch
+                batch = []
+                batch_tokens = 0
+            batch.append(text)
+            batch_tokens += tokens
+
+        if batch:
+            yield batch
+
+    def _create_embeddings(self, inputs: List[str]) -> List[List[float]]:
+        """
+        Run a single embeddings request for a batch of inputs.
+
+        Args:
+            inputs: Cleaned texts that fit into one request.
+
+        Returns:
+            The embedding vectors, ordered like the inputs.
+        """
+        try:
+            response = self.client.embeddings.create(
+                input=inputs,
+                model=self.embedding_model,
+            )
+            data = sorted(response.data, key=lambda item: item.index)
+            return [item.embedding for item in data]
+        except RateLimitError as e:
+            logger.warning(f"OpenAI rate limit exceeded: {str(e)}")
+            raise HTTPException(status_code=429, detail="AI service rate limit exceeded. Please try again later.")
+        except APITimeoutError as e:
+            logger.error(f"OpenAI API timeout: {str(e)}")
+            raise HTTPException(status_code=504, detail="AI service timeout. Please try again.")
+        except APIError as e:
+            logger.error(f"OpenAI API error: {str(e)}")
+            raise HTTPException(status_code=503, detail="AI service unavailable")
+        except Exception:
+            logger.exception("Unexpected error generating embeddings")
+            raise HTTPException(status_code=500, detail="Internal server error")
+
+    async def aget_embeddings(
+        self, texts: List[str], concurrency: Optional[int] = None
+    ) -> List[List[float]]:
+        """
+        Generate embeddings for many texts with several requests in flight.
+
+        Args:
+            texts: The input texts to generate embeddings for.
+            concurrency: Maximum concurrent requests, defaults to the one in settings.
+
+        Returns:
+            A list of embedding vectors, in the same order as the input texts.
+        """
+        return await self._gather_embeddings(self.async_client, texts, concurrency)
+
+    def get_embeddings_concurrent(
+        self, texts: List[str], concurrency: Optional[int] = None
+    ) -> List[List[float]]:
+        """
+        Synchronous bridge to the concurrent embedding pipeline for Celery tasks.
+
+        Runs its own event loop with a dedicated async client, so it must not be
+        called from code that is already running inside an event loop.
+
+        Args:
+            texts: The input texts to generate embeddings for.
+            concurrency: Maximum concurrent requests, defaults to the one in settings.
+
+        Returns:
+            A list of embedding vectors, in the same order as the input texts.
+        """
+
+        async def run() -> List[List[float]]:
+            # Retries are handled by the shared backoff instead of the client
+            async with AsyncOpenAI(
+                api_key=settings.openai.api_key, max_retries=0
+            ) as client:
+                return await self._gather_embeddings(client, texts, concurrency)
+
+        return asyncio.run(run())
+
+    async def _gather_embeddings(
+        self,
+        client: AsyncOpenAI,
+        texts: List[str],
+        concurrency: Optional[int] = None,
+    ) -> List[List[float]]:
+        """
+        Fan embedding batches out over a bounded number of concurrent requests.
+
+        Args:
+            client: The async OpenAI client to issue requests with.
+            texts: The input texts to generate embeddings for.
+            concurrency: Maximum concurrent requests, defaults to the one in settings.
+
+        Returns:
+            A list of embedding vectors, in the same order as the input texts.
+        """
+        if not texts:
+            return []
+
+        concurrency = max(1, concurrency or settings.openai.embedding_concurrency)
+        # Split into at least `concurrency` requests so they can run in parallel
+        batches = list(
+            self._batch_embedding_inputs(
+                texts, max_inputs=math.ceil(len(texts) / concurrency)
+            )
+        )
+
+        semaphore = asyncio.Semaphore(concurrency)
+        backoff = _RateLimitBackoff()
+
+        async def embed(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self._acreate_embeddings(client, batch, backoff)
+
+        results = await asyncio.gather(*(embed(batch) for batch in batches))
+        return [embedding for batch_result in results for embedding in batch_result]
+
+    async def _acreate_embeddings(
+        self,
+        client: AsyncOpenAI,
+        inputs: List[str],
+        backoff: _RateLimitBackoff,
+    ) -> List[List[float]]:
+        """
+        Run a single async embeddings request, backing off on rate limits.
+
+        Args:
+            client: The async OpenAI client to issue the request with.
+            inputs: Cleaned texts that fit into one request.
+            backoff: Backoff state shared with the other in-flight requests.
+
+        Returns:
+            The embedding vectors, ordered like the inputs.
+        """
+        max_retries = settings.openai.embedding_max_retries
+        attempt = 0
+        while True:
+            await backoff.wait()
+            try:
+                response = await client.embeddings.create(
+                    input=inputs,
+                    model=self.embedding_model,
+                )
+                backoff.recover()
+                data = sorted(response.data, key=lambda item: item.index)
+                return [item.embedding for item in data]
+            except RateLimitError as e:
+                if attempt >= max_retries:
+                    logger.warning(f"OpenAI rate limit exceeded: {str(e)}")
+                    raise HTTPException(status_code=429, detail="AI service rate limit exceeded. Please try again later.")
+                attempt += 1
+                pause = backoff.penalize(_retry_after_seconds(e))
+                logger.info(
+                    f"Embedding request rate limited, retrying in {pause:.1f}s "
+                    f"(attempt {attempt}/{max_retries})"
+                )
+            except APITimeoutError as e:
+                logger.error(f"OpenAI API timeout: {str(e)}")
+                raise HTTPException(status_code=504, detail="AI service timeout. Please try again.")
+            except APIError as e:
+                logger.error(f"OpenAI API error: {str(e)}")
+                raise HTTPException(status_code=503, detail="AI service unavailable")
+            except Exception:
+                logger.exception("Unexpected error generating embeddings")
+                raise HTTPException(status_code=500, detail="Internal server error")
+
     def create_completion(
         self,
         system_prompt: str,
@@ -228,6 +519,7 @@ class OpenAIService:
         temperature: float = 0.2,
         max_tokens: Optional[int] = None,
         response_format: Optional[Dict[str, str]] = None,
+        usage: Optional[Dict[str, int]] = None,
     ) -> str:
         """
         Generate a chat completion using the OpenAI chat model asynchronously.
@@ -238,6 +530,8 @@ class OpenAIService:
             temperature: Temperature for the completion (0.0 to 1.0).
             max_tokens: Maximum number of tokens to generate.
             response_format: Optional response format, e.g. {"type": "json_object"}.
+            usage: Optional dictionary that receives the prompt_tokens and
+                completion_tokens reported by the API.
 
         Returns:
             The generated text response.
@@ -258,6 +552,9 @@ class OpenAIService:
                 params["response_format"] = response_format
                 
             response = await self.async_client.chat.completions.create(**params)
+            if usage is not None and response.usage is not None:
+                usage["prompt_tokens"] = response.usage.prompt_tokens
+                usage["completion_tokens"] = response.usage.completion_tokens
             return response.choices[0].message.content or ""
         except RateLimitError as e:
             logger.warning(f"OpenAI rate limit exceeded: {str(e)}")
@@ -273,5 +570,64 @@ class OpenAIService:
             raise HTTPException(status_code=500, detail="Internal server error")
 
 
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: float = 0.2,
+        max_tokens: Optional[int] = None,
+        usage: Optional[Dict[str, int]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion, yielding content deltas as they arrive.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'.
+            model: Optional specific model to use, defaults to the one in settings.
+            temperature: Temperature for the completion (0.0 to 1.0).
+            max_tokens: Maximum number of tokens to generate.
+            usage: Optional dictionary that receives the prompt_tokens and
+                completion_tokens reported by the API once the stream ends.
+
+        Yields:
+            Pieces of the generated text response, in order.
+        """
+        selected_model = model or self.model
+
+        try:
+            params = {
+                "model": selected_model,
+                "messages": messages,
+                "temperature": temperature,
+                "stream": True,
+            }
+
+            if max_tokens is not None:
+                params["max_tokens"] = max_tokens
+
+            if usage is not None:
+                # Usage arrives in a final chunk without choices
+                params["stream_options"] = {"include_usage": True}
+
+            stream = await self.async_client.chat.completions.create(**params)
+            async for chunk in stream:
+                if usage is not None and chunk.usage is not None:
+                    usage["prompt_tokens"] = chunk.usage.prompt_tokens
+                    usage["completion_tokens"] = chunk.usage.completion_tokens
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except RateLimitError as e:
+            logger.warning(f"OpenAI rate limit exceeded: {str(e)}")
+            raise HTTPException(status_code=429, detail="AI service rate limit exceeded. Please try again later.")
+        except APITimeoutError as e:
+            logger.error(f"OpenAI API timeout: {str(e)}")
+            raise HTTPException(status_code=504, detail="AI service timeout. Please try again.")
+        except APIError as e:
+            logger.error(f"OpenAI API error: {str(e)}")
+            raise HTTPException(status_code=503, detail="AI service unavailable")
+        except Exception:
+            logger.exception("Unexpected error streaming chat completion")
+            raise HTTPException(status_code=500, detail="Internal server error")
+
 # Create a singleton instance
 openai_service = OpenAIService() 
\ No newline at end of file
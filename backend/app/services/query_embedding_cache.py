@@ -0,0 +1,229 @@
+import logging
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.services.embedding_cache import content_hash
+
+logger = logging.getLogger(__name__)
+
+
+class QueryEmbeddingCache:
+    """
+    Two-level cache for query embeddings used in chat retrieval.
+
+    Entries are keyed by (embedding model, normalized text hash). The first
+    level is a size-bounded in-process LRU; the second is Redis, shared by
+    all workers. Both levels expire entries after ``ttl_seconds``. Redis
+    errors are logged and treated as misses, so retrieval keeps working
+    without Redis.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        model: str,
+        max_entries: int = 1024,
+        ttl_seconds: int = 86400,
+        key_prefix: str = "query-embedding",
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            redis_url: URL of the Redis server
+            model: Embedding model the cached vectors belong to
+            max_entries: Maximum number of entries in the in-process LRU
+            ttl_seconds: Time to live of cached entries
+            key_prefix: Prefix of the Redis keys
+        """
+        self.redis_url = redis_url
+        self.model = model
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+
+        self._entries: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis: Optional[redis.Redis] = None
+        self._async_redis: Optional[aioredis.Redis] = None
+
+        self.memory_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @property
+    def redis(self) -> redis.Redis:
+        """Lazy load the Redis client on first access."""
+        if self._redis is None:
+            # Short timeouts, so that a slow Redis degrades to cache misses
+            self._redis = redis.Redis.from_url(
+                self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5
+            )
+        return self._redis
+
+    @property
+    def async_redis(self) -> aioredis.Redis:
+        """Lazy load the asyncio Redis client on first access."""
+        if self._async_redis is None:
+            self._async_redis = aioredis.Redis.from_url(
+                self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5
+            )
+        return self._async_redis
+
+    def _key(self, text: str) -> str:
+        return f"{self.key_prefix}:{self.model}:{content_hash(text)}"
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """
+        Look up the embedding of a query text.
+
+        Args:
+            text: The query text
+
+        Returns:
+            The cached embedding, or None on a miss
+        """
+        key = self._key(text)
+        embedding = self._recall(key)
+        if embedding is not None:
+            return embedding
+
+        try:
+            packed = self.redis.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Query embedding cache lookup failed: {str(e)}")
+            packed = None
+
+        return self._load(key, packed)
+
+    async def aget(self, text: str) -> Optional[List[float]]:
+        """
+        Look up the embedding of a query text without blocking the event loop.
+
+        Args:
+            text: The query text
+
+        Returns:
+            The cached embedding, or None on a miss
+        """
+        key = self._key(text)
+        embedding = self._recall(key)
+        if embedding is not None:
+            return embedding
+
+        try:
+            packed = await self.async_redis.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Query embedding cache lookup failed: {str(e)}")
+            packed = None
+
+        return self._load(key, packed)
+
+    def set(self, text: str, embedding: List[float]) -> None:
+        """
+        Store the embedding of a query text in both cache levels.
+
+        Args:
+            text: The query text
+            embedding: The embedding to cache
+        """
+        key = self._key(text)
+        self._remember(key, embedding)
+
+        try:
+            self.redis.set(key, array("f", embedding).tobytes(), ex=self.ttl_seconds)
+        except redis.RedisError as e:
+            logger.warning(f"Query embedding cache write failed: {str(e)}")
+
+    async def aset(self, text: str, embedding: List[float]) -> None:
+        """
+        Store the embedding of a query text in both cache levels, without
+        blocking the event loop.
+
+        Args:
+            text: The query text
+            embedding: The embedding to cache
+        """
+        key = self._key(text)
+        self._remember(key, embedding)
+
+        try:
+            await self.async_redis.set(
+                key, array("f", embedding).tobytes(), ex=self.ttl_seconds
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Query embedding cache write failed: {str(e)}")
+
+    def _recall(self, key: str) -> Optional[List[float]]:
+        """Return an unexpired entry from the in-process LRU, if any."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, embedding = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            self.memory_hits += 1
+            return embedding
+
+    def _load(self, key: str, packed: Optional[bytes]) -> Optional[List[float]]:
+        """Count a Redis lookup result and promote hits into the LRU."""
+        if packed is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        embedding = array("f", packed).tolist()
+        self._remember(key, embedding)
+        with self._lock:
+            self.redis_hits += 1
+        return embedding
+
+    def _remember(self, key: str, embedding: List[float]) -> None:
+        """Add an entry to the in-process LRU, evicting the oldest if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Return the hit and miss counters of the cache.
+
+        Returns:
+            Dictionary with hits, memory_hits, redis_hits, misses, hit_rate,
+            size, and max_size
+        """
+        with self._lock:
+            hits = self.memory_hits + self.redis_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_entries,
+            }
+
+
+# Create a singleton instance
+query_embedding_cache = QueryEmbeddingCache(
+    settings.redis.url,
+    settings.openai.embedding_model,
+    max_entries=settings.chat.query_embedding_cache_size,
+    ttl_seconds=settings.chat.query_embedding_cache_ttl_seconds,
+)
@@ -1,51 +1,214 @@
 import logging
+import random
 import time
 import uuid
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple, Union
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from itertools import islice
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import (
+    Column,
+    Connection,
+    DateTime,
+    Index,
+    MetaData,
+    Table,
+    Text,
+    delete,
+    func,
+    or_,
+    select,
+)
+from sqlalchemy.dialects.postgresql import JSONB, UUID, insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-import pandas as pd
 from app.core.config import settings
+from app.core.db import engine, get_async_engine
+from app.services.embedding_cache import EmbeddingCache, content_hash, embedding_cache_table
 from app.services.openai_service import openai_service
-from timescale_vector import client
+from app.services.query_embedding_cache import query_embedding_cache
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# (id, metadata, content, embedding)
+VectorRecord = Tuple[str, Dict[str, Any], str, List[float]]
+
+# Rows per multi-row INSERT statement
+UPSERT_BATCH_SIZE = 500
+
+# 100-ns intervals between the UUID epoch 1582-10-15 and the Unix epoch
+_UUID_EPOCH_OFFSET = 0x01B21DD213814000
+
+# Tables created by init_db rather than Alembic, so they live outside
+# SQLModel.metadata
+vector_metadata = MetaData()
+
+
+def embeddings_table(metadata: MetaData, name: str, dimensions: int) -> Table:
+    """Describe the embeddings table, which is created by init_db."""
+    return Table(
+        name,
+        metadata,
+        Column("id", UUID(as_uuid=True), primary_key=True),
+        Column("metadata", JSONB),
+        Column("contents", Text),
+        Column("embedding", Vector(dimensions)),
+        Column(
+            "created_at",
+            DateTime(timezone=True),
+            primary_key=True,
+            server_default=func.now(),
+        ),
+        implicit_returning=False,
+    )
+
+
+def uuid_from_time(moment: datetime) -> uuid.UUID:
+    """
+    Create a version 1 UUID whose timestamp is the given time.
+
+    Args:
+        moment: The time to encode; naive datetimes are taken as UTC
+
+    Returns:
+        A UUID with the given timestamp and a random clock sequence and node
+    """
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    seconds = int(moment.timestamp())
+    intervals = (seconds * 10_000_000 + moment.microsecond * 10) + _UUID_EPOCH_OFFSET
+
+    clock_seq = random.getrandbits(14)
+    # Random node with the multicast bit set, as RFC 4122 recommends
+    node = random.getrandbits(48) | 0x010000000000
+    return uuid.UUID(
+        fields=(
+            intervals & 0xFFFFFFFF,
+            (intervals >> 32) & 0xFFFF,
+            ((intervals >> 48) & 0x0FFF) | 0x1000,
+            (clock_seq >> 8) | 0x80,
+            clock_seq & 0xFF,
+            node,
+        )
+    )
+
+
+class SearchHit:
+    """A single vector search result."""
+
+    __slots__ = ("id", "metadata", "content", "embedding", "distance")
+
+    def __init__(
+        self,
+        id: str,
+        metadata: Dict[str, Any],
+        content: str,
+        embedding: Any,
+        distance: float,
+    ):
+        self.id = id
+        self.metadata = metadata
+        self.content = content
+        self.embedding = embedding
+        self.distance = distance
+
+    def __repr__(self) -> str:
+        return f"SearchHit(id={self.id!r}, distance={self.distance:.4f})"
+
 
 class VectorStore:
     """A class for managing vector operations and database interactions."""
 
     def __init__(self):
-        """Initialize the VectorStore with settings and Timescale Vector client."""
+        """Initialize the VectorStore on the application's database engine."""
         self.vector_settings = settings.vector_store
-        
-        # Convert SQLAlchemy URI to format compatible with psycopg2
-        # Change from postgresql+psycopg:// to postgresql://
-        uri_string = settings.SQLALCHEMY_DATABASE_URI.unicode_string()
-        psycopg2_uri = uri_string.replace("postgresql+psycopg://", "postgresql://")
-        
-        logger.info(f"Initializing vector store with table: {self.vector_settings.table_name}")
-        
-        try:
-            self.vec_client = client.Sync(
-                psycopg2_uri,
-                self.vector_settings.table_name,
-                self.vector_settings.embedding_dimensions,
-                time_partition_interval=self.vector_settings.time_partition_interval,
-            )
-            logger.info("Vector store client initialized successfully")
-        except Exception as e:
-            logger.error(f"Error initializing vector store client: {str(e)}")
-            if "dsn" in str(e).lower():
-                # Show more details about the connection string (without credentials)
-                sanitized_uri = psycopg2_uri.replace(psycopg2_uri.split("@")[0], "postgresql://[REDACTED]")
-                logger.error(f"Connection string format issue. Using: {sanitized_uri}")
-            raise
+        # Vector reads and writes share the ORM engines' connection pools
+        self.engine = engine
+        self.table = embeddings_table(
+            vector_metadata,
+            self.vector_settings.table_name,
+            self.vector_settings.embedding_dimensions,
+        )
+        # Approximate nearest neighbour index for the cosine distance search
+        self.embedding_index = Index(
+            f"{self.vector_settings.table_name}_embedding_cosine_idx",
+            self.table.c.embedding,
+            postgresql_using="hnsw",
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        )
+        self.embedding_cache = EmbeddingCache(
+            self.engine.begin,
+            settings.openai.embedding_model,
+            embedding_cache_table(
+                vector_metadata, dimensions=self.vector_settings.embedding_dimensions
+            ),
+        )
+        logger.info(f"Initialized vector store with table: {self.vector_settings.table_name}")
+
+    @contextmanager
+    def connect(self, session: Optional[Session] = None) -> Iterator[Connection]:
+        """
+        Provide a connection for vector store statements.
+
+        Args:
+            session: Optional ORM session; its connection and transaction are
+                used and left for the caller to commit
+
+        Yields:
+            A connection from the engine's pool, in a transaction that is
+            committed on exit unless a session was given
+        """
+        if session is not None:
+            yield session.connection()
+            return
+        with self.engine.begin() as conn:
+            yield conn
+
+    @asynccontextmanager
+    async def aconnect(
+        self, session: Optional[AsyncSession] = None
+    ) -> AsyncIterator[AsyncConnection]:
+        """
+        Provide an async connection for vector store statements.
+
+        Args:
+            session: Optional async ORM session; its connection and
+                transaction are used and left for the caller to commit
+
+        Yields:
+            A connection from the async engine's pool, in a transaction that
+            is committed on exit unless a session was given
+        """
+        if session is not None:
+            yield await session.connection()
+            return
+        async with get_async_engine().begin() as conn:
+            yield conn
 
     def get_embedding(self, text: str) -> List[float]:
         """
         Generate embedding for the given text using the OpenAI service.
 
+        Embeddings are served from the query embedding cache when possible.
+
         Args:
             text: The input text to generate an embedding for.
 
@@ -53,27 +216,113 @@ class VectorStore:
             A list of floats representing the embedding.
         """
         start_time = time.time()
+        embedding = query_embedding_cache.get(text)
+        if embedding is not None:
+            logger.info("Embedding served from the query embedding cache")
+            return embedding
+
         embedding = openai_service.get_embedding(text)
+        query_embedding_cache.set(text, embedding)
         elapsed_time = time.time() - start_time
         logger.info(f"Embedding generated in {elapsed_time:.3f} seconds")
         return embedding
 
+    async def aget_embedding(self, text: str) -> List[float]:
+        """
+        Generate embedding for the given text without blocking the event loop.
+
+        Embeddings are served from the query embedding cache when possible.
+
+        Args:
+            text: The input text to generate an embedding for.
+
+        Returns:
+            A list of floats representing the embedding.
+        """
+        start_time = time.time()
+        embedding = await query_embedding_cache.aget(text)
+        if embedding is not None:
+            logger.info("Embedding served from the query embedding cache")
+            return embedding
+
+        embedding = await openai_service.aget_embedding(text)
+        await query_embedding_cache.aset(text, embedding)
+        elapsed_time = time.time() - start_time
+        logger.info(f"Embedding generated in {elapsed_time:.3f} seconds")
+        return embedding
+
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for a batch of texts using the OpenAI service.
+
+        Embeddings are looked up in the content-addressed embedding cache
+        first, and only texts that are not cached are sent to OpenAI, once per
+        distinct normalized text. Requests are fanned out concurrently, so this
+        must be called from synchronous code such as Celery tasks.
+
+        Args:
+            texts: The input texts to generate embeddings for.
+
+        Returns:
+            A list of embeddings, in the same order as the input texts.
+        """
+        start_time = time.time()
+        hashes = [content_hash(text) for text in texts]
+
+        try:
+            embeddings = self.embedding_cache.get_many(hashes)
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {str(e)}")
+            embeddings = {}
+
+        missing: Dict[str, str] = {}
+        for digest, text in zip(hashes, texts):
+            if digest not in embeddings:
+                missing.setdefault(digest, text)
+        if missing:
+            generated = openai_service.get_embeddings_concurrent(list(missing.values()))
+            new_entries = dict(zip(missing.keys(), generated))
+            embeddings.update(new_entries)
+
+            try:
+                self.embedding_cache.put_many(new_entries.items())
+            except Exception as e:
+                logger.warning(f"Embedding cache write failed: {str(e)}")
+
+        elapsed_time = time.time() - start_time
+        logger.info(
+            f"Generated {len(missing)} and reused {len(texts) - len(missing)} "
+            f"embeddings in {elapsed_time:.3f} seconds"
+        )
+        return [embeddings[digest] for digest in hashes]
+
     def create_tables(self) -> None:
-        """Create the necessary tables in the database"""
-        self.vec_client.create_tables()
+        """
+        Create the embeddings and embedding cache tables if they do not exist,
+        along with the search index of a new embeddings table.
+
+        init_db remains the usual way to create them, since it also turns the
+        embeddings table into a hypertable.
+        """
+        with self.connect() as conn:
+            vector_metadata.create_all(
+                conn, tables=[self.table, self.embedding_cache.table]
+            )
         logger.info(f"Created tables for vector store: {self.vector_settings.table_name}")
 
     def create_index(self) -> None:
-        """Create the StreamingDiskANN index to speed up similarity search"""
-        self.vec_client.create_embedding_index(client.DiskAnnIndex())
-        logger.info(f"Created DiskANN index for vector store: {self.vector_settings.table_name}")
+        """Create the HNSW cosine distance index to speed up similarity search"""
+        with self.connect() as conn:
+            self.embedding_index.create(conn, checkfirst=True)
+        logger.info(f"Created HNSW index for vector store: {self.vector_settings.table_name}")
 
     def drop_index(self) -> None:
-        """Drop the StreamingDiskANN index in the database"""
-        self.vec_client.drop_embedding_index()
+        """Drop the HNSW cosine distance index in the database"""
+        with self.connect() as conn:
+            self.embedding_index.drop(conn, checkfirst=True)
         logger.info(f"Dropped index for vector store: {self.vector_settings.table_name}")
 
-    def upsert(self, df: pd.DataFrame) -> None:
+    def upsert(self, df: "pd.DataFrame") -> None:
         """
         Insert or update records in the database from a pandas DataFrame.
 
@@ -81,9 +330,77 @@ class VectorStore:
             df: A pandas DataFrame containing the data to insert or update.
                 Expected columns: id, metadata, contents, embedding
         """
-        records = df.to_records(index=False)
-        self.vec_client.upsert(list(records))
-        logger.info(f"Inserted {len(df)} records into {self.vector_settings.table_name}")
+        self.upsert_many(df[["id", "metadata", "contents", "embedding"]].itertuples(index=False))
+
+    def upsert_many(
+        self,
+        records: Iterable[VectorRecord],
+        batch_size: int = UPSERT_BATCH_SIZE,
+        created_at: Optional[datetime] = None,
+        session: Optional[Session] = None,
+    ) -> int:
+        """
+        Insert or update many records using batched INSERT statements.
+
+        Records are written ``batch_size`` rows per statement over a single
+        connection and committed once at the end. Rows are keyed by
+        (id, created_at), so passing a fixed ``created_at`` together with
+        deterministic ids makes repeated writes update rows in place.
+
+        Args:
+            records: Iterable of (id, metadata, content, embedding) tuples
+            batch_size: Number of rows per INSERT statement
+            created_at: Timestamp for all records; defaults to the current time
+            session: Optional ORM session to write in; the caller commits it
+
+        Returns:
+            The number of records written
+        """
+        # Rows without a timestamp take the database's transaction time
+        row_created_at = created_at if created_at is not None else func.now()
+
+        total = 0
+        with self.connect(session) as conn:
+            rows = (
+                {
+                    "id": uuid.UUID(str(record_id)),
+                    "metadata": metadata,
+                    "contents": content,
+                    "embedding": embedding,
+                    "created_at": row_created_at,
+                }
+                for record_id, metadata, content, embedding in records
+            )
+            while True:
+                page = list(islice(rows, batch_size))
+                if not page:
+                    break
+                conn.execute(self._upsert_statement(page))
+                total += len(page)
+
+        logger.info(f"Upserted {total} records into {self.vector_settings.table_name}")
+        return total
+
+    def _upsert_statement(self, rows: List[Dict[str, Any]]):
+        """
+        Build one multi-row INSERT ... ON CONFLICT DO UPDATE for a batch.
+
+        Args:
+            rows: Column values for each row of the batch
+
+        Returns:
+            An INSERT statement with one VALUES tuple per row
+        """
+        table = self.table
+        statement = insert(table).values(rows)
+        return statement.on_conflict_do_update(
+            index_elements=[table.c.id, table.c.created_at],
+            set_={
+                "metadata": statement.excluded["metadata"],
+                "contents": statement.excluded.contents,
+                "embedding": statement.excluded.embedding,
+            },
+        )
 
     def upsert_single(
         self,
@@ -108,7 +425,7 @@ class VectorStore:
         if id_or_time is None:
             record_id = str(uuid.uuid4())
         elif isinstance(id_or_time, datetime):
-            record_id = str(client.uuid_from_time(id_or_time))
+            record_id = str(uuid_from_time(id_or_time))
         else:
             record_id = id_or_time
 
@@ -119,22 +436,10 @@ class VectorStore:
                 embedding = self.get_embedding(content)
                 logger.info(f"Embedding generated successfully with {len(embedding)} dimensions")
 
-            # Create DataFrame for upsert
-            df = pd.DataFrame(
-                [
-                    {
-                        "id": record_id,
-                        "metadata": metadata,
-                        "contents": content,
-                        "embedding": embedding,
-                    }
-                ]
-            )
-
             # Perform the upsert
             logger.info(f"Upserting vector with ID {record_id} into database")
             try:
-                self.upsert(df)
+                self.upsert_many([(record_id, metadata, content, embedding)])
                 logger.info(f"Successfully upserted vector with ID {record_id}")
             except Exception as e:
                 logger.error(f"Database upsert failed: {str(e)}")
@@ -152,10 +457,10 @@ class VectorStore:
         query_text: str,
         limit: int = 5,
         metadata_filter: Union[dict, List[dict]] = None,
-        predicates: Optional[client.Predicates] = None,
         time_range: Optional[Tuple[datetime, datetime]] = None,
-        return_dataframe: bool = True,
-    ) -> Union[List[Tuple[Any, ...]], pd.DataFrame]:
+        return_dataframe: bool = False,
+        session: Optional[Session] = None,
+    ) -> Union[List[SearchHit], "pd.DataFrame"]:
         """
         Query the vector database for similar embeddings based on input text.
 
@@ -163,55 +468,152 @@ class VectorStore:
             query_text: The input text to search for.
             limit: The maximum number of results to return.
             metadata_filter: A dictionary or list of dictionaries for equality-based metadata filtering.
-            predicates: A Predicates object for complex metadata filtering.
-            time_range: A tuple of (start_date, end_date) to filter results by time.
-            return_dataframe: Whether to return results as a DataFrame (default: True).
+            time_range: A tuple of (start_date, end_date) to filter results by creation time.
+            return_dataframe: Whether to return results as a pandas DataFrame
+                instead of a list of SearchHit objects (default: False).
+            session: Optional ORM session to search in, e.g. to see its
+                uncommitted writes.
 
         Returns:
-            Either a list of tuples or a pandas DataFrame containing the search results.
+            Either a list of SearchHit objects, ordered by distance, or a pandas
+            DataFrame containing the search results.
         """
         query_embedding = self.get_embedding(query_text)
+        results = self._search(query_embedding, limit, metadata_filter, time_range, session)
+
+        if return_dataframe:
+            return self._create_dataframe_from_results(results)
+        return self._create_hits_from_results(results)
+
+    async def asearch(
+        self,
+        query_text: str,
+        limit: int = 5,
+        metadata_filter: Union[dict, List[dict]] = None,
+        time_range: Optional[Tuple[datetime, datetime]] = None,
+        session: Optional[AsyncSession] = None,
+    ) -> List[SearchHit]:
+        """
+        Query the vector database for similar embeddings without blocking the
+        event loop.
+
+        Uses the async OpenAI client for the query embedding and the async
+        engine for the search.
+
+        Args:
+            query_text: The input text to search for.
+            limit: The maximum number of results to return.
+            metadata_filter: A dictionary or list of dictionaries for equality-based metadata filtering.
+            time_range: A tuple of (start_date, end_date) to filter results by creation time.
+            session: Optional async ORM session to search in.
+
+        Returns:
+            A list of SearchHit objects, ordered by distance.
+        """
+        query_embedding = await self.aget_embedding(query_text)
 
         start_time = time.time()
+        statement = self._search_statement(query_embedding, limit, metadata_filter, time_range)
 
-        search_args = {
-            "limit": limit,
-        }
+        logger.info(f"Vector search started with limit {limit} and filter {metadata_filter}")
+        async with self.aconnect(session) as conn:
+            results = (await conn.execute(statement)).all()
+        elapsed_time = time.time() - start_time
+        logger.info(f"Vector search completed in {elapsed_time:.3f} seconds")
 
-        if metadata_filter:
-            search_args["filter"] = metadata_filter
+        return self._create_hits_from_results(results)
+
+    def _search(
+        self,
+        query_embedding: List[float],
+        limit: int,
+        metadata_filter: Union[dict, List[dict], None],
+        time_range: Optional[Tuple[datetime, datetime]],
+        session: Optional[Session] = None,
+    ) -> List[Tuple[Any, ...]]:
+        """Run a cosine distance search and return its rows."""
+        start_time = time.time()
+        statement = self._search_statement(query_embedding, limit, metadata_filter, time_range)
+
+        logger.info(f"Vector search started with limit {limit} and filter {metadata_filter}")
+        with self.connect(session) as conn:
+            results = conn.execute(statement).all()
+        elapsed_time = time.time() - start_time
+        logger.info(f"Vector search completed in {elapsed_time:.3f} seconds")
+        return results
+
+    def _search_statement(
+        self,
+        query_embedding: List[float],
+        limit: int,
+        metadata_filter: Union[dict, List[dict], None],
+        time_range: Optional[Tuple[datetime, datetime]],
+    ):
+        """
+        Build the select of (id, metadata, contents, embedding, distance).
 
-        if predicates:
-            search_args["predicates"] = predicates
+        A list of metadata filters matches rows that contain any of them.
+        """
+        table = self.table
+        distance = table.c.embedding.cosine_distance(query_embedding).label("distance")
+        statement = select(
+            table.c.id,
+            table.c["metadata"],
+            table.c.contents,
+            table.c.embedding,
+            distance,
+        )
+
+        if metadata_filter:
+            filters = metadata_filter if isinstance(metadata_filter, list) else [metadata_filter]
+            statement = statement.where(
+                or_(*(table.c["metadata"].contains(f) for f in filters))
+            )
 
         if time_range:
             start_date, end_date = time_range
-            search_args["uuid_time_filter"] = client.UUIDTimeRange(start_date, end_date)
+            statement = statement.where(
+                table.c.created_at >= start_date, table.c.created_at < end_date
+            )
 
-        logger.info(f"Vector search started for query: {search_args}")
-        results = self.vec_client.search(query_embedding, **search_args)
-        elapsed_time = time.time() - start_time
-        #logger.info(f"Vector search results: {results}")
-        logger.info(f"Vector search completed in {elapsed_time:.3f} seconds")
+        return statement.order_by(distance).limit(limit)
 
-        if return_dataframe:
-            return self._create_dataframe_from_results(results)
-        else:
-            return results
+    def _create_hits_from_results(
+        self,
+        results: List[Tuple[Any, ...]],
+    ) -> List[SearchHit]:
+        """
+        Create SearchHit objects from the search results.
+
+        Args:
+            results: A list of (id, metadata, content, embedding, distance) rows.
+
+        Returns:
+            A list of SearchHit objects with string ids and float distances.
+        """
+        return [
+            SearchHit(str(id_), metadata or {}, content, embedding, float(distance))
+            for id_, metadata, content, embedding, distance in results
+        ]
 
     def _create_dataframe_from_results(
         self,
         results: List[Tuple[Any, ...]],
-    ) -> pd.DataFrame:
+    ) -> "pd.DataFrame":
         """
         Create a pandas DataFrame from the search results.
 
+        pandas is imported here rather than at module level, so that the
+        default search path does not load it.
+
         Args:
             results: A list of tuples containing the search results.
 
         Returns:
             A pandas DataFrame containing the formatted search results.
         """
+        import pandas as pd
+
         # Check if results are empty
         if not results:
             return pd.DataFrame(columns=["id", "metadata", "content", "embedding", "distance"])
@@ -236,6 +638,7 @@ class VectorStore:
         ids: List[str] = None,
         metadata_filter: dict = None,
         delete_all: bool = False,
+        session: Optional[Session] = None,
     ) -> None:
         """
         Delete records from the vector database.
@@ -244,6 +647,7 @@ class VectorStore:
             ids: A list of record IDs to delete.
             metadata_filter: A dictionary of metadata key-value pairs to filter records for deletion.
             delete_all: A boolean flag to delete all records.
+            session: Optional ORM session to delete in; the caller commits it.
 
         Raises:
             ValueError: If no deletion criteria are provided or if multiple criteria are provided.
@@ -253,16 +657,23 @@ class VectorStore:
                 "Provide exactly one of: ids, metadata_filter, or delete_all"
             )
 
+        table = self.table
+        statement = delete(table)
+        if ids:
+            statement = statement.where(table.c.id.in_([uuid.UUID(str(id_)) for id_ in ids]))
+        elif metadata_filter:
+            statement = statement.where(table.c["metadata"].contains(metadata_filter))
+
+        with self.connect(session) as conn:
+            conn.execute(statement)
+
         if delete_all:
-            self.vec_client.delete_all()
             logger.info(f"Deleted all records from {self.vector_settings.table_name}")
         elif ids:
-            self.vec_client.delete_by_ids(ids)
             logger.info(
                 f"Deleted {len(ids)} records from {self.vector_settings.table_name}"
             )
-        elif metadata_filter:
-            self.vec_client.delete_by_metadata(metadata_filter)
+        else:
             logger.info(
                 f"Deleted records matching metadata filter from {self.vector_settings.table_name}"
             )
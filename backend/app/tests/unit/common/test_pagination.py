@@ -0,0 +1,83 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlmodel import Field, Session, SQLModel, create_engine, select
+
+from app.common.utils.pagination import decode_cursor, encode_cursor, paginate
+
+
+# Test model
+class PaginatedModel(SQLModel, table=True):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    created_at: datetime
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    PaginatedModel.__table__.create(engine)
+    with Session(engine) as session:
+        # Two rows share each timestamp, so ties are broken by id
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        for i in range(10):
+            session.add(PaginatedModel(created_at=start + timedelta(minutes=i // 2)))
+        session.commit()
+        yield session
+
+
+def _all_pages(session, descending, limit=3):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = paginate(
+            session,
+            select(PaginatedModel),
+            PaginatedModel,
+            cursor=cursor,
+            limit=limit,
+            descending=descending,
+        )
+        pages.append(rows)
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    # Arrange
+    created_at = datetime(2026, 1, 1, 12, 30, 15, 123456)
+    row_id = uuid.uuid4()
+
+    # Act
+    cursor = encode_cursor(created_at, row_id)
+
+    # Assert
+    assert decode_cursor(cursor) == (created_at, row_id)
+
+
+def test_decode_cursor_rejects_garbage():
+    # Act / Assert
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+@pytest.mark.parametrize("descending", [True, False])
+def test_paginate_visits_every_row_once_in_order(session, descending):
+    # Arrange
+    expected = session.exec(select(PaginatedModel)).all()
+    expected.sort(key=lambda row: (row.created_at, row.id), reverse=descending)
+
+    # Act
+    pages = _all_pages(session, descending)
+
+    # Assert
+    assert [len(page) for page in pages] == [3, 3, 3, 1]
+    assert [row.id for page in pages for row in page] == [row.id for row in expected]
+
+
+def test_paginate_last_full_page_has_no_cursor(session):
+    # Act
+    rows, cursor = paginate(session, select(PaginatedModel), PaginatedModel, limit=10)
+
+    # Assert
+    assert len(rows) == 10
+    assert cursor is None
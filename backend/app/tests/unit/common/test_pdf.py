@@ -0,0 +1,27 @@
+import pymupdf
+
+from app.common.utils.pdf import iter_pdf_pages_pymupdf
+
+
+def _write_pdf(path, pages):
+    doc = pymupdf.open()
+    for text in pages:
+        page = doc.new_page()
+        if text:
+            page.insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+
+
+def test_iter_pdf_pages_yields_non_empty_pages_in_order(tmp_path):
+    # Arrange
+    file_path = tmp_path / "doc.pdf"
+    _write_pdf(file_path, ["page one", "", "page three"])
+
+    # Act
+    pages = list(iter_pdf_pages_pymupdf(str(file_path)))
+
+    # Assert
+    assert [page["page_number"] for page in pages] == [1, 3]
+    assert all(page["page_total"] == 3 for page in pages)
+    assert "page three" in pages[1]["text"]
@@ -1,11 +1,13 @@
+import asyncio
 import uuid
 from unittest.mock import MagicMock, patch
 
 import pytest
 from sqlmodel import Session, SQLModel, Field
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel.sql.expression import Select
 
-from app.core.base_crud import BaseCRUD
+from app.core.base_crud import AsyncBaseCRUD, BaseCRUD
 
 
 # Test model
@@ -148,3 +150,61 @@ def test_remove(test_crud, mock_session):
     mock_session.get.assert_called_once_with(TestModel, item_id)
     mock_session.delete.assert_called_once_with(mock_item)
     mock_session.commit.assert_called_once()
+
+
+class AsyncTestCRUD(AsyncBaseCRUD[TestModel, TestModelCreate, TestModelUpdate]):
+    def __init__(self):
+        super().__init__(TestModel)
+
+
+@pytest.fixture
+def async_crud():
+    return AsyncTestCRUD()
+
+
+@pytest.fixture
+def mock_async_session():
+    return MagicMock(spec=AsyncSession)
+
+
+def test_async_get(async_crud, mock_async_session):
+    # Arrange
+    item_id = uuid.uuid4()
+    mock_item = TestModel(id=item_id, name="Test Item")
+    mock_async_session.get.return_value = mock_item
+
+    # Act
+    result = asyncio.run(async_crud.get(mock_async_session, item_id))
+
+    # Assert
+    assert result == mock_item
+    mock_async_session.get.assert_awaited_once_with(TestModel, item_id)
+
+
+def test_async_create(async_crud, mock_async_session):
+    # Arrange
+    item_create = TestModelCreate(name="New Item", description="Description")
+
+    # Act
+    result = asyncio.run(async_crud.create(mock_async_session, obj_in=item_create))
+
+    # Assert
+    assert result.name == item_create.name
+    mock_async_session.add.assert_called_once_with(result)
+    mock_async_session.commit.assert_awaited_once()
+    mock_async_session.refresh.assert_awaited_once_with(result)
+
+
+def test_async_remove(async_crud, mock_async_session):
+    # Arrange
+    item_id = uuid.uuid4()
+    mock_item = TestModel(id=item_id, name="Test Item")
+    mock_async_session.get.return_value = mock_item
+
+    # Act
+    result = asyncio.run(async_crud.remove(mock_async_session, id=item_id))
+
+    # Assert
+    assert result == mock_item
+    mock_async_session.delete.assert_awaited_once_with(mock_item)
+    mock_async_session.commit.assert_awaited_once()
@@ -0,0 +1,69 @@
+import asyncio
+from unittest.mock import MagicMock, PropertyMock, patch
+
+from sqlalchemy import create_engine, event
+from sqlmodel import Session
+
+from app.core.config import Settings
+from app.core.db import (
+    _set_statement_timeout,
+    dispose_async_engine,
+    get_async_engine,
+    limit_statement_time,
+    peek_async_engine,
+)
+
+
+def test_limit_statement_time_only_limits_the_given_session():
+    # Arrange
+    sqlite = create_engine("sqlite://")
+    limited = Session(sqlite)
+    unlimited = Session(sqlite)
+
+    # Act
+    limit_statement_time(limited)
+
+    # Assert
+    assert event.contains(limited, "after_begin", _set_statement_timeout)
+    assert not event.contains(unlimited, "after_begin", _set_statement_timeout)
+
+
+def test_set_statement_timeout_is_transaction_local():
+    # Arrange
+    connection = MagicMock()
+
+    # Act
+    _set_statement_timeout(None, None, connection)
+
+    # Assert
+    connection.exec_driver_sql.assert_called_once_with("SET LOCAL statement_timeout = 30000")
+
+
+def test_statement_timeout_does_not_reload_settings_per_transaction():
+    # Arrange
+    connection = MagicMock()
+    session = Session(create_engine("sqlite://"))
+
+    # Act
+    with patch.object(Settings, "database", new_callable=PropertyMock) as database:
+        limit_statement_time(session)
+        _set_statement_timeout(session, None, connection)
+
+    # Assert
+    database.assert_not_called()
+    connection.exec_driver_sql.assert_called_once()
+
+
+def test_async_engine_is_created_lazily_with_its_own_pool_size():
+    # Arrange
+    assert peek_async_engine() is None
+
+    # Act
+    async_engine = get_async_engine()
+
+    # Assert
+    assert get_async_engine() is async_engine
+    assert peek_async_engine() is async_engine
+    assert async_engine.pool.size() == 5
+    asyncio.run(dispose_async_engine())
+    assert peek_async_engine() is None
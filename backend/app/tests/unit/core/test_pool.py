@@ -0,0 +1,45 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import exc
+
+from app.core.pool import InstrumentedQueuePool, PoolStats, pool_metrics
+
+
+@pytest.fixture
+def pool():
+    return InstrumentedQueuePool(
+        lambda: sqlite3.connect(":memory:", check_same_thread=False),
+        pool_size=1,
+        max_overflow=0,
+        timeout=0.05,
+        stats=PoolStats(),
+    )
+
+
+def test_checkouts_are_counted_with_occupancy(pool):
+    # Act
+    connection = pool.connect()
+    during = pool_metrics(pool)
+    connection.close()
+    after = pool_metrics(pool)
+
+    # Assert
+    assert during["checked_out"] == 1
+    assert after["checked_out"] == 0 and after["checked_in"] == 1
+    assert after["checkouts"] == 1 and after["timeouts"] == 0
+
+
+def test_exhausted_pool_records_timeout_wait(pool):
+    # Arrange
+    connection = pool.connect()
+
+    # Act
+    with pytest.raises(exc.TimeoutError):
+        pool.connect()
+    connection.close()
+
+    # Assert
+    metrics = pool_metrics(pool)
+    assert metrics["timeouts"] == 1
+    assert metrics["wait_max_ms"] >= 50
@@ -0,0 +1,48 @@
+from unittest.mock import patch
+
+import pytest
+import tiktoken
+
+from app.core.tokenizer import Tokenizer
+
+
+@pytest.fixture
+def byte_encoding():
+    # One token per byte keeps token counts easy to reason about
+    return tiktoken.Encoding(
+        name="bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={"<|endoftext|>": 256},
+    )
+
+
+def test_count_batch_matches_count(byte_encoding):
+    # Arrange
+    tokenizer = Tokenizer(num_threads=2)
+    tokenizer._encoding = byte_encoding
+    texts = ["", "abc", "héllo wörld", "<|endoftext|>"]
+
+    # Act
+    counts = tokenizer.count_batch(texts)
+
+    # Assert
+    assert counts == [tokenizer.count(text) for text in texts]
+    # Special tokens are encoded as plain text
+    assert counts[3] == len("<|endoftext|>")
+
+
+def test_encoding_loads_once_and_falls_back_to_estimate():
+    # Arrange
+    tokenizer = Tokenizer()
+
+    # Act
+    with patch("app.core.tokenizer.tiktoken") as mock_tiktoken:
+        mock_tiktoken.encoding_for_model.side_effect = OSError("offline")
+        mock_tiktoken.get_encoding.side_effect = OSError("offline")
+        counts = [tokenizer.count("abcdefgh"), *tokenizer.count_batch(["abcd", "ab"])]
+        tokenizer.warm_up()
+
+    # Assert
+    assert counts == [2, 1, 0]
+    assert mock_tiktoken.encoding_for_model.call_count == 1
@@ -0,0 +1,16 @@
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.fixture
+def word_tokens():
+    # One token per word keeps budgets easy to reason about
+    with patch(
+        "app.modules.chat.context_builder.tokenizer.count",
+        side_effect=lambda text: len(text.split()),
+    ), patch(
+        "app.modules.chat.context_builder.tokenizer.count_batch",
+        side_effect=lambda texts: [len(text.split()) for text in texts],
+    ):
+        yield
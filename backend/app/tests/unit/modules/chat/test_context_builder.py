@@ -0,0 +1,62 @@
+import uuid
+
+import pytest
+
+from app.modules.chat.context_builder import (
+    MESSAGE_OVERHEAD_TOKENS,
+    pack_history,
+    pack_references,
+)
+from app.modules.chat.models import ChatMessage
+from app.modules.chat.schemas import DocumentReferenceCreate
+
+
+pytestmark = pytest.mark.usefixtures("word_tokens")
+
+
+def _message(role, content):
+    return ChatMessage(conversation_id=uuid.uuid4(), role=role, content=content)
+
+
+def _reference(snippet):
+    return DocumentReferenceCreate(
+        message_id=uuid.uuid4(),
+        document_id=uuid.uuid4(),
+        document_type="rfp",
+        filename="rfp.pdf",
+        content_snippet=snippet,
+        relevance_score=0.1,
+        page_number=1,
+        page_total=1,
+    )
+
+
+def test_pack_history_keeps_newest_messages_in_order():
+    # Arrange
+    newest_first = [
+        _message("assistant", "three four"),
+        _message("User", "one two"),
+        _message("assistant", "an old answer that no longer fits"),
+        _message("user", "hi"),
+    ]
+    budget = 2 * (2 + MESSAGE_OVERHEAD_TOKENS)
+
+    # Act
+    packed = pack_history(newest_first, budget)
+
+    # Assert
+    assert packed == [
+        {"role": "user", "content": "one two"},
+        {"role": "assistant", "content": "three four"},
+    ]
+
+
+def test_pack_references_stops_at_budget():
+    # Arrange
+    references = [_reference("a b c"), _reference("d e"), _reference("f")]
+
+    # Act
+    packed = pack_references(references, max_tokens=5)
+
+    # Assert
+    assert [ref.content_snippet for ref in packed] == ["a b c", "d e"]
@@ -0,0 +1,56 @@
+import asyncio
+import uuid
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy.sql.dml import Update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import app.modules.items.models  # noqa: F401 - registers mapped relationships
+import app.modules.users.models  # noqa: F401
+from app.modules.chat.repository import async_chat_message_repository
+from app.modules.chat.schemas import ChatMessageCreate
+
+
+@patch("app.modules.chat.repository.capacity_service")
+def test_async_create_message_counts_tokens_in_same_transaction(mock_capacity):
+    # Arrange
+    session = MagicMock(spec=AsyncSession)
+    mock_capacity.count_tokens.return_value = 7
+    conversation_id = uuid.uuid4()
+
+    # Act
+    message = asyncio.run(
+        async_chat_message_repository.create(
+            session,
+            obj_in=ChatMessageCreate(role="user", content="hello there"),
+            conversation_id=conversation_id
+        )
+    )
+
+    # Assert
+    assert message.token_count == 7
+    assert message.conversation_id == conversation_id
+    statement = session.exec.await_args.args[0]
+    assert isinstance(statement, Update)
+    session.commit.assert_awaited_once()
+    session.refresh.assert_awaited_once_with(message)
+
+
+def test_async_create_message_prefers_reported_usage():
+    # Arrange
+    session = MagicMock(spec=AsyncSession)
+
+    # Act
+    message = asyncio.run(
+        async_chat_message_repository.create(
+            session,
+            obj_in=ChatMessageCreate(role="assistant", content="a reply"),
+            conversation_id=uuid.uuid4(),
+            prompt_tokens=120,
+            completion_tokens=30
+        )
+    )
+
+    # Assert
+    assert message.token_count == 30
+    assert message.prompt_tokens == 120
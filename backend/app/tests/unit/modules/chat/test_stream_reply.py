@@ -0,0 +1,75 @@
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, patch
+
+from app.api.v1.endpoints import chat
+from app.modules.chat.chat_service import PreparedMessage
+
+
+async def _deltas(*args, **kwargs):
+    for delta in ["Hello", " there", " and", " more"]:
+        yield delta
+
+
+def _prepared():
+    return PreparedMessage(
+        conversation_id=uuid.uuid4(),
+        chat_messages=[{"role": "user", "content": "Say hello"}],
+    )
+
+
+def test_stream_reply_stores_partial_reply_when_client_disconnects():
+    # Arrange
+    prepared = _prepared()
+    store = AsyncMock(return_value={})
+
+    async def consume_two_tokens():
+        stream = chat._stream_reply(prepared)
+        await stream.__anext__()
+        await stream.__anext__()
+        # The client goes away; Starlette closes the generator
+        await stream.aclose()
+
+    # Act
+    with patch.object(chat.openai_service, "stream_chat_completion", _deltas), \
+            patch.object(chat, "_store_reply", store), \
+            patch.object(chat.tokenizer, "count", side_effect=lambda text: len(text.split())):
+        asyncio.run(consume_two_tokens())
+
+    # Assert
+    store.assert_awaited_once()
+    stored_prepared, content, usage = store.await_args.args
+    assert stored_prepared is prepared
+    assert content == "Hello there"
+    assert usage["completion_tokens"] == 2
+    assert usage["prompt_tokens"] > 0
+
+
+def test_stream_reply_store_survives_cancellation():
+    # Arrange
+    prepared = _prepared()
+    stored = []
+
+    async def slow_store(prepared, content, usage):
+        await asyncio.sleep(0.05)
+        stored.append(content)
+        return {}
+
+    async def cancel_while_storing():
+        async def consume():
+            async for _ in chat._stream_reply(prepared):
+                pass
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0.1)
+
+    # Act
+    with patch.object(chat.openai_service, "stream_chat_completion", _deltas), \
+            patch.object(chat, "_store_reply", slow_store):
+        asyncio.run(cancel_while_storing())
+
+    # Assert
+    assert stored == ["Hello there and more"]
@@ -0,0 +1,123 @@
+import uuid
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.modules.chat.context_builder import MESSAGE_OVERHEAD_TOKENS
+from app.modules.chat.models import ChatMessage
+from app.modules.chat.tasks.summary_tasks import (
+    _batched_by_tokens,
+    _split_recent,
+    _summarize_conversation,
+    request_summary,
+)
+
+
+pytestmark = pytest.mark.usefixtures("word_tokens")
+
+
+def _messages(*word_counts):
+    return [
+        ChatMessage(conversation_id=uuid.uuid4(), role="user", content=" ".join(["w"] * n))
+        for n in word_counts
+    ]
+
+
+def test_split_recent_keeps_newest_messages_within_budget():
+    # Arrange
+    messages = _messages(10, 10, 10, 10)
+    per_message = 10 + MESSAGE_OVERHEAD_TOKENS
+
+    # Act
+    split = _split_recent(messages, keep_recent_tokens=2 * per_message)
+
+    # Assert
+    assert split == 2
+
+
+def test_split_recent_keeps_everything_when_tail_fits():
+    # Arrange
+    messages = _messages(1, 1)
+
+    # Act
+    split = _split_recent(messages, keep_recent_tokens=1000)
+
+    # Assert
+    assert split == 0
+
+
+def test_batched_by_tokens_preserves_order_and_limits_batches():
+    # Arrange
+    messages = _messages(10, 10, 10, 100)
+    per_message = 10 + MESSAGE_OVERHEAD_TOKENS
+
+    # Act
+    batches = list(_batched_by_tokens(messages, max_tokens=2 * per_message))
+
+    # Assert
+    assert [len(batch) for batch in batches] == [2, 1, 1]
+    assert [m for batch in batches for m in batch] == messages
+
+
+def test_request_summary_queues_once_while_pending():
+    # Arrange: Redis accepts the first marker and rejects the second
+    client = MagicMock()
+    client.set.side_effect = [True, None]
+    conversation_id = str(uuid.uuid4())
+
+    # Act
+    with patch(
+        "app.modules.chat.tasks.summary_tasks._redis", return_value=client
+    ), patch(
+        "app.modules.chat.tasks.summary_tasks.summarize_conversation_task"
+    ) as task:
+        first = request_summary(conversation_id)
+        second = request_summary(conversation_id)
+
+    # Assert
+    assert (first, second) == (True, False)
+    task.delay.assert_called_once_with(conversation_id)
+
+
+def test_summarize_conversation_holds_no_transaction_during_llm_calls():
+    # Arrange
+    events = []
+    conversation = MagicMock(summary=None, summary_until=None, id=uuid.uuid4())
+    tail = [
+        ChatMessage(conversation_id=conversation.id, role="user", content="old", token_count=5000),
+        ChatMessage(conversation_id=conversation.id, role="user", content="new", token_count=5000),
+    ]
+    session = MagicMock()
+    session.get.return_value = conversation
+    session.exec.return_value = MagicMock(rowcount=1)
+
+    @contextmanager
+    def session_context():
+        events.append("begin")
+        yield session
+        events.append("end")
+
+    def summarize(summary, batch):
+        events.append("llm")
+        return "summary"
+
+    # Act
+    with patch(
+        "app.modules.chat.tasks.summary_tasks.get_session_context", session_context
+    ), patch(
+        "app.modules.chat.tasks.summary_tasks.chat_message_repository.get_after",
+        return_value=tail,
+    ), patch("app.modules.chat.tasks.summary_tasks._summarize", side_effect=summarize):
+        result = _summarize_conversation(MagicMock(), str(conversation.id))
+
+    # Assert
+    assert result["status"] == "completed"
+    assert events == ["begin", "end", "llm", "begin", "end"]
+    statement = str(
+        session.exec.call_args.args[0].compile(dialect=postgresql.dialect())
+    )
+    assert statement.startswith("UPDATE chatconversation")
+    assert "summary_until IS NOT DISTINCT FROM" in statement
+    assert "FOR UPDATE" not in statement
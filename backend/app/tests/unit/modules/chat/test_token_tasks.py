@@ -0,0 +1,65 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from sqlmodel import Session, create_engine, select
+
+import app.modules.items.models  # noqa: F401 - registers mapped relationships
+import app.modules.users.models  # noqa: F401
+from app.modules.chat.models import ChatMessage
+from app.modules.chat.tasks.token_tasks import _count_tokens, backfill_message_token_counts
+
+
+@pytest.fixture(autouse=True)
+def word_tokens():
+    # One token per word keeps counts easy to reason about
+    with patch(
+        "app.modules.chat.tasks.token_tasks.tokenizer.count_batch",
+        side_effect=lambda texts: [len(text.split()) for text in texts],
+    ):
+        yield
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    ChatMessage.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def test_backfill_fills_only_missing_counts(session):
+    # Arrange
+    conversation_id = uuid.uuid4()
+    created_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(5):
+        session.add(ChatMessage(
+            conversation_id=conversation_id,
+            role="user",
+            content=" ".join(["w"] * (i + 1)),
+            token_count=99 if i == 0 else None,
+            created_at=created_at,
+        ))
+    session.commit()
+
+    # Act
+    updated = backfill_message_token_counts(session, batch_size=2, workers=1)
+
+    # Assert
+    assert updated == 4
+    counts = sorted(session.exec(select(ChatMessage.token_count)).all())
+    assert counts == [2, 3, 4, 5, 99]
+
+
+def test_count_tokens_splits_across_workers_in_order():
+    # Arrange
+    texts = [" ".join(["w"] * n) for n in range(1, 8)]
+
+    # Act
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        counts = _count_tokens(executor, texts, workers=3)
+
+    # Assert
+    assert counts == list(range(1, 8))
@@ -0,0 +1,99 @@
+import asyncio
+import uuid
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import app.modules.items.models  # noqa: F401 - registers mapped relationships
+import app.modules.users.models  # noqa: F401
+from app.modules.projects.capacity_service import capacity_service
+from app.modules.projects.models import Document, DocumentStatus
+from app.modules.projects.repository import document_repository
+
+
+@pytest.fixture
+def mock_session():
+    return MagicMock(spec=Session)
+
+
+def _document(status, estimated_tokens=500):
+    return Document(
+        project_id=uuid.uuid4(),
+        filename="rfp.pdf",
+        file_path="/tmp/rfp.pdf",
+        file_size=1,
+        file_type="pdf",
+        status=status,
+        estimated_tokens=estimated_tokens,
+    )
+
+
+def test_get_capacity_info_reads_stored_counters(mock_session):
+    # Arrange
+    mock_session.exec.return_value.first.return_value = (6000, 2000, 10000)
+
+    # Act
+    capacity = capacity_service.get_capacity_info(mock_session, uuid.uuid4())
+
+    # Assert
+    mock_session.exec.assert_called_once()
+    assert capacity["total_tokens"] == 8000
+    assert capacity["remaining_tokens"] == 2000
+    assert capacity["is_near_limit"] and not capacity["is_over_limit"]
+
+
+def test_get_capacity_info_missing_project(mock_session):
+    # Arrange
+    mock_session.exec.return_value.first.return_value = None
+
+    # Act / Assert
+    with pytest.raises(ValueError):
+        capacity_service.get_capacity_info(mock_session, uuid.uuid4())
+
+
+def test_acan_add_document_checks_remaining_tokens():
+    # Arrange
+    session = MagicMock(spec=AsyncSession)
+    session.exec.return_value = MagicMock()
+    session.exec.return_value.first.return_value = (6000, 2000, 10000)
+
+    # Act
+    fits = asyncio.run(capacity_service.acan_add_document(session, uuid.uuid4(), 1500))
+    too_big = asyncio.run(capacity_service.acan_add_document(session, uuid.uuid4(), 2500))
+
+    # Assert
+    assert fits == (True, "OK")
+    assert too_big[0] is False
+    assert "2000 remaining" in too_big[1]
+
+
+@pytest.mark.parametrize(
+    "old_status, new_status, expected_delta",
+    [
+        (DocumentStatus.PROCESSING, DocumentStatus.COMPLETED, 500),
+        (DocumentStatus.COMPLETED, DocumentStatus.PROCESSING, -500),
+        (DocumentStatus.PROCESSING, DocumentStatus.FAILED, None),
+    ],
+)
+@patch("app.modules.projects.repository.project_repository.add_tokens")
+def test_update_status_adjusts_documents_counter(
+    mock_add_tokens, mock_session, old_status, new_status, expected_delta
+):
+    # Arrange
+    document = _document(old_status)
+    mock_session.get.return_value = document
+
+    # Act
+    document_repository.update_status(
+        mock_session, document_id=document.id, status=new_status
+    )
+
+    # Assert
+    if expected_delta is None:
+        mock_add_tokens.assert_not_called()
+    else:
+        mock_add_tokens.assert_called_once_with(
+            mock_session, document.project_id, documents_tokens=expected_delta
+        )
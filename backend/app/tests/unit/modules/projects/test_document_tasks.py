@@ -0,0 +1,88 @@
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.modules.projects.tasks import document_tasks
+from app.modules.projects.tasks.document_tasks import _chunk_id, process_document_task
+
+
+def _chunks(count):
+    return [
+        {"content": f"chunk {i}", "token_count": 2, "page_number": 1, "page_total": 1}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def document():
+    return MagicMock(
+        id=uuid.uuid4(),
+        project_id=uuid.uuid4(),
+        file_path=__file__,
+        file_type="txt",
+        uploaded_at=datetime(2026, 1, 1),
+        checkpoint_chunks=0,
+    )
+
+
+@pytest.fixture
+def mocks(document):
+    session = MagicMock()
+    session.get.return_value = document
+
+    @contextmanager
+    def session_context():
+        yield session
+
+    with patch.object(document_tasks, "get_session_context", session_context), \
+            patch.object(document_tasks, "document_repository") as repository, \
+            patch.object(document_tasks, "document_processor") as processor, \
+            patch.object(document_tasks, "vector_store") as store, \
+            patch.object(document_tasks, "DocumentProgressReporter") as reporter, \
+            patch.object(document_tasks.settings.ingestion, "batch_size", 2), \
+            patch.object(process_document_task, "update_state"):
+        processor.iter_chunks.return_value = iter(_chunks(5))
+        store.get_embeddings.side_effect = lambda texts: [[0.0] for _ in texts]
+        reporter.return_value.estimated_tokens = 10
+        yield MagicMock(repository=repository, store=store, reporter=reporter)
+
+
+def _upserted_ids(store):
+    return [
+        record[0]
+        for call in store.upsert_many.call_args_list
+        for record in call.args[0]
+    ]
+
+
+def test_process_document_uses_deterministic_chunk_ids(document, mocks):
+    # Act
+    process_document_task.run(str(document.id))
+
+    # Assert
+    assert _upserted_ids(mocks.store) == [
+        str(_chunk_id(document, i)) for i in range(5)
+    ]
+    for call in mocks.store.upsert_many.call_args_list:
+        assert call.kwargs["created_at"] == document.uploaded_at
+    assert mocks.reporter.return_value.checkpoint_chunks == 5
+
+
+def test_process_document_resumes_after_checkpoint(document, mocks):
+    # Arrange
+    document.checkpoint_chunks = 3
+
+    # Act
+    process_document_task.run(str(document.id))
+
+    # Assert
+    assert _upserted_ids(mocks.store) == [
+        str(_chunk_id(document, i)) for i in (3, 4)
+    ]
+    embedded = [
+        text for call in mocks.store.get_embeddings.call_args_list for text in call.args[0]
+    ]
+    assert embedded == ["chunk 3", "chunk 4"]
@@ -0,0 +1,47 @@
+import uuid
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlmodel import Session
+
+import app.modules.chat.models  # noqa: F401 - registers mapped relationships
+import app.modules.items.models  # noqa: F401
+import app.modules.users.models  # noqa: F401
+from app.modules.projects.repository import project_repository
+
+
+@pytest.fixture
+def mock_session():
+    return MagicMock(spec=Session)
+
+
+def _sql(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_get_by_user_id_paginates_in_sql_and_preloads_documents(mock_session):
+    # Arrange
+    mock_session.exec.return_value.all.return_value = []
+
+    # Act
+    project_repository.get_by_user_id(mock_session, uuid.uuid4(), skip=20, limit=10)
+
+    # Assert
+    statement = mock_session.exec.call_args.args[0]
+    sql = _sql(statement)
+    assert "LIMIT" in sql and "OFFSET" in sql
+    assert "ORDER BY project.created_at DESC, project.id DESC" in sql
+    assert any("documents" in str(option.path) for option in statement._with_options)
+
+
+def test_count_by_user_id_counts_in_sql(mock_session):
+    # Arrange
+    mock_session.exec.return_value.one.return_value = 42
+
+    # Act
+    count = project_repository.count_by_user_id(mock_session, uuid.uuid4())
+
+    # Assert
+    assert count == 42
+    assert "count(*)" in _sql(mock_session.exec.call_args.args[0])
@@ -0,0 +1,105 @@
+from unittest.mock import patch
+
+import pytest
+import tiktoken
+
+from app.common.utils.page_cache import file_sha256, sidecar_path
+from app.core.tokenizer import tokenizer
+from app.services.document_processor import document_processor
+
+PAGES = [
+    {"page_number": 1, "page_total": 2, "text": "first page"},
+    {"page_number": 2, "page_total": 2, "text": "second page é"},
+]
+
+
+def test_iter_pages_reuses_sidecar_cache(tmp_path):
+    # Arrange
+    file_path = tmp_path / "doc.pdf"
+    file_path.write_bytes(b"%PDF-fake")
+
+    # Act
+    with patch.object(
+        document_processor, "_extract_pages", return_value=iter(PAGES)
+    ) as mock_extract:
+        first = list(document_processor.iter_pages(str(file_path), "pdf"))
+        second = list(document_processor.iter_pages(str(file_path), "pdf"))
+
+    # Assert
+    assert first == PAGES
+    assert second == PAGES
+    mock_extract.assert_called_once()
+    assert sidecar_path(str(file_path), file_sha256(str(file_path))).exists()
+
+
+def test_iter_pages_leaves_no_sidecar_on_partial_read(tmp_path):
+    # Arrange
+    file_path = tmp_path / "doc.pdf"
+    file_path.write_bytes(b"%PDF-fake")
+
+    # Act
+    with patch.object(document_processor, "_extract_pages", return_value=iter(PAGES)):
+        pages = document_processor.iter_pages(str(file_path), "pdf")
+        next(pages)
+        pages.close()
+
+    # Assert
+    assert list(tmp_path.iterdir()) == [file_path]
+
+
+@pytest.fixture
+def byte_encoding():
+    # One token per byte keeps token counts easy to reason about
+    encoding = tiktoken.Encoding(
+        name="bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+    with patch.object(tokenizer, "_encoding", encoding):
+        yield encoding
+
+
+def test_chunk_text_splits_on_separators_within_token_limit(byte_encoding):
+    # Arrange
+    text = "Alpha beta gamma. Delta epsilon.\n\nZeta eta theta iota kappa."
+
+    # Act
+    chunks = document_processor.chunk_text(text, max_tokens=30, overlap_tokens=0)
+
+    # Assert
+    assert [chunk["content"] for chunk in chunks] == [
+        "Alpha beta gamma.",
+        "Delta epsilon.",
+        "Zeta eta theta iota kappa.",
+    ]
+    assert all(chunk["token_count"] <= 30 for chunk in chunks)
+
+
+def test_chunk_text_overlaps_from_word_boundary(byte_encoding):
+    # Arrange
+    text = "one two three four five six seven eight nine ten"
+
+    # Act
+    chunks = document_processor.chunk_text(text, max_tokens=20, overlap_tokens=8)
+
+    # Assert
+    assert [chunk["content"] for chunk in chunks] == [
+        "one two three four",
+        "four five six",
+        "five six seven",
+        "seven eight nine",
+        "nine ten",
+    ]
+
+
+def test_chunk_text_token_counts_match_encoding(byte_encoding):
+    # Arrange
+    text = "word " * 200
+
+    # Act
+    chunks = document_processor.chunk_text(text, max_tokens=64, overlap_tokens=0)
+
+    # Assert
+    assert sum(chunk["token_count"] for chunk in chunks) == len(byte_encoding.encode(text))
+    assert " ".join(chunk["content"] for chunk in chunks).split() == text.split()
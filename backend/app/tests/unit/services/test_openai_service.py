@@ -0,0 +1,175 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from openai import RateLimitError
+
+from app.services.openai_service import openai_service
+
+
+def _embedding_response(inputs):
+    # Return items out of order to check that results are re-sorted by index
+    data = [
+        SimpleNamespace(index=i, embedding=[float(i), float(len(text))])
+        for i, text in enumerate(inputs)
+    ]
+    return SimpleNamespace(data=list(reversed(data)))
+
+
+@pytest.fixture
+def mock_client():
+    client = MagicMock()
+    client.embeddings.create.side_effect = lambda input, model: _embedding_response(input)
+    with patch.object(openai_service, "client", client):
+        yield client
+
+
+@patch("app.services.openai_service.tokenizer")
+def test_get_embeddings_respects_input_limit(mock_tokenizer, mock_client):
+    # Arrange
+    mock_tokenizer.count_batch.side_effect = lambda texts: [1] * len(texts)
+    texts = [f"text {i}" for i in range(5)]
+
+    # Act
+    with patch("app.services.openai_service.settings") as mock_settings:
+        mock_settings.openai.embedding_batch_max_inputs = 2
+        mock_settings.openai.embedding_batch_max_tokens = 1000
+        result = openai_service.get_embeddings(texts)
+
+    # Assert
+    assert mock_client.embeddings.create.call_count == 3
+    batch_sizes = [
+        len(call.kwargs["input"]) for call in mock_client.embeddings.create.call_args_list
+    ]
+    assert batch_sizes == [2, 2, 1]
+    assert len(result) == 5
+    assert [emb[0] for emb in result] == [0.0, 1.0, 0.0, 1.0, 0.0]
+
+
+@patch("app.services.openai_service.tokenizer")
+def test_get_embeddings_respects_token_limit(mock_tokenizer, mock_client):
+    # Arrange
+    mock_tokenizer.count_batch.side_effect = lambda texts: [40] * len(texts)
+    texts = ["a", "b", "c"]
+
+    # Act
+    with patch("app.services.openai_service.settings") as mock_settings:
+        mock_settings.openai.embedding_batch_max_inputs = 100
+        mock_settings.openai.embedding_batch_max_tokens = 100
+        result = openai_service.get_embeddings(texts)
+
+    # Assert
+    assert mock_client.embeddings.create.call_count == 2
+    assert len(result) == 3
+
+
+def test_get_embeddings_empty_input(mock_client):
+    # Act
+    result = openai_service.get_embeddings([])
+
+    # Assert
+    assert result == []
+    mock_client.embeddings.create.assert_not_called()
+
+
+def _rate_limit_error():
+    request = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+    response = httpx.Response(429, request=request, headers={"retry-after": "0"})
+    return RateLimitError("rate limited", response=response, body=None)
+
+
+@patch("app.services.openai_service.asyncio.sleep", new_callable=AsyncMock)
+@patch("app.services.openai_service.tokenizer")
+def test_get_embeddings_concurrent_retries_rate_limits(mock_tokenizer, mock_sleep):
+    # Arrange
+    mock_tokenizer.count_batch.side_effect = lambda texts: [1] * len(texts)
+    texts = [f"text {i}" for i in range(4)]
+    calls = {"count": 0}
+
+    async def create(input, model):
+        calls["count"] += 1
+        if calls["count"] == 1:
+            raise _rate_limit_error()
+        return _embedding_response(input)
+
+    client = MagicMock()
+    client.embeddings.create = AsyncMock(side_effect=create)
+    client.__aenter__ = AsyncMock(return_value=client)
+    client.__aexit__ = AsyncMock(return_value=None)
+
+    # Act
+    with patch("app.services.openai_service.AsyncOpenAI", return_value=client):
+        result = openai_service.get_embeddings_concurrent(texts, concurrency=2)
+
+    # Assert
+    assert len(result) == 4
+    # Two batches of two inputs, plus one retried request
+    assert client.embeddings.create.await_count == 3
+    assert [len(c.kwargs["input"]) for c in client.embeddings.create.await_args_list] == [2, 2, 2]
+
+
+def test_stream_chat_completion_yields_content_deltas():
+    # Arrange
+    deltas = ["Hel", None, "lo"]
+
+    async def stream():
+        for content in deltas:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value=stream())
+
+    async def collect():
+        return [
+            delta
+            async for delta in openai_service.stream_chat_completion(
+                messages=[{"role": "user", "content": "hi"}]
+            )
+        ]
+
+    # Act
+    with patch.object(openai_service, "async_client", client):
+        result = asyncio.run(collect())
+
+    # Assert
+    assert result == ["Hel", "lo"]
+    assert client.chat.completions.create.await_args.kwargs["stream"] is True
+
+
+def test_stream_chat_completion_reports_usage():
+    # Arrange
+    chunks = [
+        SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="Hi"))], usage=None),
+        SimpleNamespace(
+            choices=[], usage=SimpleNamespace(prompt_tokens=12, completion_tokens=1)
+        ),
+    ]
+
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value=stream())
+    usage = {}
+
+    async def collect():
+        return [
+            delta
+            async for delta in openai_service.stream_chat_completion(
+                messages=[{"role": "user", "content": "hi"}], usage=usage
+            )
+        ]
+
+    # Act
+    with patch.object(openai_service, "async_client", client):
+        result = asyncio.run(collect())
+
+    # Assert
+    assert result == ["Hi"]
+    assert usage == {"prompt_tokens": 12, "completion_tokens": 1}
+    assert client.chat.completions.create.await_args.kwargs["stream_options"] == {
+        "include_usage": True
+    }
@@ -0,0 +1,54 @@
+from unittest.mock import MagicMock
+
+import pytest
+import redis
+
+from app.services.query_embedding_cache import QueryEmbeddingCache
+
+
+@pytest.fixture
+def cache():
+    cache = QueryEmbeddingCache("redis://localhost:6379/0", "test-model", max_entries=2)
+    store = {}
+    cache._redis = MagicMock()
+    cache._redis.get.side_effect = store.get
+    cache._redis.set.side_effect = lambda key, value, ex: store.__setitem__(key, value)
+    return cache
+
+
+def test_get_hits_memory_after_set(cache):
+    # Act
+    cache.set("What is the deadline?", [0.5, 1.5])
+    result = cache.get("What  is the deadline?\n")
+
+    # Assert
+    assert result == [0.5, 1.5]
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_get_falls_back_to_redis_after_eviction(cache):
+    # Arrange
+    cache.set("first", [1.0])
+    cache.set("second", [2.0])
+    cache.set("third", [3.0])
+
+    # Act
+    result = cache.get("first")
+
+    # Assert
+    assert result == [1.0]
+    stats = cache.stats()
+    assert stats["redis_hits"] == 1
+    assert stats["size"] == 2
+
+
+def test_get_treats_redis_errors_as_misses(cache):
+    # Arrange
+    cache._redis.get.side_effect = redis.ConnectionError("down")
+
+    # Act
+    result = cache.get("unknown")
+
+    # Assert
+    assert result is None
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,152 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from contextlib import asynccontextmanager, contextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.embedding_cache import content_hash
+from app.services.vector_store import SearchHit, uuid_from_time, vector_store
+
+
+@pytest.fixture
+def mock_cache():
+    cache = MagicMock()
+    with patch.object(vector_store, "embedding_cache", cache):
+        yield cache
+
+
+@patch("app.services.vector_store.openai_service")
+def test_get_embeddings_only_requests_uncached_texts(mock_openai, mock_cache):
+    # Arrange
+    mock_cache.get_many.return_value = {content_hash("cached text"): [1.0]}
+    mock_openai.get_embeddings_concurrent.return_value = [[2.0]]
+
+    # Act
+    result = vector_store.get_embeddings(["cached text", "new text", "new  text\n"])
+
+    # Assert
+    assert result == [[1.0], [2.0], [2.0]]
+    mock_openai.get_embeddings_concurrent.assert_called_once_with(["new text"])
+    stored = dict(mock_cache.put_many.call_args.args[0])
+    assert stored == {content_hash("new text"): [2.0]}
+
+
+@patch("app.services.vector_store.openai_service")
+def test_get_embeddings_without_cache_on_lookup_failure(mock_openai, mock_cache):
+    # Arrange
+    mock_cache.get_many.side_effect = RuntimeError("relation does not exist")
+    mock_openai.get_embeddings_concurrent.return_value = [[1.0], [2.0]]
+
+    # Act
+    result = vector_store.get_embeddings(["a", "b"])
+
+    # Assert
+    assert result == [[1.0], [2.0]]
+
+
+@pytest.fixture
+def mock_conn():
+    conn = MagicMock()
+
+    @contextmanager
+    def connect(session=None):
+        yield conn
+
+    with patch.object(vector_store, "connect", connect):
+        yield conn
+
+
+def test_search_returns_hits_without_dataframe(mock_conn):
+    # Arrange
+    record_id = uuid.uuid4()
+    rows = [(record_id, {"document_id": "doc-1"}, "some content", [0.1], 0.25)]
+    mock_conn.execute.return_value.all.return_value = rows
+
+    # Act
+    with patch.object(vector_store, "get_embedding", return_value=[0.1]):
+        hits = vector_store.search("query", limit=1)
+
+    # Assert
+    assert len(hits) == 1
+    assert isinstance(hits[0], SearchHit)
+    assert hits[0].id == str(record_id)
+    assert hits[0].metadata["document_id"] == "doc-1"
+    assert hits[0].content == "some content"
+    assert hits[0].distance == 0.25
+
+
+def test_asearch_filters_by_metadata_on_async_connection():
+    # Arrange
+    rows = [(uuid.uuid4(), {"document_id": "doc-1"}, "some content", [0.1], 0.5)]
+    conn = MagicMock()
+    conn.execute = AsyncMock(return_value=MagicMock())
+    conn.execute.return_value.all.return_value = rows
+
+    @asynccontextmanager
+    async def aconnect(session=None):
+        yield conn
+
+    # Act
+    with patch.object(vector_store, "aget_embedding", AsyncMock(return_value=[0.1])), \
+            patch.object(vector_store, "aconnect", aconnect):
+        hits = asyncio.run(
+            vector_store.asearch("query", limit=3, metadata_filter={"project_id": "p"})
+        )
+
+    # Assert
+    compiled = conn.execute.call_args.args[0].compile(dialect=postgresql.dialect())
+    assert "<=>" in str(compiled)
+    assert "@>" in str(compiled)
+    assert compiled.params["metadata_1"] == {"project_id": "p"}
+    assert compiled.params["param_1"] == 3
+    assert [hit.content for hit in hits] == ["some content"]
+
+
+def test_upsert_many_issues_one_statement_per_batch(mock_conn):
+    # Arrange
+    record_id = str(uuid.uuid4())
+    records = [(record_id, {"chunk_index": i}, f"chunk {i}", [0.1]) for i in range(5)]
+
+    # Act
+    total = vector_store.upsert_many(records, batch_size=2)
+
+    # Assert
+    assert total == 5
+    calls = mock_conn.execute.call_args_list
+    assert len(calls) == 3
+    # Each call is a single multi-row statement, not an executemany
+    assert all(len(call.args) == 1 for call in calls)
+    compiled = [call.args[0].compile(dialect=postgresql.dialect()) for call in calls]
+    assert [str(sql).count("now()") for sql in compiled] == [2, 2, 1]
+    assert "ON CONFLICT (id, created_at) DO UPDATE" in str(compiled[0])
+    assert compiled[0].params["id_m0"] == uuid.UUID(record_id)
+
+
+def test_connect_uses_session_connection_without_commit():
+    # Arrange
+    session = MagicMock()
+
+    # Act
+    with vector_store.connect(session) as conn:
+        pass
+
+    # Assert
+    assert conn is session.connection.return_value
+    session.commit.assert_not_called()
+
+
+def test_uuid_from_time_treats_naive_datetimes_as_utc():
+    # Arrange
+    naive = datetime(2024, 5, 1, 12, 30, 15, 250000)
+    aware = naive.replace(tzinfo=timezone.utc)
+
+    # Act
+    naive_id = uuid_from_time(naive)
+    aware_id = uuid_from_time(aware)
+
+    # Assert
+    assert naive_id.version == 1
+    assert naive_id.time == aware_id.time
@@ -1,6 +1,8 @@
 import os
 from celery import Celery
+from celery.signals import worker_process_init
 from app.core.config import settings
+from app.core.tokenizer import tokenizer
 
 # Initialize Celery with the broker URL
 celery_app = Celery(
@@ -10,6 +12,9 @@ celery_app = Celery(
     include=[
         # Projects module tasks
         "app.modules.projects.tasks.document_tasks",
+        # Chat module tasks
+        "app.modules.chat.tasks.summary_tasks",
+        "app.modules.chat.tasks.token_tasks",
     ],
 )
 
@@ -26,6 +31,13 @@ celery.conf.update(
     broker_connection_retry_on_startup=True,
 )
 
+
+@worker_process_init.connect
+def warm_up_tokenizer(**kwargs):
+    """Load the tokenizer in each worker process before it takes tasks."""
+    tokenizer.warm_up()
+
+
 # Optional configuration for result expiration
 celery.conf.result_expires = 60 * 60 * 24 * 7  # 7 days
 
@@ -0,0 +1,86 @@
+"""
+Benchmark PDF text extraction throughput.
+
+Compares pages per second for PyPDF2 and PyMuPDF. Pass PDF paths to benchmark them, or run without
+arguments to benchmark a synthetic fixture corpus.
+
+Usage:
+    python scripts/benchmark_pdf_extraction.py [file.pdf ...]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.common.utils.pdf import (  # noqa: E402
+    _import_pymupdf,
+    iter_pdf_pages_pymupdf,
+    iter_pdf_pages_pypdf2,
+    pdf_page_count,
+)
+
+FIXTURE_PAGES = (20, 200, 1000)
+
+LOREM = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua. "
+)
+
+
+def build_fixture_corpus(directory: str) -> List[str]:
+    """Write synthetic multi-page PDFs of increasing size into ``directory``."""
+    pymupdf = _import_pymupdf()
+    paths = []
+    for pages in FIXTURE_PAGES:
+        path = os.path.join(directory, f"fixture_{pages}_pages.pdf")
+        doc = pymupdf.open()
+        for page_number in range(pages):
+            page = doc.new_page()
+            text = f"Page {page_number + 1}\n" + LOREM * 20
+            page.insert_textbox(page.rect + (36, 36, -36, -36), text, fontsize=9)
+        doc.save(path)
+        doc.close()
+        paths.append(path)
+    return paths
+
+
+def measure(extract: Callable[[str], Iterator[Dict]], path: str) -> float:
+    """Return the wall-clock seconds taken to exhaust ``extract(path)``."""
+    start = time.perf_counter()
+    for _ in extract(path):
+        pass
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", nargs="*", help="PDF files to benchmark")
+    args = parser.parse_args()
+
+    extractors = {
+        "pypdf2": iter_pdf_pages_pypdf2,
+        "pymupdf": iter_pdf_pages_pymupdf,
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = args.files or build_fixture_corpus(tmp)
+
+        print(f"{'file':<32} {'pages':>6} " + " ".join(f"{name:>14}" for name in extractors))
+        for path in files:
+            pages = pdf_page_count(path)
+            rates = []
+            for extract in extractors.values():
+                elapsed = measure(extract, path)
+                rates.append(pages / elapsed if elapsed else float("inf"))
+            print(
+                f"{os.path.basename(path)[:32]:<32} {pages:>6} "
+                + " ".join(f"{rate:>10.1f} p/s" for rate in rates)
+            )
+
+
+if __name__ == "__main__":
+    main()